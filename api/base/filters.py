@@ -118,6 +118,13 @@ class ODMFilterMixin(FilterMixin):
         else:
             query = default_query
 
+        # Restrict to the requested page when using cursor pagination
+        get_cursor_query = getattr(getattr(self, 'paginator', None), 'get_cursor_query', None)
+        if get_cursor_query is not None:
+            cursor_query = get_cursor_query(self.request, self)
+            if cursor_query is not None:
+                query = query & cursor_query
+
         return query
 
     def query_params_to_odm_query(self, query_params):
@@ -145,51 +152,114 @@ class ListFilterMixin(FilterMixin):
 
     Subclasses must define `get_default_queryset()`.
 
+    If the listed objects are instances of a stored model, subclasses may set `model_class`
+    to that model. Filters on serializer fields whose source is a stored field of the model
+    are then converted into an ODM query, which is passed to `get_default_queryset(query)`
+    to be applied in the database. The remaining filters are applied to the results in a
+    single pass, preserving their order.
+
     Serializers that want to restrict which fields are used for filtering need to have a variable called
     filterable_fields which is a frozenset of strings representing the field names as they appear in the serialization.
     """
 
+    # Stored model of the listed objects, if any
+    model_class = None
+
     def __init__(self, *args, **kwargs):
         super(FilterMixin, self).__init__(*args, **kwargs)
         if not self.serializer_class:
             raise NotImplementedError()
 
-    def get_default_queryset(self):
+    def get_default_queryset(self, query=None):
+        """Return the unfiltered list of objects.
+
+        :param query: ODM query to intersect with the default results; only passed if
+            `model_class` is set and the request filters on stored fields
+        """
         raise NotImplementedError('Must define get_default_queryset')
 
     def get_queryset_from_request(self):
-        default_queryset = self.get_default_queryset()
-        if self.request.QUERY_PARAMS:
-            param_queryset = self.param_queryset(self.request.QUERY_PARAMS, default_queryset)
-            return param_queryset
+        query, predicates = self.compile_filters(self.request.QUERY_PARAMS)
+        if query is not None:
+            default_queryset = self.get_default_queryset(query=query)
         else:
+            default_queryset = self.get_default_queryset()
+        if not predicates:
             return default_queryset
+        return [
+            item for item in default_queryset
+            if all(predicate(item) for predicate in predicates)
+        ]
 
-    def param_queryset(self, query_params, default_queryset):
-        """filters default queryset based on query parameters"""
-        fields_dict = query_params_to_fields(query_params)
-        queryset = set(default_queryset)
-        if fields_dict:
-            for field_name, value in fields_dict.items():
-                if self.is_filterable_field(key=field_name):
-                    queryset = queryset.intersection(set(self.get_filtered_queryset(field_name, value, default_queryset)))
-        return list(queryset)
+    def compile_filters(self, query_params):
+        """Split the filters in ``query_params`` into an ODM query on stored fields of
+        `model_class` and a list of predicates to apply to each object.
 
-    def get_filtered_queryset(self, field_name, value, default_queryset):
-        """filters default queryset based on the serializer field type"""
+        :return: tuple of the query (or ``None``) and the predicates
+        """
+        query_parts = []
+        predicates = []
+        for field_name, value in query_params_to_fields(query_params).items():
+            if not self.is_filterable_field(key=field_name):
+                continue
+            query_part = self.get_filter_query(field_name, value)
+            if query_part is not None:
+                query_parts.append(query_part)
+            else:
+                predicates.append(self.get_filter_predicate(field_name, value))
+        query = functools.reduce(intersect, query_parts) if query_parts else None
+        return query, predicates
+
+    def get_filter_query(self, field_name, value):
+        """Return an ODM query equivalent to filtering on ``field_name``, or ``None`` if
+        the field is not a stored field of `model_class`.
+        """
+        if self.model_class is None:
+            return None
+        field = self.serializer_class._declared_fields[field_name]
+        key = self.convert_key(field_name)
+        if key not in self.model_class._fields:
+            return None
+        if isinstance(field, ser.BooleanField):
+            return Q(key, 'eq', self.convert_value(value, field_name))
+        if isinstance(field, ser.CharField):
+            return Q(key, 'icontains', value.strip())
+        return None
+
+    def get_filter_predicate(self, field_name, value):
+        """Return a function that tests whether an object matches the filter on
+        ``field_name``. The field and value are resolved once, here.
+        """
         field = self.serializer_class._declared_fields[field_name]
 
         if isinstance(field, ser.SerializerMethodField):
-            return_val = [item for item in default_queryset if self.get_serializer_method(field_name)(item) == self.convert_value(value, field_name)]
-        elif isinstance(field, ser.BooleanField):
-            return_val = [item for item in default_queryset if getattr(item, field_name, None) == self.convert_value(value, field_name)]
+            method = self.get_serializer_method(field_name)
+            expected = self.convert_value(value, field_name)
+            return lambda item: method(item) == expected
+
+        get_value = self.get_field_getter(field_name)
+        if isinstance(field, ser.BooleanField):
+            expected = self.convert_value(value, field_name)
+            return lambda item: get_value(item) == expected
         elif isinstance(field, ser.CharField):
-            return_val = [item for item in default_queryset if value.lower() in getattr(item, field_name, None).lower()]
+            expected = value.lower()
+            return lambda item: expected in (get_value(item) or '').lower()
         else:
             # TODO Ensure that if you try to filter on an invalid field, it returns a useful error.
-            return_val = [item for item in default_queryset if value in getattr(item, field_name, None)]
+            return lambda item: value in (get_value(item) or [])
 
-        return return_val
+    def get_field_getter(self, field_name):
+        """Return a function that reads the value of the serializer field ``field_name``
+        from an object, following the field's source.
+        """
+        field = self.get_serializer().fields[field_name]
+
+        def get_value(item):
+            try:
+                return field.get_attribute(item)
+            except (AttributeError, KeyError):
+                return None
+        return get_value
 
     def get_serializer_method(self, field_name):
         """
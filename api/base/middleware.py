@@ -1,7 +1,10 @@
+from django.http import StreamingHttpResponse
 from pymongo.errors import OperationFailure
 from raven.contrib.django.raven_compat.models import sentry_exception_handler
 
+from framework.mongo.handlers import client_pool
 from framework.transactions import commands, messages, utils
+from website import settings
 
 from .api_globals import api_globals
 
@@ -13,6 +16,9 @@ class TokuTransactionsMiddleware(object):
 
     def process_request(self, request):
         """Begin a transaction if one doesn't already exist."""
+        if settings.DB_POOLED_CLIENT:
+            # Pin a socket so the transaction is committed on the same connection
+            client_pool.checkout()
         try:
             commands.begin()
         except OperationFailure as err:
@@ -70,3 +76,38 @@ class DjangoGlobalMiddleware(object):
     def process_response(self, request, response):
         api_globals.request = None
         return response
+
+
+class StreamingRenderedResponse(StreamingHttpResponse):
+    """Streaming response that takes the place of a DRF `Response`, which
+    Django renders after template response middleware have run.
+    """
+
+    def render(self):
+        return self
+
+
+class StreamingResponseMiddleware(object):
+    """Stream successful API responses whose renderer supports it (see
+    `JSONAPIRenderer.iter_render`), instead of rendering the whole response
+    body in memory. Views have already serialized `response.data` by this
+    point, so only the encoded copy of the body is saved.
+    """
+
+    def process_template_response(self, request, response):
+        renderer = getattr(response, 'accepted_renderer', None)
+        if not hasattr(renderer, 'iter_render') or response.exception or response.data is None:
+            return response
+
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = '{}; charset={}'.format(content_type, renderer.charset)
+        streaming = StreamingRenderedResponse(
+            renderer.iter_render(response.data, response.accepted_media_type, response.renderer_context),
+            status=response.status_code,
+            content_type=content_type,
+        )
+        for key, value in response.items():
+            if key.lower() != 'content-type':
+                streaming[key] = value
+        return streaming
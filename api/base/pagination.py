@@ -1,16 +1,45 @@
+import json
+import base64
+import datetime
 from collections import OrderedDict
 
+from modularodm import Q
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.utils.urls import (
     replace_query_param, remove_query_param
 )
 
+from api.base.filters import ODMOrderingFilter
+
+DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+
 class JSONAPIPagination(pagination.PageNumberPagination):
-    """Custom paginator that formats responses in a JSON-API compatible format."""
+    """Custom paginator that formats responses in a JSON-API compatible format.
+
+    Requests with a `page[cursor]` parameter (which may be empty, for the first
+    page) are paginated with `JSONAPICursorPagination` instead, unless the view
+    sets `cursor_pagination = False`.
+    """
 
     page_size_query_param = 'page[size]'
 
+    cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if JSONAPICursorPagination.is_requested(request, view):
+            self.cursor_paginator = JSONAPICursorPagination()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super(JSONAPIPagination, self).paginate_queryset(queryset, request, view)
+
+    def get_cursor_query(self, request, view):
+        if JSONAPICursorPagination.is_requested(request, view):
+            return JSONAPICursorPagination().get_cursor_query(request, view)
+        return None
+
     def get_first_link(self):
         if not self.page.has_previous():
             return None
@@ -25,6 +54,8 @@ class JSONAPIPagination(pagination.PageNumberPagination):
         return replace_query_param(url, self.page_query_param, page_number)
 
     def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
         response_dict = OrderedDict([
             ('data', data),
             ('links', OrderedDict([
@@ -39,3 +70,182 @@ class JSONAPIPagination(pagination.PageNumberPagination):
             ])),
         ])
         return Response(response_dict)
+
+
+class JSONAPICursorPagination(pagination.BasePagination):
+    """Keyset paginator: each page continues after the sort key and `_id` of
+    the last item of the previous page, encoded in an opaque `page[cursor]`
+    token, so deep pages cost no more than the first. Results are ordered by
+    the view's ordering (see `ODMOrderingFilter`), then by `_id`.
+
+    For ODM querysets the position condition is added to the database query
+    by `ODMFilterMixin`; lists are filtered in memory. Lists that are not
+    explicitly ordered keep the order the view gives them (e.g. contributors
+    in the order they were added), and each page continues after the item
+    whose `_id` is in the cursor. Counting the results
+    requires an extra query, so the number of results from the start of the
+    page (the total, on the first page) is only included as `remaining` if
+    `page[count]` is true.
+    """
+
+    cursor_query_param = 'page[cursor]'
+    count_query_param = 'page[count]'
+    page_size_query_param = 'page[size]'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    tiebreaker = '_id'
+
+    @classmethod
+    def is_requested(cls, request, view):
+        return (
+            cls.cursor_query_param in request.query_params and
+            getattr(view, 'cursor_pagination', True)
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request, view):
+        """Return the sort field and whether it is descending."""
+        ordering = ODMOrderingFilter().get_ordering(request, None, view)
+        field = ordering[0] if ordering else self.tiebreaker
+        if field.startswith('-'):
+            return field[1:], True
+        return field, False
+
+    def encode_cursor(self, field, item):
+        value = get_value(item, field)
+        if isinstance(value, datetime.datetime):
+            value = {'datetime': value.strftime(DATETIME_FORMAT)}
+        position = [field, value, get_value(item, self.tiebreaker)]
+        return base64.urlsafe_b64encode(json.dumps(position))
+
+    def decode_cursor(self, request, field):
+        """Return the sort value and `_id` of the position encoded in the
+        request, or `None` for the first page.
+
+        :raises: NotFound if the cursor is invalid or was made for a different
+            ordering
+        """
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            cursor_field, value, key = json.loads(base64.urlsafe_b64decode(str(token)))
+            if isinstance(value, dict):
+                value = datetime.datetime.strptime(value['datetime'], DATETIME_FORMAT)
+        except (TypeError, ValueError, KeyError):
+            raise NotFound('Invalid cursor.')
+        if cursor_field != field:
+            raise NotFound('Invalid cursor.')
+        return value, key
+
+    def get_cursor_query(self, request, view):
+        """Return the ODM query selecting the items after the requested
+        cursor, or `None` for the first page.
+        """
+        field, descending = self.get_ordering(request, view)
+        position = self.decode_cursor(request, field)
+        if position is None:
+            return None
+        value, key = position
+        operator = 'lt' if descending else 'gt'
+        if field == self.tiebreaker:
+            return Q(field, operator, value)
+        return (
+            Q(field, operator, value) |
+            (Q(field, 'eq', value) & Q(self.tiebreaker, operator, key))
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.field, descending = self.get_ordering(request, view)
+        direction = '-' if descending else ''
+        ordered = bool(ODMOrderingFilter().get_ordering(request, None, view))
+
+        count = request.query_params.get(self.count_query_param) in ('true', 'True', '1')
+        self.count = None
+
+        if hasattr(queryset, 'limit'):
+            # ODM queryset, already restricted by `get_cursor_query`
+            if count:
+                self.count = queryset.count()
+            sort = [direction + self.field]
+            if self.field != self.tiebreaker:
+                sort.append(direction + self.tiebreaker)
+            items = list(queryset.sort(*sort).limit(self.page_size + 1))
+        elif not ordered:
+            items = list(queryset)
+            position = self.decode_cursor(request, self.field)
+            if position is not None:
+                keys = [get_value(item, self.tiebreaker) for item in items]
+                try:
+                    items = items[keys.index(position[1]) + 1:]
+                except ValueError:
+                    raise NotFound('Invalid cursor.')
+            if count:
+                self.count = len(items)
+            items = items[:self.page_size + 1]
+        else:
+            items = sorted(
+                queryset,
+                key=lambda item: (get_value(item, self.field), get_value(item, self.tiebreaker)),
+                reverse=descending,
+            )
+            position = self.decode_cursor(request, self.field)
+            if position is not None:
+                if descending:
+                    items = [item for item in items if get_position(item, self.field, self.tiebreaker) < position]
+                else:
+                    items = [item for item in items if get_position(item, self.field, self.tiebreaker) > position]
+            if count:
+                self.count = len(items)
+            items = items[:self.page_size + 1]
+
+        self.has_next = len(items) > self.page_size
+        self.items = items[:self.page_size]
+        return self.items
+
+    def get_first_link(self):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, '')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        cursor = self.encode_cursor(self.field, self.items[-1])
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        meta = OrderedDict([('per_page', self.page_size)])
+        if self.count is not None:
+            meta['remaining'] = self.count
+        response_dict = OrderedDict([
+            ('data', data),
+            ('links', OrderedDict([
+                ('first', self.get_first_link()),
+                ('last', None),
+                ('prev', None),
+                ('next', self.get_next_link()),
+                ('meta', meta),
+            ])),
+        ])
+        return Response(response_dict)
+
+
+def get_value(item, field):
+    if isinstance(item, dict):
+        return item.get(field)
+    return getattr(item, field, None)
+
+
+def get_position(item, field, tiebreaker):
+    return get_value(item, field), get_value(item, tiebreaker)
@@ -1,6 +1,34 @@
 
+from rest_framework.compat import SHORT_SEPARATORS, LONG_SEPARATORS
 from rest_framework.renderers import JSONRenderer
 
+from framework.routing import iter_json, buffer_chunks
+
+
 class JSONAPIRenderer(JSONRenderer):
     format = "jsonapi"
     media_type = 'application/vnd.api+json'
+
+    # Size in characters of each chunk of a streamed response
+    chunk_size = 16 * 1024
+
+    def iter_render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` like `render`, but yield the response in chunks
+        rather than building it in memory. Indented responses, which are only
+        used for browsing, are rendered in one chunk.
+        """
+        renderer_context = renderer_context or {}
+        if renderer_context.get('indent') or 'indent=' in (accepted_media_type or ''):
+            yield self.render(data, accepted_media_type, renderer_context)
+            return
+
+        encoder = self.encoder_class(
+            ensure_ascii=self.ensure_ascii,
+            separators=SHORT_SEPARATORS if self.compact else LONG_SEPARATORS,
+        )
+        for chunk in buffer_chunks(iter_json(data, encoder), self.chunk_size):
+            if isinstance(chunk, unicode):
+                # Same escaping as `JSONRenderer.render`
+                chunk = chunk.replace(u'\u2028', u'\\u2028').replace(u'\u2029', u'\\u2029')
+                chunk = chunk.encode('utf-8')
+            yield chunk
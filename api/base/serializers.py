@@ -82,9 +82,8 @@ class JSONAPIHyperlinkedIdentityField(ser.HyperlinkedIdentityField):
             meta = {}
             for key in self.meta:
                 meta[key] = _rapply(self.meta[key], _url_val, obj=value, serializer=self.parent)
-            self.meta = meta
 
-            return {'links': {self.link_type: {'href': url, 'meta': self.meta}}}
+            return {'links': {self.link_type: {'href': url, 'meta': meta}}}
         else:
             return {'links': {self.link_type: url}}
 
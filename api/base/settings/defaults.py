@@ -110,6 +110,8 @@ MIDDLEWARE_CLASSES = (
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.middleware.security.SecurityMiddleware',
 
+    # Stream API responses rather than rendering them in memory
+    'api.base.middleware.StreamingResponseMiddleware',
 )
 
 TEMPLATES = [
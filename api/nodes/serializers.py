@@ -1,9 +1,75 @@
+import collections
+
+from modularodm import Q
 from rest_framework import serializers as ser
 
 from website.models import Node
 from framework.auth.core import Auth
 from rest_framework import exceptions
-from api.base.serializers import JSONAPISerializer, Link, WaterbutlerLink, LinksField, JSONAPIHyperlinkedIdentityField
+from api.base.serializers import (
+    JSONAPISerializer, JSONAPIListSerializer, Link, WaterbutlerLink, LinksField, JSONAPIHyperlinkedIdentityField
+)
+
+
+class NodeCountProvider(object):
+    """Relationship counts for a batch of nodes, e.g. a page of a node list.
+    The children and pointers of every node in the batch are counted with a
+    single query, and their registrations with another, instead of loading the
+    children and registrations of each node separately.
+
+    :param list nodes: Nodes to count relationships for
+    :param Auth auth: Auth used to decide which children and registrations are visible
+    """
+
+    def __init__(self, nodes, auth):
+        self.auth = auth
+        self.nodes = {node._id: node for node in nodes}
+        self._counts = None
+
+    def __contains__(self, node):
+        return node._id in self.nodes
+
+    @property
+    def counts(self):
+        if self._counts is None:
+            self._counts = self._load_counts()
+        return self._counts
+
+    def _load_counts(self):
+        counts = collections.defaultdict(collections.Counter)
+        node_ids = list(self.nodes)
+
+        # Includes deleted children, which still take up an entry in `nodes`
+        children = Node.find(Q('__backrefs.parent.node.nodes', 'in', node_ids))
+        for child in children:
+            parent_id = child.ancestor_ids[-1] if child.ancestor_ids else child.parent_id
+            counts[parent_id]['primary'] += 1
+            if not child.is_deleted and child.can_view(self.auth):
+                counts[parent_id]['children'] += 1
+
+        registrations = Node.find(Q('registered_from', 'in', node_ids))
+        for registration in registrations:
+            if registration.can_view(self.auth):
+                counts[registration.registered_from._id]['registrations'] += 1
+
+        for node_id, node in self.nodes.items():
+            counts[node_id]['pointers'] = len(node.nodes) - counts[node_id]['primary']
+            counts[node_id]['contributors'] = len(node.contributors)
+        return counts
+
+    def get_count(self, node, name):
+        return self.counts[node._id][name]
+
+
+class NodeListSerializer(JSONAPIListSerializer):
+    """Computes the relationship counts of all the serialized nodes at once."""
+
+    # overrides JSONAPIListSerializer
+    def to_representation(self, data):
+        data = list(data)
+        auth = self.child.get_user_auth(self.context['request'])
+        self.child.count_provider = NodeCountProvider(data, auth)
+        return super(NodeListSerializer, self).to_representation(data)
 
 
 class NodeTagField(ser.Field):
@@ -64,13 +130,28 @@ class NodeSerializer(JSONAPISerializer):
     registrations = JSONAPIHyperlinkedIdentityField(view_name='nodes:node-registrations', lookup_field='pk', link_type='related',
                                                      lookup_url_kwarg='node_id', meta={'count': 'get_registration_count'})
 
+    count_provider = None
+
     class Meta:
         type_ = 'nodes'
 
+    # overrides JSONAPISerializer
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        kwargs['child'] = cls()
+        return NodeListSerializer(*args, **kwargs)
+
     def get_absolute_url(self, obj):
         return obj.absolute_url
 
-    # TODO: See if we can get the count filters into the filter rather than the serializer.
+    def get_count_provider(self, obj):
+        """Return the count provider for the current batch of nodes, or one
+        for `obj` alone if it is being serialized on its own.
+        """
+        if self.count_provider is None or obj not in self.count_provider:
+            auth = self.get_user_auth(self.context['request'])
+            self.count_provider = NodeCountProvider([obj], auth)
+        return self.count_provider
 
     def get_user_auth(self, request):
         user = request.user
@@ -81,20 +162,16 @@ class NodeSerializer(JSONAPISerializer):
         return auth
 
     def get_node_count(self, obj):
-        auth = self.get_user_auth(self.context['request'])
-        nodes = [node for node in obj.nodes if node.can_view(auth) and node.primary and not node.is_deleted]
-        return len(nodes)
+        return self.get_count_provider(obj).get_count(obj, 'children')
 
     def get_contrib_count(self, obj):
-        return len(obj.contributors)
+        return self.get_count_provider(obj).get_count(obj, 'contributors')
 
     def get_registration_count(self, obj):
-        auth = self.get_user_auth(self.context['request'])
-        registrations = [node for node in obj.node__registrations if node.can_view(auth)]
-        return len(registrations)
+        return self.get_count_provider(obj).get_count(obj, 'registrations')
 
     def get_pointers_count(self, obj):
-        return len(obj.nodes_pointer)
+        return self.get_count_provider(obj).get_count(obj, 'pointers')
 
     def create(self, validated_data):
         node = Node(**validated_data)
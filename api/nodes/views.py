@@ -1,11 +1,10 @@
-import requests
-
 from modularodm import Q
 from rest_framework import generics, permissions as drf_permissions
 from rest_framework.exceptions import PermissionDenied, ValidationError
 
 from framework.auth.core import Auth
-from website.models import Node, Pointer
+from website.models import Node, Pointer, User
+from website.util import waterbutler
 from api.users.serializers import ContributorSerializer
 from api.base.filters import ODMFilterMixin, ListFilterMixin
 from api.base.utils import get_object_or_error, waterbutler_url_for
@@ -22,10 +21,13 @@ class NodeMixin(object):
     node_lookup_url_kwarg = 'node_id'
 
     def get_node(self):
-        obj = get_object_or_error(Node, self.kwargs[self.node_lookup_url_kwarg], 'node')
-        # May raise a permission denied
-        self.check_object_permissions(self.request, obj)
-        return obj
+        # Views are instantiated per request, so the node is only loaded and checked once
+        if getattr(self, '_node', None) is None:
+            obj = get_object_or_error(Node, self.kwargs[self.node_lookup_url_kwarg], 'node')
+            # May raise a permission denied
+            self.check_object_permissions(self.request, obj)
+            self._node = obj
+        return self._node
 
 
 class NodeList(generics.ListCreateAPIView, ODMFilterMixin):
@@ -55,7 +57,7 @@ class NodeList(generics.ListCreateAPIView, ODMFilterMixin):
         user = self.request.user
         permission_query = Q('is_public', 'eq', True)
         if not user.is_anonymous():
-            permission_query = (Q('is_public', 'eq', True) | Q('contributors', 'icontains', user._id))
+            permission_query = (Q('is_public', 'eq', True) | Q('contributors', 'eq', user._id))
 
         query = base_query & permission_query
         return query
@@ -125,14 +127,24 @@ class NodeContributorsList(generics.ListAPIView, ListFilterMixin, NodeMixin):
     )
 
     serializer_class = ContributorSerializer
+    model_class = User
 
-    def get_default_queryset(self):
+    # overrides ListFilterMixin
+    def get_default_queryset(self, query=None):
         node = self.get_node()
         visible_contributors = node.visible_contributor_ids
-        contributors = []
-        for contributor in node.contributors:
+        if query is None:
+            contributors = list(node.contributors)
+        else:
+            # Only load the contributors that match the filters, in contributor order
+            contributor_ids = node.contributors._to_primary_keys()
+            matches = {
+                user._id: user
+                for user in User.find(Q('_id', 'in', contributor_ids) & query)
+            }
+            contributors = [matches[user_id] for user_id in contributor_ids if user_id in matches]
+        for contributor in contributors:
             contributor.bibliographic = contributor._id in visible_contributors
-            contributors.append(contributor)
         return contributors
 
     # overrides ListAPIView
@@ -164,7 +176,7 @@ class NodeRegistrationsList(generics.ListAPIView, NodeMixin):
         return registrations
 
 
-class NodeChildrenList(generics.ListCreateAPIView, NodeMixin):
+class NodeChildrenList(generics.ListCreateAPIView, ListFilterMixin, NodeMixin):
     """Children of the current node.
 
     This will get the next level of child nodes for the selected node if the current user has read access for those
@@ -178,17 +190,38 @@ class NodeChildrenList(generics.ListCreateAPIView, NodeMixin):
     )
 
     serializer_class = NodeSerializer
+    model_class = Node
 
-    # overrides ListAPIView
-    def get_queryset(self):
-        nodes = self.get_node().nodes
+    # overrides ListFilterMixin
+    def get_default_queryset(self, query=None):
+        node = self.get_node()
         user = self.request.user
         if user.is_anonymous():
             auth = Auth(None)
         else:
             auth = Auth(user)
-        children = [node for node in nodes if node.can_view(auth) and node.primary and not node.is_deleted]
-        return children
+        if query is None:
+            nodes = [each for each in node.nodes if each.primary and not each.is_deleted]
+        else:
+            # Only load the children that match the filters, in the order of
+            # `node.nodes`
+            order = {
+                child_id: index
+                for index, child_id in enumerate(node.nodes._to_primary_keys())
+            }
+            nodes = sorted(
+                Node.find(
+                    Q('__backrefs.parent.node.nodes', 'eq', node._id) &
+                    Q('is_deleted', 'ne', True) &
+                    query
+                ),
+                key=lambda each: order.get(each._id, len(order)),
+            )
+        return [each for each in nodes if each.can_view(auth)]
+
+    # overrides ListAPIView
+    def get_queryset(self):
+        return self.get_queryset_from_request()
 
     # overrides ListCreateAPIView
     def perform_create(self, serializer):
@@ -277,6 +310,8 @@ class NodeFilesList(generics.ListAPIView, NodeMixin):
     are at any given time.
     """
     serializer_class = NodeFilesSerializer
+    # File listings have no `_id` to use as a cursor
+    cursor_pagination = False
 
     permission_classes = (
         drf_permissions.IsAuthenticatedOrReadOnly,
@@ -299,9 +334,9 @@ class NodeFilesList(generics.ListAPIView, NodeMixin):
 
         return valid_methods
 
-    def get_file_item(self, item, cookie, obj_args):
+    def get_file_item(self, item, cookie, obj_args, valid_self_link_methods):
         file_item = {
-            'valid_self_link_methods': self.get_valid_self_link_methods()[item['kind']],
+            'valid_self_link_methods': valid_self_link_methods[item['kind']],
             'provider': item['provider'],
             'path': item['path'],
             'name': item['name'],
@@ -322,6 +357,17 @@ class NodeFilesList(generics.ListAPIView, NodeMixin):
             }
         return file_item
 
+    def get_waterbutler_data(self, provider, path, cookie, obj_args):
+        """Return WaterButler's metadata for a file or folder."""
+        url = waterbutler_url_for('data', provider, path, self.kwargs['node_id'], cookie, obj_args)
+        waterbutler_request = waterbutler.session.get(url)
+        if waterbutler_request.status_code == 401:
+            raise PermissionDenied
+        try:
+            return waterbutler_request.json()['data']
+        except KeyError:
+            raise ValidationError('Could not retrieve files information.')
+
     def get_queryset(self):
         query_params = self.request.query_params
 
@@ -352,20 +398,13 @@ class NodeFilesList(generics.ListAPIView, NodeMixin):
                         'metadata': {},
                     })
         else:
-            url = waterbutler_url_for('data', provider, path, self.kwargs['node_id'], cookie, obj_args)
-            waterbutler_request = requests.get(url)
-            if waterbutler_request.status_code == 401:
-                raise PermissionDenied
-            try:
-                waterbutler_data = waterbutler_request.json()['data']
-            except KeyError:
-                raise ValidationError('Could not retrieve files information.')
-
+            waterbutler_data = self.get_waterbutler_data(provider, path, cookie, obj_args)
+            valid_self_link_methods = self.get_valid_self_link_methods()
             if isinstance(waterbutler_data, list):
                 for item in waterbutler_data:
-                    file = self.get_file_item(item, cookie, obj_args)
+                    file = self.get_file_item(item, cookie, obj_args, valid_self_link_methods)
                     files.append(file)
             else:
-                files.append(self.get_file_item(waterbutler_data, cookie, obj_args))
+                files.append(self.get_file_item(waterbutler_data, cookie, obj_args, valid_self_link_methods))
 
         return files
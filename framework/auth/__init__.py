@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from framework.sessions import session, create_session, Session
+from framework.sessions import session, session_cache, create_session, Session
 from modularodm import Q
 from framework import bcrypt
 from framework.auth.exceptions import DuplicateEmailError
@@ -50,6 +50,7 @@ def logout():
         except KeyError:
             pass
     Session.remove(Q('_id', 'eq', session._id))
+    session_cache.delete(session._id)
     return True
 
 
@@ -1,8 +1,8 @@
 # -*- coding: utf-8 -*-
 import re
+import heapq
 import logging
 import urlparse
-import itertools
 import datetime as dt
 
 import bson
@@ -1079,8 +1079,24 @@ class User(GuidStoredObject, AddonModelMixin):
         watched_node_ids = set([config.node._id for config in self.watched])
         return node._id in watched_node_ids
 
+    def _get_since_log_id(self, since=None):
+        # Log ids are ObjectIds, whose first 4 bytes encode their creation
+        # time, so logs newer than ``since`` are those with greater ids
+        utcnow = dt.datetime.utcnow().replace(tzinfo=pytz.utc)
+        since_date = since or (utcnow - dt.timedelta(days=60))
+        return str(bson.ObjectId.from_datetime(since_date))
+
+    def _get_watched_nodes(self):
+        nodes = {}
+        for config in self.watched:
+            nodes.setdefault(config.node._id, config.node)
+        return nodes.values()
+
     def get_recent_log_ids(self, since=None):
-        '''Return a generator of recent logs' ids.
+        '''Return a generator of recent logs' ids, newest first.
+
+        Logs are read lazily from each watched node, newest first, and merged,
+        so consuming the first n ids only fetches about n ids from each node.
 
         :param since: A datetime specifying the oldest time to retrieve logs
         from. If ``None``, defaults to 60 days before today. Must be a tz-aware
@@ -1088,22 +1104,31 @@ class User(GuidStoredObject, AddonModelMixin):
 
         :rtype: generator of log ids (strings)
         '''
-        log_ids = []
-        # Default since to 60 days before today if since is None
-        # timezone aware utcnow
-        utcnow = dt.datetime.utcnow().replace(tzinfo=pytz.utc)
-        since_date = since or (utcnow - dt.timedelta(days=60))
-        for config in self.watched:
-            # Extract the timestamps for each log from the log_id (fast!)
-            # The first 4 bytes of Mongo's ObjectId encodes time
-            # This prevents having to load each Log Object and access their
-            # date fields
-            node_log_ids = [log_id for log_id in config.node.logs._to_primary_keys()
-                                   if bson.ObjectId(log_id).generation_time > since_date and
-                                   log_id not in log_ids]
-            # Log ids in reverse chronological order
-            log_ids = _merge_into_reversed(log_ids, node_log_ids)
-        return (l_id for l_id in log_ids)
+        since_id = self._get_since_log_id(since)
+        last_id = None
+        for log_id in _merge_into_reversed(*[
+            node.iter_log_ids(since_id=since_id)
+            for node in self._get_watched_nodes()
+        ]):
+            # A log may be in the history of several watched nodes, e.g. a
+            # project and its fork
+            if log_id != last_id:
+                yield log_id
+            last_id = log_id
+
+    def get_recent_log_count(self, since=None):
+        '''Return the number of logs ``get_recent_log_ids`` would yield, counted
+        by the database.
+        '''
+        from website.project.model import NodeLog
+        nodes = self._get_watched_nodes()
+        if not nodes:
+            return 0
+        query = nodes[0].get_log_query()
+        for node in nodes[1:]:
+            query = query | node.get_log_query()
+        query = query & Q('_id', 'gt', self._get_since_log_id(since))
+        return NodeLog.find(query).count()
 
     def get_daily_digest_log_ids(self):
         '''Return a generator of log ids generated in the past day
@@ -1279,6 +1304,31 @@ class User(GuidStoredObject, AddonModelMixin):
 
 
 def _merge_into_reversed(*iterables):
-    '''Merge multiple sorted inputs into a single output in reverse order.
+    '''Lazily merge multiple inputs, each sorted in reverse order, into a
+    single output in reverse order.
     '''
-    return sorted(itertools.chain(*iterables), reverse=True)
+    heap = []
+    for index, iterable in enumerate(iterables):
+        iterator = iter(iterable)
+        for item in iterator:
+            heap.append((_Reversed(item), index, iterator))
+            break
+    heapq.heapify(heap)
+    while heap:
+        key, index, iterator = heap[0]
+        yield key.value
+        try:
+            heapq.heapreplace(heap, (_Reversed(next(iterator)), index, iterator))
+        except StopIteration:
+            heapq.heappop(heap)
+
+
+class _Reversed(object):
+    '''Wrap a value so that it sorts in reverse order.'''
+    __slots__ = ('value', )
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return self.value > other.value
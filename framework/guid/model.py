@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 import random
+import logging
+import threading
 
 from modularodm import fields
 
@@ -7,6 +9,10 @@ from framework.mongo import StoredObject
 
 from modularodm.storage.base import KeyExistsException
 
+from website import settings
+
+logger = logging.getLogger(__name__)
+
 ALPHABET = '23456789abcdefghjkmnpqrstuvwxyz'
 
 
@@ -24,6 +30,71 @@ class Guid(StoredObject):
         return '<id:{0}, referent:({1}, {2})>'.format(self._id, self.referent._primary_key, self.referent._name)
 
 
+def generate_guid_id():
+    return ''.join(random.sample(ALPHABET, 5))
+
+
+class GuidPool(object):
+    """In-process pool of ids for new GUIDs. Ids are generated in batches and
+    checked against the blacklist and the existing GUIDs with one query per
+    collection, so that allocating a GUID usually takes a single insert.
+    Another process may still take a pooled id first, in which case the insert
+    fails and the caller records a collision and tries the next id.
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self._ids = []
+        self._lock = threading.Lock()
+        # Ids handed out, failed inserts, and generated ids that were
+        # blacklisted or already taken
+        self.allocated = 0
+        self.collisions = 0
+        self.rejected = 0
+
+    def _refill(self):
+        candidates = set(generate_guid_id() for _ in range(self.batch_size))
+        generated = len(candidates)
+        for schema in (BlacklistGuid, Guid):
+            taken = schema._storage[0].store.find(
+                {'_id': {'$in': list(candidates)}},
+                {'_id': True},
+            )
+            candidates.difference_update(record['_id'] for record in taken)
+        self.rejected += generated - len(candidates)
+        self._ids.extend(candidates)
+        logger.info(
+            'Refilled GUID pool with {0} of {1} generated ids; stats: {2}'.format(
+                len(candidates), generated, self.get_stats()
+            )
+        )
+
+    def pop(self):
+        """Return an id for a new GUID."""
+        with self._lock:
+            while not self._ids:
+                self._refill()
+            self.allocated += 1
+            return self._ids.pop()
+
+    def record_collision(self):
+        with self._lock:
+            self.collisions += 1
+
+    def get_stats(self):
+        attempts = self.allocated or 1
+        return {
+            'size': len(self._ids),
+            'allocated': self.allocated,
+            'collisions': self.collisions,
+            'rejected': self.rejected,
+            'collision_rate': self.collisions / float(attempts),
+        }
+
+
+guid_pool = GuidPool(settings.GUID_POOL_BATCH_SIZE)
+
+
 class GuidStoredObject(StoredObject):
     """Subclass of `StoredObject` that provisions a `Guid` for each new instance
     on save. When saving a `GuidStoredObject` for the first time, creates a new
@@ -55,24 +126,16 @@ class GuidStoredObject(StoredObject):
             )
             guid.save()
 
-        # Else create GUID optimistically
+        # Else create GUID optimistically from the pool of unused ids
         else:
             while True:
-                # Create GUID
-                guid_id = ''.join(random.sample(ALPHABET, 5))
-
-                # Check GUID against blacklist
-                blacklist_guid = BlacklistGuid.load(guid_id)
-                if not blacklist_guid:
-                    try:
-                        guid = Guid(_id=guid_id)
-                        guid.save()
-                        break
-                    except KeyExistsException:
-                        pass
-
-            guid.referent = (guid._primary_key, self._name)
-            guid.save()
+                guid_id = guid_pool.pop()
+                guid = Guid(_id=guid_id, referent=(guid_id, self._name))
+                try:
+                    guid.save()
+                    break
+                except KeyExistsException:
+                    guid_pool.record_collision()
 
             # Set primary key to GUID key
             self._primary_key = guid._primary_key
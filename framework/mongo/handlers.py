@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
+import os
 import logging
+import threading
 
 import pymongo
 from flask import g
@@ -12,10 +14,13 @@ from website import settings
 logger = logging.getLogger(__name__)
 
 
-def get_mongo_client():
+def get_mongo_client(**kwargs):
     """Create MongoDB client and authenticate database.
+
+    :param kwargs: Extra keyword arguments passed to `MongoClient`, e.g.
+        `max_pool_size`
     """
-    client = pymongo.MongoClient(settings.DB_HOST, settings.DB_PORT)
+    client = pymongo.MongoClient(settings.DB_HOST, settings.DB_PORT, **kwargs)
 
     db = client[settings.DB_NAME]
 
@@ -25,17 +30,110 @@ def get_mongo_client():
     return client
 
 
+class ClientPool(object):
+    """Process-wide `MongoClient` shared by all requests handled by a worker.
+
+    The client owns a pool of at most `max_pool_size` sockets. Each request
+    pins one socket with `start_request` for its duration, so that TokuMX
+    transactions begun on it are committed on the same connection, and returns
+    it with `end_request`. The client is rebuilt the first time it is used in
+    a new process, so that workers forked by gunicorn or celery never share
+    sockets with their parent.
+
+    :param int max_pool_size: Maximum number of sockets per process
+    """
+
+    def __init__(self, max_pool_size):
+        self.max_pool_size = max_pool_size
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._checkouts = 0
+        self._initializations = 0
+
+    def get_client(self):
+        """Return the client for the current process, creating it if this is
+        the first call since startup or since a fork.
+        """
+        pid = os.getpid()
+        if self._pid != pid:
+            if self._client is not None:
+                # Forked child: the lock may have been held by a thread that
+                # does not exist in this process
+                self._lock = threading.Lock()
+            with self._lock:
+                if self._pid != pid:
+                    self._client = get_mongo_client(max_pool_size=self.max_pool_size)
+                    self._pid = pid
+                    self._in_use = 0
+                    self._peak_in_use = 0
+                    self._checkouts = 0
+                    self._initializations += 1
+        return self._client
+
+    def checkout(self):
+        """Pin a socket to the current thread and return the client. Logs the
+        pool counters when every socket is in use, since further requests will
+        wait for a socket to be returned.
+        """
+        client = self.get_client()
+        client.start_request()
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            exhausted = self._in_use >= self.max_pool_size
+        if exhausted:
+            logger.warning('MongoDB client pool exhausted: {0}'.format(self.stats()))
+        return client
+
+    def checkin(self, client):
+        """Return the socket pinned by `checkout` to the pool. Safe to call
+        more than once per request.
+        """
+        if not client.in_request():
+            return
+        client.end_request()
+        with self._lock:
+            self._in_use = max(self._in_use - 1, 0)
+
+    def stats(self):
+        """Return pool occupancy counters for the current process."""
+        return {
+            'pid': self._pid,
+            'max_pool_size': self.max_pool_size,
+            'in_use': self._in_use,
+            'peak_in_use': self._peak_in_use,
+            'checkouts': self._checkouts,
+            'initializations': self._initializations,
+        }
+
+
+client_pool = ClientPool(settings.DB_MAX_POOL_SIZE)
+
+
 def connection_before_request():
-    """Attach MongoDB client to `g`.
+    """Attach MongoDB client to `g`. If pooling is enabled, check out the
+    process-wide client rather than creating a new one.
     """
-    g._mongo_client = get_mongo_client()
+    if settings.DB_POOLED_CLIENT:
+        g._mongo_client = client_pool.checkout()
+        g._mongo_client_pooled = True
+    else:
+        g._mongo_client = get_mongo_client()
 
 
 def connection_teardown_request(error=None):
-    """Close MongoDB client if attached to `g`.
+    """Close MongoDB client if attached to `g`, or return it to the pool if it
+    was checked out from the pooled client.
     """
     try:
-        g._mongo_client.close()
+        if getattr(g, '_mongo_client_pooled', False):
+            client_pool.checkin(g._mongo_client)
+        else:
+            g._mongo_client.close()
     except AttributeError:
         if not settings.DEBUG_MODE:
             logger.error('MongoDB client not attached to request.')
@@ -48,7 +146,7 @@ handlers = {
 
 
 # Set up getters for `LocalProxy` objects
-_mongo_client = get_mongo_client()
+_mongo_client = None if settings.DB_POOLED_CLIENT else get_mongo_client()
 
 
 def _get_current_client():
@@ -58,6 +156,8 @@ def _get_current_client():
     try:
         return g._mongo_client
     except (AttributeError, RuntimeError):
+        if settings.DB_POOLED_CLIENT:
+            return client_pool.get_client()
         return _mongo_client
 
 
@@ -1,21 +1,28 @@
 # -*- coding: utf-8 -*-
 import os
+import re
+import time
 import logging
 import copy
 import json
+import threading
 import functools
+import collections
 import httplib as http
+from collections import OrderedDict
+from HTMLParser import HTMLParser
+from multiprocessing.pool import ThreadPool
 
-import lxml.html
 import werkzeug.wrappers
 from werkzeug.exceptions import NotFound
 from mako.template import Template
 from mako.lookup import TemplateLookup
-from flask import request, make_response
+from flask import request, make_response, stream_with_context, g, _request_ctx_stack
 
 from framework import sentry
+from framework.utils import freeze
 from framework.flask import app, redirect
-from framework.sessions import session
+from framework.sessions import session, set_session, Session
 from framework.exceptions import HTTPError
 
 from website import settings
@@ -32,6 +39,8 @@ _TPL_LOOKUP = TemplateLookup(
     module_directory='/tmp/mako_modules'
 )
 
+# Use a separate module directory, so that modules compiled with escaping
+# never overwrite those compiled without
 _TPL_LOOKUP_SAFE = TemplateLookup(
     default_filters=[
         'unicode',  # default filter; must set explicitly when overriding
@@ -43,7 +52,7 @@ _TPL_LOOKUP_SAFE = TemplateLookup(
         TEMPLATE_DIR,
         os.path.join(settings.BASE_PATH, 'addons/'),
     ],
-    module_directory='/tmp/mako_modules',
+    module_directory='/tmp/mako_modules_safe',
 )
 
 REDIRECT_CODES = [
@@ -51,6 +60,19 @@ REDIRECT_CODES = [
     http.FOUND,
 ]
 
+# Matches an empty element carrying a `mod-meta` attribute, e.g.
+# <div mod-meta='{"tpl": "name.html", "replace": true}'></div>
+NESTED_ELEMENT_PATTERN = re.compile(
+    r"(?P<open><(?P<tag>\w+)\b[^>]*?\smod-meta='(?P<meta>[^']*)'[^>]*>)"
+    r"\s*(?P<close></(?P=tag)>)"
+)
+
+# Maximum number of decoded `mod-meta` attributes to keep in memory
+META_CACHE_SIZE = 1024
+_meta_cache = {}
+
+_html_parser = HTMLParser()
+
 
 class Rule(object):
     """ Container for routing and rendering rules."""
@@ -128,11 +150,18 @@ def wrap_with_renderer(fn, renderer, renderer_kwargs=None, debug_mode=True):
 
 def data_to_lambda(data):
     """Create a lambda function that takes arbitrary arguments and returns
-    a deep copy of the passed data. This function must deep copy the data,
-    else other code operating on the returned data can change the return value
-    of the lambda.
+    a copy of the passed data. The copy must not share mutable state with
+    ``data``, else other code operating on the returned data can change the
+    return value of the lambda.
+
+    Dictionaries (the usual case) have their values frozen once, here, so that
+    each call only needs a shallow copy; renderers add keys to the returned
+    dictionary but cannot modify the shared values. Other data is deep copied.
 
     """
+    if isinstance(data, dict):
+        frozen = freeze(data)
+        return lambda *args, **kwargs: dict(frozen)
     return lambda *args, **kwargs: copy.deepcopy(data)
 
 
@@ -202,7 +231,73 @@ def render_mustache_string(tpl_string, data):
 def render_jinja_string(tpl, data):
     pass
 
-mako_cache = {}
+class TemplateCache(object):
+    """Thread-safe cache of compiled mako templates, keyed by template path
+    and escaping mode. Holds at most `max_size` templates, evicting the least
+    recently used. Compiled modules are also written to the module directory
+    of the lookup for each escaping mode, so new processes load them from
+    disk instead of compiling them again.
+
+    :param int max_size: Maximum number of templates to keep in memory
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._templates)
+
+    def get(self, path, trust=True):
+        """Return the compiled template at ``path``, compiling it on first
+        use.
+
+        :raises: IOError if there is no template at ``path``
+        """
+        key = (os.path.abspath(path), trust is not False)
+        with self._lock:
+            template = self._templates.pop(key, None)
+            if template is not None:
+                self._templates[key] = template
+                return template
+        template = compile_mako_template(key[0], trust=key[1])
+        with self._lock:
+            self._templates[key] = template
+            while len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+        return template
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+
+def compile_mako_template(path, trust=True):
+    """Compile the mako template at absolute ``path``.
+
+    :param trust: If ``False``, markup-safe escaping will be enabled
+    :raises: IOError if there is no template at ``path``
+    """
+    if not os.path.isfile(path):
+        raise IOError('Template {} not found'.format(path))
+    lookup_obj = _TPL_LOOKUP_SAFE if trust is False else _TPL_LOOKUP
+    module_directory = lookup_obj.template_args['module_directory']
+    return Template(
+        filename=path,
+        # A URI without directories resolves relative includes and inherits
+        # against the lookup directories rather than the template's own
+        uri=os.path.basename(path),
+        lookup=lookup_obj,
+        module_filename=os.path.join(module_directory, path.lstrip(os.sep) + '.py'),
+        input_encoding='utf-8',
+        output_encoding='utf-8',
+        default_filters=lookup_obj.template_args['default_filters'],
+        imports=lookup_obj.template_args['imports']  # FIXME: Temporary workaround for data stored in wrong format in DB. Unescape it before it gets re-escaped by Markupsafe.
+    )
+
+
+mako_cache = TemplateCache(max_size=settings.MAKO_CACHE_SIZE)
 def render_mako_string(tpldir, tplname, data, trust=True):
     """Render a mako template to a string.
 
@@ -215,26 +310,68 @@ def render_mako_string(tpldir, tplname, data, trust=True):
     # TODO: The "trust" flag is expected to be temporary, and should be removed
     #       once all templates manually set it to False.
 
-    lookup_obj = _TPL_LOOKUP_SAFE if trust is False else _TPL_LOOKUP
-
-    tpl = mako_cache.get(tplname)
-    if tpl is None:
-        with open(os.path.join(tpldir, tplname)) as f:
-            tpl_text = f.read()
-        tpl = Template(
-            tpl_text,
-            lookup=lookup_obj,
-            input_encoding='utf-8',
-            output_encoding='utf-8',
-            default_filters=lookup_obj.template_args['default_filters'],
-            imports=lookup_obj.template_args['imports']  # FIXME: Temporary workaround for data stored in wrong format in DB. Unescape it before it gets re-escaped by Markupsafe.
-        )
+    path = os.path.join(tpldir, tplname)
     # Don't cache in debug mode
-    if not app.debug:
-        mako_cache[tplname] = tpl
+    if app.debug:
+        tpl = compile_mako_template(os.path.abspath(path), trust=trust)
+    else:
+        tpl = mako_cache.get(path, trust=trust)
     return tpl.render(**data)
 
 
+def precompile_templates(directories, trust_modes=(True, False)):
+    """Compile every mako template under ``directories`` into the template
+    cache, so that the first request for each page after a deploy does not
+    pay for compilation. Templates that fail to compile are logged and
+    skipped.
+
+    :param directories: Paths to search recursively for `.mako` files
+    :param trust_modes: Escaping modes to compile each template for
+    :return: Number of templates compiled
+    """
+    count = 0
+    for directory in directories:
+        for dirpath, _, filenames in os.walk(directory):
+            for filename in filenames:
+                if not filename.endswith('.mako'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                for trust in trust_modes:
+                    try:
+                        mako_cache.get(path, trust=trust)
+                        count += 1
+                    except Exception as error:
+                        logger.warning('Could not precompile template {0}: {1!r}'.format(path, error))
+    return count
+
+
+def unescape_attribute(value):
+    """Replace character references in an HTML attribute value."""
+    if '&' not in value:
+        return value
+    if isinstance(value, str):
+        value = value.decode('utf-8')
+    return _html_parser.unescape(value)
+
+
+def parse_meta(attributes_string):
+    """Decode the JSON value of a `mod-meta` attribute. Decoded values are
+    cached, since the same embeds are rendered on every request; callers must
+    not modify the result.
+
+    :raises: ValueError if the value is not valid JSON
+    """
+    try:
+        return _meta_cache[attributes_string]
+    except KeyError:
+        pass
+    element_meta = json.loads(attributes_string)
+    if len(_meta_cache) >= META_CACHE_SIZE:
+        _meta_cache.clear()
+    _meta_cache[attributes_string] = element_meta
+    return element_meta
+
+
 renderer_extension_map = {
     '.stache': render_mustache_string,
     '.jinja': render_jinja_string,
@@ -295,6 +432,111 @@ def call_url(url, view_kwargs=None):
 
     return rv
 
+_nested_pool = None
+_nested_pool_pid = None
+
+
+def get_nested_pool():
+    """Return the thread pool used to fetch nested URIs, creating it on
+    first use in each process.
+    """
+    global _nested_pool, _nested_pool_pid
+    if _nested_pool_pid != os.getpid():
+        _nested_pool = ThreadPool(settings.RENDER_NESTED_THREADS)
+        _nested_pool_pid = os.getpid()
+    return _nested_pool
+
+
+def can_fetch_nested_concurrently():
+    """Whether nested URIs of the current request may be fetched from worker
+    threads. Workers read through their own sockets, outside any TokuMX
+    transaction of the request, so this is only allowed for views that run
+    without an automatic transaction, and never with the pooled client, whose
+    sockets are pinned to the threads that check them out.
+    """
+    from framework.transactions.handlers import view_has_annotation, NO_AUTO_TRANSACTION_ATTR
+    if settings.DB_POOLED_CLIENT:
+        return False
+    return view_has_annotation(NO_AUTO_TRANSACTION_ATTR)
+
+
+def call_url_in_context(environ, session_id, session_data, mongo_client, url, view_kwargs, timings):
+    """Call `call_url` from a worker thread, in new application and request
+    contexts built from a copy of the calling request's WSGI environment. The
+    worker has its own `g`, session, ODM cache and permission resolver, so no
+    mutable per-request state is shared with the calling thread. Request setup
+    and teardown handlers are not run.
+
+    :param str session_id: Id of the calling request's session
+    :param dict session_data: Copy of the calling request's session data
+    :param mongo_client: Client of the calling request
+    :param list timings: List to which (url, seconds) is appended
+    """
+    app_ctx = app.app_context()
+    app_ctx.push()
+    _request_ctx_stack.push(app.request_context(environ))
+    start = time.time()
+    try:
+        if mongo_client is not None:
+            g._mongo_client = mongo_client
+        set_session(Session(_id=session_id, data=session_data))
+        return call_url(url, view_kwargs=view_kwargs)
+    finally:
+        timings.append((url, time.time() - start))
+        _request_ctx_stack.pop()
+        app_ctx.pop()
+
+
+class NestedFetcher(object):
+    """Fetch the data for several nested URIs concurrently, then hand the
+    results out by URI.
+
+    :param list requests: List of (url, view_kwargs) pairs
+    :param int timeout: Seconds to wait for each URI, counted from when all
+        fetches were started
+    """
+
+    def __init__(self, requests, timeout):
+        self.timeout = timeout
+        self.timings = []
+        self.start = time.time()
+        environ = dict(request.environ)
+        mongo_client = getattr(g, '_mongo_client', None)
+        pool = get_nested_pool()
+        self.results = {}
+        for url, view_kwargs in requests:
+            key = self._key(url, view_kwargs)
+            if key not in self.results:
+                self.results[key] = pool.apply_async(
+                    call_url_in_context,
+                    (
+                        environ, session._id, copy.deepcopy(session.data),
+                        mongo_client, url, copy.deepcopy(view_kwargs), self.timings,
+                    ),
+                )
+
+    @staticmethod
+    def _key(url, view_kwargs):
+        return url, json.dumps(view_kwargs, sort_keys=True)
+
+    def __call__(self, url, view_kwargs=None):
+        """Return the data for ``url``, with the same signature as `call_url`.
+        Exceptions raised by the view are re-raised; a fetch that does not
+        finish in time raises `multiprocessing.TimeoutError`.
+        """
+        result = self.results.get(self._key(url, view_kwargs or {}))
+        if result is None:
+            return call_url(url, view_kwargs=view_kwargs)
+        remaining = max(self.timeout - (time.time() - self.start), 0)
+        return result.get(remaining)
+
+    def report(self):
+        """Log and return the time spent fetching each URI."""
+        for url, seconds in self.timings:
+            logger.debug('Fetched nested URI {0} in {1:.3f}s'.format(url, seconds))
+        return list(self.timings)
+
+
 ### Renderers ###
 
 class Renderer(object):
@@ -337,18 +579,93 @@ class Renderer(object):
         headers = headers or {}
         headers["Content-Type"] = self.CONTENT_TYPE + "; charset=" + kwargs.get("charset", "utf-8")
 
+        # Stream iterators of chunks instead of joining them first. Headers are
+        # passed to the response itself, since `make_response` would add a
+        # second Content-Type to an existing response
+        if isinstance(rendered, collections.Iterator):
+            return app.response_class(
+                stream_with_context(rendered),
+                status=status_code,
+                headers=headers,
+            )
+
         # Package as response
         return make_response(rendered, status_code, headers)
 
 
+def iter_json(data, encoder):
+    """Encode `data` as JSON piece by piece, yielding strings that join to the
+    same document `encoder.encode` would produce. Iterators in `data` (e.g.
+    generators) are encoded as arrays and consumed lazily.
+
+    :param data: Data to encode
+    :param json.JSONEncoder encoder: Encoder for scalar values and for objects
+        that are not natively serializable
+    """
+    if isinstance(data, str) and not encoder.ensure_ascii:
+        # Without escaping, byte strings keep their non-ASCII bytes and cannot
+        # be joined with unicode chunks, so decode them first
+        data = data.decode(encoder.encoding)
+    if isinstance(data, dict):
+        yield '{'
+        for index, (key, value) in enumerate(data.iteritems()):
+            if not isinstance(key, basestring):
+                # Mimic `json.dumps`, which converts keys like 1, True and None to strings
+                key = encoder.encode(key)
+            elif isinstance(key, str) and not encoder.ensure_ascii:
+                key = key.decode(encoder.encoding)
+            if index:
+                yield encoder.item_separator
+            yield encoder.encode(key) + encoder.key_separator
+            for chunk in iter_json(value, encoder):
+                yield chunk
+        yield '}'
+    elif isinstance(data, (list, tuple, collections.Iterator)):
+        yield '['
+        for index, value in enumerate(data):
+            if index:
+                yield encoder.item_separator
+            for chunk in iter_json(value, encoder):
+                yield chunk
+        yield ']'
+    elif data is None or isinstance(data, (basestring, bool, int, long, float)):
+        yield encoder.encode(data)
+    else:
+        for chunk in iter_json(encoder.default(data), encoder):
+            yield chunk
+
+
+def buffer_chunks(chunks, size):
+    """Join an iterable of strings into chunks of at least `size` characters
+    (except for the last chunk).
+    """
+    buffered = []
+    length = 0
+    for chunk in chunks:
+        buffered.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield ''.join(buffered)
+            buffered = []
+            length = 0
+    if buffered:
+        yield ''.join(buffered)
+
+
 class JSONRenderer(Renderer):
     """Renderer for API views. Generates JSON; ignores
     redirects from views and exceptions.
 
+    :param bool stream: Encode and send the response incrementally rather than
+        building it in memory first. Views may then return iterators in place
+        of lists to avoid building those in memory too.
     """
 
     CONTENT_TYPE = "application/json"
 
+    # Size in characters of each chunk of a streamed response
+    CHUNK_SIZE = 16 * 1024
+
     class Encoder(json.JSONEncoder):
         def default(self, obj):
             if hasattr(obj, 'to_json'):
@@ -356,17 +673,26 @@ class JSONRenderer(Renderer):
                     return obj.to_json()
                 except TypeError:  # BS4 objects have to_json that isn't callable
                     return unicode(obj)
+            if isinstance(obj, collections.Iterator):
+                return list(obj)
             return json.JSONEncoder.default(self, obj)
 
+    def __init__(self, stream=False):
+        self.stream = stream
+
     def handle_error(self, error):
         headers = {'Content-Type': self.CONTENT_TYPE}
-        return self.render(error.to_data(), None), error.code, headers
+        return json.dumps(error.to_data(), cls=self.Encoder), error.code, headers
 
     def render(self, data, redirect_url, *args, **kwargs):
+        if self.stream:
+            return buffer_chunks(iter_json(data, self.Encoder()), self.CHUNK_SIZE)
         return json.dumps(data, cls=self.Encoder)
 
 # Create a single JSONRenderer instance to avoid repeated construction
 json_renderer = JSONRenderer()
+# Renderer for views with large responses, e.g. file trees and log feeds
+streaming_json_renderer = JSONRenderer(stream=True)
 
 
 class XMLRenderer(Renderer):
@@ -414,7 +740,8 @@ class WebRenderer(Renderer):
     def __init__(self, template_name,
                  renderer=None, error_renderer=None,
                  data=None, detect_render_nested=True,
-                 trust=True, template_dir=TEMPLATE_DIR):
+                 trust=True, template_dir=TEMPLATE_DIR,
+                 fetch_nested_concurrently=None):
         """Construct WebRenderer.
 
         :param template_name: Name of template file
@@ -427,12 +754,20 @@ class WebRenderer(Renderer):
             templates?
         :param trust: Boolean: If true, turn off markup-safe escaping
         :param template_dir: Path to template directory
+        :param fetch_nested_concurrently: Fetch the data for all nested
+            templates with a `uri` at once, in a thread pool; defaults to
+            `settings.RENDER_NESTED_CONCURRENTLY`. URIs are only fetched
+            concurrently when `can_fetch_nested_concurrently` allows it for
+            the current request; otherwise they are fetched one at a time.
 
         """
         self.template_name = template_name
         self.data = data or {}
         self.detect_render_nested = detect_render_nested
         self.trust = trust
+        if fetch_nested_concurrently is None:
+            fetch_nested_concurrently = settings.RENDER_NESTED_CONCURRENTLY
+        self.fetch_nested_concurrently = fetch_nested_concurrently
 
         self.template_dir = template_dir
         self.renderer = self.detect_renderer(renderer, template_name)
@@ -469,11 +804,21 @@ class WebRenderer(Renderer):
         :param data: Dictionary to be passed to the template as context
         :return: 2-tuple: (<result>, <flag: replace div>)
         """
-        attributes_string = element.get("mod-meta")
+        return self.render_meta(element.get("mod-meta"), data)
 
+    def render_meta(self, attributes_string, data, fetch=call_url):
+        """Render an embedded template from the value of its `mod-meta`
+        attribute.
+
+        :param attributes_string: JSON-encoded `mod-meta` attribute
+        :param data: Dictionary to be passed to the template as context
+        :param fetch: Callable used to fetch data for the `uri`, with the
+            signature of `call_url`
+        :return: 2-tuple: (<result>, <flag: replace div>)
+        """
         # Return debug <div> if JSON cannot be parsed
         try:
-            element_meta = json.loads(attributes_string)
+            element_meta = parse_meta(attributes_string)
         except ValueError:
             return '<div>No JSON object could be decoded: {}</div>'.format(
                 attributes_string
@@ -493,7 +838,7 @@ class WebRenderer(Renderer):
             # Catch errors and return appropriate debug divs
             # todo: add debug parameter
             try:
-                uri_data = call_url(uri, view_kwargs=view_kwargs)
+                uri_data = fetch(uri, view_kwargs=view_kwargs)
                 render_data.update(uri_data)
             except NotFound:
                 return '<div>URI {} not found</div>'.format(uri), is_replace
@@ -547,49 +892,66 @@ class WebRenderer(Renderer):
         except IOError:
             return '<div>Template {} not found.</div>'.format(template_name)
 
-        html = lxml.html.fragment_fromstring(rendered, create_parent='remove')
+        # Most templates embed no nested templates; skip scanning those
+        if 'mod-meta' not in rendered:
+            return rendered
+
+        # Splice rendered nested templates between the unchanged stretches of
+        # the page, rather than searching the page for each element
+        matches = [
+            (match, unescape_attribute(match.group('meta')))
+            for match in NESTED_ELEMENT_PATTERN.finditer(rendered)
+        ]
+        fetcher = self.fetch_nested([meta for _, meta in matches])
 
-        for element in html.findall('.//*[@mod-meta]'):
+        fragments = []
+        position = 0
+        for match, attributes_string in matches:
 
             # Render nested template
-            template_rendered, is_replace = self.render_element(element, data)
+            template_rendered, is_replace = self.render_meta(
+                attributes_string,
+                data,
+                fetch=fetcher or call_url,
+            )
 
-            original = lxml.html.tostring(element)
+            fragments.append(rendered[position:match.start()])
             if is_replace:
-                replacement = template_rendered
+                fragments.append(template_rendered)
             else:
-                replacement = original
-                replacement = replacement.replace('><', '>' + template_rendered + '<')
-
-            rendered = rendered.replace(original, replacement)
-
-        ## Parse HTML using html5lib; lxml is too strict and e.g. throws
-        ## errors if missing parent container; htmlparser mangles whitespace
-        ## and breaks replacement
-        #parsed = BeautifulSoup(rendered, 'html5lib')
-        #subtemplates = parsed.find_all(
-        #    lambda tag: tag.has_attr('mod-meta')
-        #)
-        #
-        #for element in subtemplates:
-        #
-        #    # Extract HTML of original element
-        #    element_html = str(element)
-        #
-        #    # Render nested template
-        #    template_rendered, is_replace = self.render_element(element, data)
-        #
-        #    # Build replacement
-        #    if is_replace:
-        #        replacement = template_rendered
-        #    else:
-        #        element.string = template_rendered
-        #        replacement = str(element)
-        #
-        #    # Replace
-        #    rendered = rendered.replace(element_html, replacement)
-
-        return rendered
+                fragments.extend([
+                    match.group('open'),
+                    template_rendered,
+                    match.group('close'),
+                ])
+            position = match.end()
+        fragments.append(rendered[position:])
+
+        if fetcher:
+            g._nested_uri_timings = getattr(g, '_nested_uri_timings', []) + fetcher.report()
+
+        return ''.join(fragments)
+
+    def fetch_nested(self, attribute_strings):
+        """Start fetching the data for every nested template with a `uri`, if
+        concurrent fetching is enabled and there is more than one.
+
+        :param attribute_strings: JSON-encoded `mod-meta` attributes
+        :return: `NestedFetcher` or `None`
+        """
+        if not self.fetch_nested_concurrently or not can_fetch_nested_concurrently():
+            return None
+        requests = []
+        for attributes_string in attribute_strings:
+            try:
+                element_meta = parse_meta(attributes_string)
+            except ValueError:
+                continue
+            if element_meta.get('uri'):
+                requests.append((element_meta['uri'], element_meta.get('view_kwargs', {})))
+        if len(requests) < 2:
+            return None
+        return NestedFetcher(requests, timeout=settings.RENDER_NESTED_TIMEOUT)
 
     def render(self, data, redirect_url, *args, **kwargs):
         """Render output of view function to HTML, following redirects
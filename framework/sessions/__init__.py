@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 
+import copy
 import furl
 import urllib
+import datetime
 import urlparse
 import bson.objectid
 import httplib as http
@@ -15,6 +17,7 @@ from framework.flask import redirect
 
 from website import settings
 
+from .cache import SessionCache
 from .model import Session
 
 
@@ -80,9 +83,14 @@ def prepare_private_key():
 
 
 def get_session():
-    session = sessions.get(request._get_current_object())
+    """Return the session for the current request. The session named by the
+    request cookie is only loaded when it is first used.
+    """
+    current_request = request._get_current_object()
+    session = sessions.get(current_request)
     if not session:
-        session = Session()
+        session_id = pending_session_ids.pop(current_request, None)
+        session = load_session(session_id) if session_id else Session()
         set_session(session)
     return session
 
@@ -91,25 +99,94 @@ def set_session(session):
     sessions[request._get_current_object()] = session
 
 
+def load_session(session_id):
+    """Load the session with the given id, from the session cache if enabled.
+    Returns a new, unsaved session if no session has that id.
+    """
+    cached = session_cache.get(session_id)
+    if cached is not None:
+        data, date_modified = cached
+        session = Session(_id=session_id, data=data)
+        remember_session(session, date_modified, stored=False)
+        return session
+    session = Session.load(session_id)
+    if session is None:
+        return Session(_id=session_id)
+    remember_session(session, session.date_modified)
+    session_cache.set(session._id, session.data, session.date_modified)
+    return session
+
+
+def remember_session(session, date_modified, stored=True):
+    """Record the data of ``session`` as it is in the database, so that
+    `after_request` can tell whether it needs saving.
+
+    :param bool stored: Whether ``session`` was loaded from the database, as
+        opposed to built from the session cache
+    """
+    snapshots[request._get_current_object()] = {
+        'data': copy.deepcopy(session.data),
+        'date_modified': date_modified,
+        'stored': stored,
+    }
+
+
+def session_is_modified(session):
+    """Whether ``session`` differs from the database, or has not been saved
+    within ``settings.SESSION_TOUCH_INTERVAL``.
+    """
+    snapshot = snapshots.get(request._get_current_object())
+    if snapshot is None:
+        return True
+    if session.data != snapshot['data']:
+        return True
+    date_modified = snapshot['date_modified']
+    return (
+        date_modified is None or
+        date_modified < datetime.datetime.utcnow() - settings.SESSION_TOUCH_INTERVAL
+    )
+
+
+def save_session(session):
+    """Save ``session``, loading it first if it was built from the session
+    cache.
+    """
+    snapshot = snapshots.get(request._get_current_object())
+    if snapshot is not None and not snapshot['stored']:
+        stored = Session.load(session._id) or Session(_id=session._id)
+        stored.data = session.data
+        session = stored
+        set_session(session)
+    session.save()
+    remember_session(session, session.date_modified)
+    session_cache.set(session._id, session.data, session.date_modified)
+    return session
+
+
 def create_session(response, data=None):
     current_session = get_session()
     if current_session:
         current_session.data.update(data or {})
-        current_session.save()
+        current_session = save_session(current_session)
         cookie_value = itsdangerous.Signer(settings.SECRET_KEY).sign(current_session._id)
     else:
         session_id = str(bson.objectid.ObjectId())
         session = Session(_id=session_id, data=data or {})
-        session.save()
-        cookie_value = itsdangerous.Signer(settings.SECRET_KEY).sign(session_id)
         set_session(session)
+        save_session(session)
+        cookie_value = itsdangerous.Signer(settings.SECRET_KEY).sign(session_id)
     if response is not None:
         response.set_cookie(settings.COOKIE_NAME, value=cookie_value, domain=settings.OSF_COOKIE_DOMAIN)
         return response
 
 
 sessions = WeakKeyDictionary()
+# Ids of sessions named by request cookies that have not been loaded yet
+pending_session_ids = WeakKeyDictionary()
+# Session data as last loaded or saved, per request
+snapshots = WeakKeyDictionary()
 session = LocalProxy(get_session)
+session_cache = SessionCache(settings.SESSION_CACHE_TIMEOUT, settings.SESSION_CACHE_SIZE)
 
 # Request callbacks
 
@@ -172,15 +249,16 @@ def before_request():
     if cookie:
         try:
             session_id = itsdangerous.Signer(settings.SECRET_KEY).unsign(cookie)
-            session = Session.load(session_id) or Session(_id=session_id)
-            set_session(session)
+            pending_session_ids[request._get_current_object()] = session_id
             return
         except:
             pass
 
 
 def after_request(response):
-    if session.data.get('auth_user_id'):
-        session.save()
+    # Sessions that were never used in this request are left untouched
+    current_session = sessions.get(request._get_current_object())
+    if current_session and current_session.data.get('auth_user_id') and session_is_modified(current_session):
+        save_session(current_session)
 
     return response
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+from framework.utils import TTLCache
+
+
+class SessionCache(TTLCache):
+    """Process-local cache of session data, keyed by session id. See
+    `TTLCache` for expiry and eviction.
+
+    Changes made by other processes (e.g. logging out) are not seen until the
+    entry expires, so `timeout` should be short. A `timeout` of 0 disables the
+    cache.
+    """
+
+    def get(self, session_id):
+        """Return a copy of the cached data and modification date of the
+        session as a ``(data, date_modified)`` tuple, or ``None``.
+        """
+        return super(SessionCache, self).get(session_id)
+
+    def set(self, session_id, data, date_modified):
+        super(SessionCache, self).set(session_id, (data, date_modified))
@@ -8,4 +8,8 @@ def remove_sessions_for_user(user):
 
     :param User user:
     """
+    from framework.sessions import session_cache
+
     Session.remove(Q('data.auth_user_id', 'eq', user._id))
+    # Cache entries are not indexed by user
+    session_cache.clear()
@@ -1,5 +1,9 @@
 from __future__ import absolute_import
 import re
+import copy
+import time
+import threading
+from collections import OrderedDict
 
 from werkzeug.utils import secure_filename as werkzeug_secure_filename
 
@@ -28,3 +32,94 @@ def secure_filename(filename):
         pass
 
     return secure
+
+
+class FrozenDict(dict):
+    """Dictionary that cannot be modified after construction. Copying returns
+    the same object, since it can never change.
+    """
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError('{0} does not support item assignment'.format(self.__class__.__name__))
+
+    __setitem__ = __delitem__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self), ))
+
+
+def freeze(value):
+    """Return an immutable equivalent of JSON-like ``value``: dictionaries
+    become `FrozenDict` and lists become tuples, recursively.
+    """
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(val)) for key, val in value.iteritems())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class TTLCache(object):
+    """Thread-safe, process-local cache. Entries expire `timeout` seconds after
+    they are stored; at most `max_size` entries are kept, evicting the least
+    recently stored. Values are copied on the way in and out, so callers may
+    modify them freely.
+
+    Changes made by other processes are not seen until the entry expires, so
+    `timeout` should be short. A `timeout` of 0 disables the cache.
+
+    :param int timeout: Seconds to keep each entry
+    :param int max_size: Maximum number of entries
+    """
+
+    def __init__(self, timeout, max_size):
+        self.timeout = timeout
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def enabled(self):
+        return self.timeout > 0
+
+    def get(self, key):
+        """Return a copy of the cached value for `key`, or ``None``."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.time():
+                del self._entries[key]
+                return None
+        return copy.deepcopy(value)
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        entry = (time.time() + self.timeout, copy.deepcopy(value))
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
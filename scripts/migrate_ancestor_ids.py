@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""Populate the materialized ancestry (`ancestor_ids`) of every node from its
+`parent` back-reference. Run with `dry` to log changes without writing them.
+"""
+import sys
+import logging
+
+from framework.mongo import database
+from framework.transactions.context import TokuTransaction
+from website.app import init_app
+from website.models import Node
+from scripts import utils as script_utils
+
+logger = logging.getLogger(__name__)
+
+
+def get_ancestor_ids(node, cache):
+    """Return the ids of the primary ancestors of ``node``, root first,
+    following the same parent as `Node.parent_node` but including deleted
+    ancestors. A parent that no longer exists ends the ancestry.
+
+    :param dict cache: Ancestor ids by node id, shared between calls
+    """
+    if node._id not in cache:
+        parents = node.node__parent
+        parent = parents[0] if parents else None
+        if parent is not None:
+            cache[node._id] = get_ancestor_ids(parent, cache) + [parent._id]
+        else:
+            if parents:
+                logger.warn('Parent of node {0} does not exist'.format(node._id))
+            cache[node._id] = []
+    return cache[node._id]
+
+
+def do_migration(records, dry=False):
+    cache = {}
+    count = 0
+    for node in records:
+        ancestor_ids = get_ancestor_ids(node, cache)
+        if ancestor_ids == list(node.ancestor_ids):
+            continue
+        logger.info('Setting ancestors of node {0} to {1}'.format(node._id, ancestor_ids))
+        count += 1
+        if not dry:
+            # Only write ancestor_ids; saving every node would also
+            # reindex it in search
+            database[Node._name].update(
+                {'_id': node._id},
+                {'$set': {'ancestor_ids': ancestor_ids}},
+            )
+    Node._clear_caches()
+    logger.info('Updated ancestors of {0} nodes'.format(count))
+    return count
+
+
+def main():
+    init_app(routes=False)  # Sets the storage backends on all models
+    dry = 'dry' in sys.argv
+    if not dry:
+        script_utils.add_file_logger(logger, __file__)
+    with TokuTransaction():
+        do_migration(Node.find(), dry=dry)
+
+
+if __name__ == '__main__':
+    main()
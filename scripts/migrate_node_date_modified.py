@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Populate the stored `date_modified` of every node: the date of the most
+recent log in its history, which forks and registrations may inherit from the
+node they were created from, or its creation date if it has no logs. Run with
+`dry` to log changes without writing them.
+"""
+import sys
+import logging
+
+from modularodm import Q
+
+from framework.mongo import database
+from framework.transactions.context import TokuTransaction
+from website.app import init_app
+from website.models import Node
+from scripts import utils as script_utils
+
+logger = logging.getLogger(__name__)
+
+
+def get_date_modified(node):
+    last_log = node.last_log
+    return last_log.date if last_log else node.date_created
+
+
+def do_migration(records, dry=False):
+    count = 0
+    for node in records:
+        date_modified = get_date_modified(node)
+        logger.info('Setting date_modified of node {0} to {1}'.format(node._id, date_modified))
+        count += 1
+        if not dry:
+            # Node.save falls back to the creation date for nodes without
+            # logs of their own, which is wrong for forks and registrations
+            # that inherit their log history
+            database[Node._name].update(
+                {'_id': node._id},
+                {'$set': {'date_modified': date_modified}},
+            )
+    Node._clear_caches()
+    logger.info('Set date_modified of {0} nodes'.format(count))
+    return count
+
+
+def get_targets():
+    return Node.find(Q('date_modified', 'eq', None))
+
+
+def main():
+    init_app(routes=False)  # Sets the storage backends on all models
+    dry = 'dry' in sys.argv
+    if not dry:
+        script_utils.add_file_logger(logger, __file__)
+    with TokuTransaction():
+        do_migration(get_targets(), dry=dry)
+
+
+if __name__ == '__main__':
+    main()
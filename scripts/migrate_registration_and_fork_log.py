@@ -68,6 +68,9 @@ def do_migration(records, dry=False):
 
 
 def get_targets():
+    # Forks and registrations with a log source share the history of the node
+    # they were created from (see `Node.set_log_source`) rather than copying
+    # its logs, so copying logs into them would duplicate their history
     return Node.find(
         (
             (Q('registered_from', 'ne', None) & Q('logs', 'eq', []))
@@ -75,6 +78,7 @@ def get_targets():
         )
         & Q('is_deleted', 'ne', True)
         & Q('system_tags', 'ne', SYSTEM_TAG)
+        & Q('log_source_id', 'eq', None)
     )
 
 
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Recompute the stored fork, templated copy and pointer counts of nodes
+(see `website.project.counters`), correcting counts that have drifted and
+storing counts that are missing. Every node that is forked, templated or
+pointed to is checked, as well as every node with stored counts. Counts of
+deleted or missing nodes are removed. Run with `dry` to log corrections
+without writing them.
+"""
+import sys
+import logging
+
+from framework.transactions.context import TokuTransaction
+from website.app import init_app
+from website.models import Node, Pointer
+from website.project import counters
+from scripts import utils as script_utils
+
+logger = logging.getLogger(__name__)
+
+
+def do_migration(records, dry=False):
+    count = 0
+    collection = counters.get_collection()
+    for node_id in records:
+        node = Node.load(node_id)
+        stored = counters.get_node_counters(node_id)
+        if node is None or node.is_deleted:
+            if stored is not None:
+                logger.info('Removing counts of deleted node {0}'.format(node_id))
+                if not dry:
+                    collection.remove({'_id': node_id})
+            continue
+        actual = node.compute_counters()
+        if stored != actual:
+            logger.info('Correcting counts of node {0} from {1} to {2}'.format(node_id, stored, actual))
+            count += 1
+            if not dry:
+                counters.set_node_counters(node_id, actual)
+        Node._clear_caches()
+    logger.info('Corrected counts of {0} nodes'.format(count))
+    return count
+
+
+def get_targets():
+    node_collection = Node._storage[0].store
+    targets = set(each['_id'] for each in counters.get_collection().find({}, {'_id': True}))
+    targets.update(node_collection.distinct('forked_from'))
+    targets.update(node_collection.distinct('template_node'))
+    targets.update(Pointer._storage[0].store.distinct('node'))
+    targets.discard(None)
+    return sorted(targets)
+
+
+def main():
+    init_app(routes=False)  # Sets the storage backends on all models
+    dry = 'dry' in sys.argv
+    if not dry:
+        script_utils.add_file_logger(logger, __file__)
+    with TokuTransaction():
+        do_migration(get_targets(), dry=dry)
+
+
+if __name__ == '__main__':
+    main()
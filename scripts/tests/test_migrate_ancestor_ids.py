@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+from nose.tools import *  # noqa
+
+from framework.mongo import database
+from tests.base import OsfTestCase
+from tests.factories import ProjectFactory, NodeFactory
+
+from website.models import Node
+from scripts.migrate_ancestor_ids import do_migration, get_ancestor_ids
+
+
+class TestMigrateAncestorIds(OsfTestCase):
+
+    def setUp(self):
+        super(TestMigrateAncestorIds, self).setUp()
+        self.project = ProjectFactory()
+        self.component = NodeFactory(parent=self.project)
+        self.subcomponent = NodeFactory(parent=self.component)
+        self.clear_ancestor_ids()
+
+    def clear_ancestor_ids(self):
+        database[Node._name].update({}, {'$set': {'ancestor_ids': []}}, multi=True)
+        Node._clear_caches()
+
+    def test_get_ancestor_ids(self):
+        subcomponent = Node.load(self.subcomponent._id)
+        assert_equal(
+            get_ancestor_ids(subcomponent, {}),
+            [self.project._id, self.component._id],
+        )
+
+    def test_deleted_parent_is_an_ancestor(self):
+        self.component.is_deleted = True
+        self.component.save()
+        self.clear_ancestor_ids()
+        do_migration(Node.find())
+        assert_equal(
+            Node.load(self.subcomponent._id).ancestor_ids,
+            [self.project._id, self.component._id],
+        )
+
+    def test_missing_parent_ends_ancestry(self):
+        database[Node._name].remove({'_id': self.project._id})
+        Node._clear_caches()
+        assert_equal(do_migration(Node.find()), 1)
+        assert_equal(Node.load(self.component._id).ancestor_ids, [])
+        assert_equal(Node.load(self.subcomponent._id).ancestor_ids, [self.component._id])
+
+    def test_do_migration(self):
+        assert_equal(do_migration(Node.find()), 2)
+        assert_equal(Node.load(self.component._id).ancestor_ids, [self.project._id])
+        assert_equal(do_migration(Node.find()), 0)
+
+    def test_dry_run(self):
+        assert_equal(do_migration(Node.find(), dry=True), 2)
+        assert_equal(Node.load(self.subcomponent._id).ancestor_ids, [])
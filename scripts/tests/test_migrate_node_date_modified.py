@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+from nose.tools import *  # noqa
+
+from framework.mongo import database
+from tests.base import OsfTestCase
+from tests.factories import ProjectFactory, RegistrationFactory
+
+from website.models import Node
+from scripts.migrate_node_date_modified import do_migration, get_targets
+
+
+class TestMigrateNodeDateModified(OsfTestCase):
+
+    def setUp(self):
+        super(TestMigrateNodeDateModified, self).setUp()
+        self.project = ProjectFactory()
+
+    def unset_date_modified(self):
+        database[Node._name].update({}, {'$unset': {'date_modified': True}}, multi=True)
+        Node._clear_caches()
+
+    def test_uses_last_log(self):
+        self.unset_date_modified()
+        date_modified = Node.load(self.project._id).logs[-1].date
+        assert_equal([node._id for node in get_targets()], [self.project._id])
+        assert_equal(do_migration(get_targets()), 1)
+        assert_equal(Node.load(self.project._id).date_modified, date_modified)
+        assert_equal(get_targets().count(), 0)
+
+    def test_node_without_logs_uses_date_created(self):
+        database[Node._name].update({'_id': self.project._id}, {'$set': {'logs': []}})
+        self.unset_date_modified()
+        do_migration(get_targets())
+        project = Node.load(self.project._id)
+        assert_equal(project.date_modified, project.date_created)
+
+    def test_registration_uses_inherited_log(self):
+        registration = RegistrationFactory(project=self.project)
+        self.unset_date_modified()
+        registration = Node.load(registration._id)
+        assert_equal(list(registration.logs), [])
+        date_modified = registration.last_log.date
+        do_migration(get_targets())
+        assert_equal(Node.load(registration._id).date_modified, date_modified)
+
+    def test_dry_run(self):
+        self.unset_date_modified()
+        do_migration(get_targets(), dry=True)
+        assert_is_none(Node.load(self.project._id).date_modified)
@@ -3,7 +3,7 @@ from framework.auth import Auth
 from tests.base import OsfTestCase
 from tests.factories import ProjectFactory, UserFactory, NodeFactory
 from scripts.migrate_registration_and_fork_log import (
-    get_parent, get_all_parents
+    get_parent, get_all_parents, get_targets
 )
 
 
@@ -37,4 +37,14 @@ class TestMigrateLogs(OsfTestCase):
 
         assert len(parent_list) is 2
         assert project1 in parent_list
-        assert project2 in parent_list
\ No newline at end of file
+        assert project2 in parent_list
+
+    def test_get_targets_skips_shared_log_histories(self):
+        user = UserFactory()
+        auth = Auth(user=user)
+        project = ProjectFactory(creator=user)
+        fork = project.fork_node(auth=auth)
+        registration = project.register_node(schema=None, auth=auth, template="foo", data="bar")
+        targets = list(get_targets())
+        assert fork not in targets
+        assert registration not in targets
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+from nose.tools import *  # noqa
+
+from framework.auth import Auth
+from tests.base import OsfTestCase
+from tests.factories import ProjectFactory, RegistrationFactory
+
+from website.project import counters
+from scripts.refresh_node_counters import do_migration, get_targets
+
+
+class TestRefreshNodeCounters(OsfTestCase):
+
+    def setUp(self):
+        super(TestRefreshNodeCounters, self).setUp()
+        self.project = ProjectFactory()
+        self.auth = Auth(self.project.creator)
+
+    def test_creates_missing_counts(self):
+        self.project.fork_node(self.auth)
+        other = ProjectFactory(creator=self.project.creator)
+        other.add_pointer(self.project, auth=self.auth, save=True)
+        counters.get_collection().remove({})
+        assert_in(self.project._id, get_targets())
+        do_migration(get_targets())
+        assert_equal(
+            counters.get_node_counters(self.project._id),
+            {'forks': 1, 'templated': 0, 'points': 1},
+        )
+
+    def test_unrelated_nodes_are_not_targets(self):
+        counters.get_collection().remove({})
+        assert_not_in(self.project._id, get_targets())
+
+    def test_corrects_drifted_counts(self):
+        self.project.fork_node(self.auth)
+        counters.set_node_counters(self.project._id, {'forks': 5, 'templated': 0, 'points': 0})
+        assert_equal(do_migration(get_targets()), 1)
+        assert_equal(counters.get_node_counters(self.project._id)['forks'], 1)
+        assert_equal(do_migration(get_targets()), 0)
+
+    def test_registrations_are_not_counted_as_forks(self):
+        RegistrationFactory(project=self.project)
+        counters.set_node_counters(self.project._id, {'forks': 1, 'templated': 0, 'points': 0})
+        do_migration(get_targets())
+        assert_equal(counters.get_node_counters(self.project._id)['forks'], 0)
+
+    def test_dry_run(self):
+        self.project.fork_node(self.auth)
+        counters.get_collection().remove({})
+        do_migration(get_targets(), dry=True)
+        assert_is_none(counters.get_node_counters(self.project._id))
+
+    def test_removes_counts_of_deleted_nodes(self):
+        self.project.fork_node(self.auth)
+        self.project.get_counters()
+        self.project.is_deleted = True
+        self.project.save()
+        do_migration(get_targets())
+        assert_is_none(counters.get_node_counters(self.project._id))
@@ -315,10 +315,13 @@ def elasticsearch():
         print("Your system is not recognized, you will have to start elasticsearch manually")
 
 @task
-def migrate_search(delete=False, index=settings.ELASTIC_INDEX):
-    """Migrate the search-enabled models."""
+def migrate_search(delete=False, index=settings.ELASTIC_INDEX, processes=1):
+    """Migrate the search-enabled models.
+
+    Pass --processes to build the new index with a pool of worker processes.
+    """
     from website.search_migration.migrate import migrate
-    migrate(delete, index=index)
+    migrate(delete, index=index, processes=int(processes))
 
 @task
 def rebuild_search():
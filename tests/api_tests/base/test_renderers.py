@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import json
+
+from nose.tools import *  # flake8: noqa
+from rest_framework.response import Response
+
+from tests.base import ApiTestCase
+from tests.factories import ProjectFactory
+from api.base.middleware import StreamingResponseMiddleware
+from api.base.renderers import JSONAPIRenderer
+from api.base.settings.defaults import API_BASE
+
+
+class TestJSONAPIRenderer(ApiTestCase):
+
+    def setUp(self):
+        super(TestJSONAPIRenderer, self).setUp()
+        self.renderer = JSONAPIRenderer()
+        self.data = {
+            'data': [{'id': 'abc12', 'attributes': {'title': u'Ünicode   title', 'public': True}}],
+            'links': {'next': None},
+        }
+
+    def test_iter_render_matches_render(self):
+        streamed = ''.join(self.renderer.iter_render(self.data, self.renderer.media_type))
+        assert_equal(streamed, self.renderer.render(self.data, self.renderer.media_type))
+
+    def test_iter_render_mixed_byte_and_unicode_titles(self):
+        self.data['data'].append({'id': 'def34', 'attributes': {'title': 'Caf\xc3\xa9', 'public': False}})
+        streamed = ''.join(self.renderer.iter_render(self.data, self.renderer.media_type))
+        titles = [each['attributes']['title'] for each in json.loads(streamed)['data']]
+        assert_equal(titles, [u'Ünicode   title', u'Café'])
+
+    def test_iter_render_with_indent(self):
+        media_type = self.renderer.media_type + '; indent=4'
+        streamed = ''.join(self.renderer.iter_render(self.data, media_type))
+        assert_equal(streamed, self.renderer.render(self.data, media_type))
+
+
+class TestStreamingResponseMiddleware(ApiTestCase):
+
+    def setUp(self):
+        super(TestStreamingResponseMiddleware, self).setUp()
+        self.middleware = StreamingResponseMiddleware()
+
+    def make_response(self, data, **kwargs):
+        response = Response(data, **kwargs)
+        response.accepted_renderer = JSONAPIRenderer()
+        response.accepted_media_type = JSONAPIRenderer.media_type
+        response.renderer_context = {}
+        return response
+
+    def test_streams_response(self):
+        response = self.middleware.process_template_response(None, self.make_response({'data': []}, status=201))
+        assert_true(response.streaming)
+        assert_equal(response.status_code, 201)
+        assert_equal(response['Content-Type'], JSONAPIRenderer.media_type)
+        assert_equal(''.join(response.streaming_content), '{"data":[]}')
+
+    def test_does_not_stream_errors(self):
+        response = self.make_response({'errors': []}, status=400)
+        response.exception = True
+        assert_is(self.middleware.process_template_response(None, response), response)
+
+    def test_list_is_streamed(self):
+        res = self.app.get('/{}nodes/'.format(API_BASE))
+        assert_equal(res.status_code, 200)
+        assert_equal(res.content_type, 'application/vnd.api+json')
+        assert_equal(res.json['data'], [])
+
+    def test_list_with_non_ascii_titles_is_streamed(self):
+        ProjectFactory(title=u'Ünicode   title', is_public=True)
+        ProjectFactory(title='Caf\xc3\xa9', is_public=True)
+        res = self.app.get('/{}nodes/'.format(API_BASE))
+        assert_equal(res.status_code, 200)
+        titles = set(each['attributes']['title'] for each in res.json['data'])
+        assert_equal(titles, {u'Ünicode   title', u'Café'})
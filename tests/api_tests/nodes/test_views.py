@@ -3,10 +3,13 @@ import mock
 from urlparse import urlparse
 from nose.tools import *  # flake8: noqa
 
-from website.models import Node
+from modularodm import Q
+
+from website.models import Node, User
 from framework.auth.core import Auth
 from website.util.sanitize import strip_html
 from api.base.settings.defaults import API_BASE
+from api.nodes.views import NodeList
 
 from tests.base import ApiTestCase, fake
 from tests.factories import (
@@ -96,6 +99,138 @@ class TestNodeList(ApiTestCase):
         assert_in(self.public._id, ids)
         assert_not_in(self.private._id, ids)
 
+    def test_return_private_node_list_logged_in_added_contributor(self):
+        private = ProjectFactory(is_public=False)
+        private.add_contributor(self.non_contrib, auth=Auth(private.creator), save=True)
+        res = self.app.get(self.url, auth=self.non_contrib.auth)
+        ids = [each['id'] for each in res.json['data']]
+        assert_in(private._id, ids)
+        assert_not_in(self.private._id, ids)
+
+    def test_contributor_query_is_exact_match(self):
+        # A user whose id differs only in case is not a contributor
+        user = mock.Mock(_id=self.user._id.upper())
+        user.is_anonymous.return_value = False
+        query = NodeList(request=mock.Mock(user=user)).get_default_odm_query()
+        assert_equal(
+            Node.find(query & Q('_id', 'eq', self.private._id)).count(),
+            0,
+        )
+
+
+
+class TestNodeListCursorPagination(ApiTestCase):
+
+    def setUp(self):
+        super(TestNodeListCursorPagination, self).setUp()
+        self.user = AuthUserFactory()
+        self.projects = [ProjectFactory(is_public=True, creator=self.user) for _ in range(3)]
+        # Make the first project the most recently modified
+        self.projects[0].add_log(
+            'tag_added',
+            params={'project': self.projects[0]._id, 'tag': 'cats'},
+            auth=Auth(self.user),
+        )
+        self.url = '/{}nodes/?page[cursor]=&page[size]=2'.format(API_BASE)
+
+    def test_pages_in_date_modified_order(self):
+        ids = []
+        url = self.url
+        while url:
+            res = self.app.get(url)
+            assert_equal(res.status_code, 200)
+            assert_less_equal(len(res.json['data']), 2)
+            ids.extend(each['id'] for each in res.json['data'])
+            url = res.json['links']['next']
+        assert_equal(len(ids), len(set(ids)))
+        assert_equal(set(ids), {project._id for project in self.projects})
+        assert_equal(ids[0], self.projects[0]._id)
+
+    def test_count_is_optional(self):
+        res = self.app.get(self.url)
+        assert_not_in('remaining', res.json['links']['meta'])
+        res = self.app.get(self.url + '&page[count]=true')
+        assert_equal(res.json['links']['meta']['remaining'], 3)
+
+    def test_invalid_cursor(self):
+        res = self.app.get(
+            '/{}nodes/?page[cursor]=notacursor'.format(API_BASE),
+            expect_errors=True,
+        )
+        assert_equal(res.status_code, 404)
+
+    def test_nested_list_pages(self):
+        project = self.projects[0]
+        contributor = UserFactory()
+        project.add_contributor(contributor, auth=Auth(self.user), save=True)
+        url = '/{}nodes/{}/contributors/?page[cursor]=&page[size]=1'.format(API_BASE, project._id)
+        res = self.app.get(url)
+        assert_equal(res.json['data'][0]['id'], self.user._id)
+        res = self.app.get(res.json['links']['next'])
+        assert_equal(len(res.json['data']), 1)
+        assert_equal(res.json['data'][0]['id'], contributor._id)
+        assert_is_none(res.json['links']['next'])
+
+    def test_nested_list_keeps_contributor_order(self):
+        project = self.projects[0]
+        contributors = [UserFactory() for _ in range(3)]
+        for contributor in contributors:
+            project.add_contributor(contributor, auth=Auth(self.user), save=True)
+        expected = [self.user._id] + [contributor._id for contributor in contributors]
+        ids = []
+        url = '/{}nodes/{}/contributors/?page[cursor]=&page[size]=2'.format(API_BASE, project._id)
+        while url:
+            res = self.app.get(url)
+            ids.extend(each['id'] for each in res.json['data'])
+            url = res.json['links']['next']
+        assert_equal(ids, expected)
+
+
+class TestNodeRelationshipCounts(ApiTestCase):
+
+    def setUp(self):
+        super(TestNodeRelationshipCounts, self).setUp()
+        self.user = AuthUserFactory()
+        self.project = ProjectFactory(is_public=True, creator=self.user)
+        self.other_project = ProjectFactory(is_public=True, creator=self.user)
+        NodeFactory(parent=self.project, creator=self.user, is_public=True)
+        NodeFactory(parent=self.project, creator=self.user, is_public=False)
+        NodeFactory(parent=self.project, creator=self.user, is_public=True, is_deleted=True)
+        self.project.add_pointer(self.other_project, auth=Auth(self.user), save=True)
+        self.project.add_contributor(UserFactory(), auth=Auth(self.user), save=True)
+        RegistrationFactory(creator=self.user, project=self.project)
+        self.url = '/{}nodes/'.format(API_BASE)
+
+    def get_counts(self, data):
+        return {
+            key: data['relationships'][key]['links']['related']['meta']['count']
+            for key in ('children', 'contributors', 'node_links', 'registrations')
+        }
+
+    def test_list_counts_each_node(self):
+        res = self.app.get(self.url, auth=self.user.auth)
+        counts = {each['id']: self.get_counts(each) for each in res.json['data']}
+        assert_equal(
+            counts[self.project._id],
+            {'children': 2, 'contributors': 2, 'node_links': 1, 'registrations': 1},
+        )
+        assert_equal(
+            counts[self.other_project._id],
+            {'children': 0, 'contributors': 1, 'node_links': 0, 'registrations': 0},
+        )
+
+    def test_list_counts_only_visible_nodes(self):
+        res = self.app.get(self.url)
+        counts = {each['id']: self.get_counts(each) for each in res.json['data']}
+        assert_equal(counts[self.project._id]['children'], 1)
+        assert_equal(counts[self.project._id]['registrations'], 0)
+
+    def test_detail_counts(self):
+        res = self.app.get('/{}nodes/{}/'.format(API_BASE, self.project._id), auth=self.user.auth)
+        assert_equal(
+            self.get_counts(res.json['data']),
+            {'children': 2, 'contributors': 2, 'node_links': 1, 'registrations': 1},
+        )
 
 
 class TestNodeFiltering(ApiTestCase):
@@ -879,6 +1014,29 @@ class TestNodeContributorFiltering(ApiTestCase):
         assert_equal(len(res.json['data']), 1)
         assert_false(res.json['data'][0]['attributes'].get('bibliographic', None))
 
+    def test_filtering_on_stored_and_computed_fields(self):
+        contribs = [UserFactory(fullname='Freddie Mercury'), UserFactory(fullname='Freddie King')]
+        for contrib in contribs:
+            self.project.add_contributor(contrib, visible=contrib is contribs[1])
+        self.project.save()
+        base_url = '/{}nodes/{}/contributors/'.format(API_BASE, self.project._id)
+
+        res = self.app.get(base_url + '?filter[fullname]=freddie', auth=self.basic_auth)
+        assert_equal([each['id'] for each in res.json['data']], [each._id for each in contribs])
+
+        url = base_url + '?filter[fullname]=freddie&filter[bibliographic]=True'
+        res = self.app.get(url, auth=self.basic_auth)
+        assert_equal([each['id'] for each in res.json['data']], [contribs[1]._id])
+
+    def test_filtering_on_stored_field_queries_database(self):
+        url = '/{}nodes/{}/contributors/?filter[fullname]={}'.format(
+            API_BASE, self.project._id, self.project.creator.fullname,
+        )
+        with mock.patch('api.nodes.views.User.find', wraps=User.find) as mock_find:
+            res = self.app.get(url, auth=self.basic_auth)
+        assert_true(mock_find.called)
+        assert_equal(len(res.json['data']), 1)
+
 class TestNodeRegistrationList(ApiTestCase):
     def setUp(self):
         super(TestNodeRegistrationList, self).setUp()
@@ -951,6 +1109,38 @@ class TestNodeChildrenList(ApiTestCase):
         res = self.app.get(self.private_project_url, auth=self.user.auth)
         assert_equal(len(res.json['data']), 1)
 
+    def test_node_children_list_filtering(self):
+        other = NodeFactory(parent=self.project, creator=self.user, title='Another component')
+        res = self.app.get(
+            self.private_project_url + '?filter[title]=another',
+            auth=self.user.auth,
+        )
+        assert_equal([each['id'] for each in res.json['data']], [other._id])
+
+    def test_node_children_list_filtering_keeps_node_order(self):
+        first = NodeFactory(parent=self.project, creator=self.user, title='Ordered first')
+        second = NodeFactory(parent=self.project, creator=self.user, title='Ordered second')
+        self.project.nodes.remove(second)
+        self.project.nodes.insert(0, second)
+        self.project.save()
+        res = self.app.get(self.private_project_url, auth=self.user.auth)
+        assert_equal([each['id'] for each in res.json['data']], [second._id, self.component._id, first._id])
+        res = self.app.get(
+            self.private_project_url + '?filter[title]=ordered',
+            auth=self.user.auth,
+        )
+        assert_equal([each['id'] for each in res.json['data']], [second._id, first._id])
+
+    def test_node_children_list_filtering_excludes_pointers_and_deleted(self):
+        linked = ProjectFactory(title='Linked project')
+        self.project.add_pointer(linked, auth=Auth(self.user), save=True)
+        NodeFactory(parent=self.project, creator=self.user, title='Linked component', is_deleted=True)
+        res = self.app.get(
+            self.private_project_url + '?filter[title]=linked',
+            auth=self.user.auth,
+        )
+        assert_equal(res.json['data'], [])
+
     def test_return_public_node_children_list_logged_out(self):
         res = self.app.get(self.public_project_url)
         assert_equal(res.status_code, 200)
@@ -1438,7 +1628,7 @@ class TestNodeFilesList(ApiTestCase):
         assert_in('github', providers)
         assert_in('osfstorage', providers)
 
-    @mock.patch('api.nodes.views.requests.get')
+    @mock.patch('website.util.waterbutler.session.get')
     def test_returns_node_files_list(self, mock_waterbutler_request):
         mock_res = mock.MagicMock()
         mock_res.status_code = 200
@@ -1461,7 +1651,7 @@ class TestNodeFilesList(ApiTestCase):
         assert_equal(res.json['data'][0]['attributes']['name'], 'NewFile')
         assert_equal(res.json['data'][0]['attributes']['provider'], 'osfstorage')
 
-    @mock.patch('api.nodes.views.requests.get')
+    @mock.patch('website.util.waterbutler.session.get')
     def test_handles_unauthenticated_waterbutler_request(self, mock_waterbutler_request):
         url = '/{}nodes/{}/files/?path=%2F&provider=osfstorage'.format(API_BASE, self.project._id)
         mock_res = mock.MagicMock()
@@ -1472,7 +1662,7 @@ class TestNodeFilesList(ApiTestCase):
         assert 'detail' in res.json['errors'][0]
 
 
-    @mock.patch('api.nodes.views.requests.get')
+    @mock.patch('website.util.waterbutler.session.get')
     def test_handles_bad_waterbutler_request(self, mock_waterbutler_request):
         url = '/{}nodes/{}/files/?path=%2F&provider=osfstorage'.format(API_BASE, self.project._id)
         mock_res = mock.MagicMock()
@@ -6,15 +6,21 @@ These require a test db because they use Session objects.
 import json
 import unittest
 import os
+import threading
+from multiprocessing import TimeoutError
 
+import mock
 import flask
 from lxml.html import fragment_fromstring
 import werkzeug.wrappers
 
 from framework.exceptions import HTTPError, http
+from framework.mongo import get_cache_key
+from framework.sessions import session, sessions
 from framework.routing import (
     Renderer, JSONRenderer, WebRenderer,
-    render_mako_string,
+    render_mako_string, parse_meta, NestedFetcher, TemplateCache,
+    can_fetch_nested_concurrently,
 )
 
 from tests.base import AppTestCase, OsfTestCase
@@ -230,6 +236,35 @@ class WebRendererTemplateTestCase(OsfTestCase):
         # The contents of the inner template should be present in the page.
         self.assertIn('child template content', resp.data)
 
+    def test_nested_templates_replace_and_insert(self):
+        """Embeds with ``replace`` are swapped for the nested template; other
+        embeds keep their element and have the template inserted inside it.
+        """
+        self.app.app.preprocess_request()
+
+        r = WebRenderer(
+            'nested_parent_multiple.html',
+            render_mako_string,
+            template_dir=TEMPLATES_PATH,
+        )
+
+        resp = r({})
+
+        self.assertNotIn('class="first"', resp.data)
+        self.assertIn('<p>between</p>', resp.data)
+        self.assertIn(
+            '<div class="second" mod-meta=\'{"tpl":"nested_child.html"}\'>'
+            '<p>child template content</p></div>',
+            resp.data,
+        )
+        self.assertEqual(resp.data.count('child template content'), 2)
+
+    def test_parse_meta_is_cached(self):
+        meta = '{"tpl": "nested_child.html", "replace": true}'
+        self.assertIs(parse_meta(meta), parse_meta(meta))
+        with self.assertRaises(ValueError):
+            parse_meta('{not json')
+
     def test_render_included_template(self):
         """``WebRenderer.render_element()`` is the internal method called when
         a template string is rendered. This test case examines the same
@@ -319,6 +354,123 @@ class WebRendererTemplateTestCase(OsfTestCase):
         )
 
 
+class NestedFetcherTestCase(AppTestCase):
+
+    def test_fetches_each_uri_once(self):
+        with mock.patch('framework.routing.call_url') as mock_call_url:
+            mock_call_url.side_effect = lambda url, view_kwargs=None: {'url': url}
+            fetcher = NestedFetcher(
+                [('/first/', {}), ('/second/', {'primary': 1}), ('/first/', {})],
+                timeout=5,
+            )
+            self.assertEqual(fetcher('/first/'), {'url': '/first/'})
+            self.assertEqual(fetcher('/second/', view_kwargs={'primary': 1}), {'url': '/second/'})
+        self.assertEqual(mock_call_url.call_count, 2)
+        self.assertEqual(
+            sorted(url for url, _ in fetcher.report()),
+            ['/first/', '/second/'],
+        )
+
+    def test_uses_own_request_context(self):
+        flask.g.marker = 'parent'
+        session.data['auth_user_id'] = 'abc12'
+        parent_request = flask.request._get_current_object()
+        with mock.patch('framework.routing.call_url') as mock_call_url:
+            mock_call_url.side_effect = lambda url, view_kwargs=None: {
+                'path': flask.request.path,
+                'marker': getattr(flask.g, 'marker', None),
+                'same_request': flask.request._get_current_object() is parent_request,
+                'same_cache_key': get_cache_key() is parent_request,
+                'session_id': session._id,
+                'same_session_data': session.data is sessions[parent_request].data,
+                'auth_user_id': session.data.get('auth_user_id'),
+            }
+            fetcher = NestedFetcher([('/first/', {})], timeout=5)
+            self.assertEqual(
+                fetcher('/first/'),
+                {
+                    'path': flask.request.path,
+                    'marker': None,
+                    'same_request': False,
+                    'same_cache_key': False,
+                    'session_id': session._id,
+                    'same_session_data': False,
+                    'auth_user_id': 'abc12',
+                },
+            )
+
+    def test_view_errors_are_reraised(self):
+        with mock.patch('framework.routing.call_url', side_effect=HTTPError(http.FORBIDDEN)):
+            fetcher = NestedFetcher([('/first/', {})], timeout=5)
+            with self.assertRaises(HTTPError):
+                fetcher('/first/')
+
+    def test_timeout(self):
+        done = threading.Event()
+        with mock.patch('framework.routing.call_url', side_effect=lambda *args, **kwargs: done.wait(5)):
+            fetcher = NestedFetcher([('/slow/', {})], timeout=0)
+            with self.assertRaises(TimeoutError):
+                fetcher('/slow/')
+        done.set()
+
+
+class TemplateCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = TemplateCache(max_size=2)
+        self.child = os.path.join(TEMPLATES_PATH, 'nested_child.html')
+        self.main = os.path.join(TEMPLATES_PATH, 'main.html')
+
+    def test_template_is_compiled_once(self):
+        self.assertIs(self.cache.get(self.child), self.cache.get(self.child))
+
+    def test_keyed_by_escaping_mode(self):
+        trusted = self.cache.get(self.child, trust=True)
+        escaped = self.cache.get(self.child, trust=False)
+        self.assertIsNot(trusted, escaped)
+        self.assertNotEqual(trusted.module.__file__, escaped.module.__file__)
+
+    def test_keyed_by_full_path(self):
+        relative = os.path.join(TEMPLATES_PATH, '..', 'templates', 'nested_child.html')
+        self.assertIs(self.cache.get(self.child), self.cache.get(relative))
+
+    def test_least_recently_used_is_evicted(self):
+        first = self.cache.get(self.child)
+        self.cache.get(self.main)
+        self.cache.get(self.child)
+        self.cache.get(self.child, trust=False)
+        self.assertEqual(len(self.cache), 2)
+        self.assertIs(self.cache.get(self.child), first)
+
+    def test_missing_template(self):
+        with self.assertRaises(IOError):
+            self.cache.get(os.path.join(TEMPLATES_PATH, 'not_a_real_file.html'))
+
+
+class CanFetchNestedConcurrentlyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = flask.Flask(__name__)
+        self.app.add_url_rule('/transaction/', 'transaction', lambda: '')
+        no_transaction = lambda: ''
+        no_transaction._no_auto_transaction = True
+        self.app.add_url_rule('/no-transaction/', 'no_transaction', no_transaction)
+
+    def _check(self, path):
+        with self.app.test_request_context(path):
+            return can_fetch_nested_concurrently()
+
+    def test_allowed_without_transaction(self):
+        self.assertTrue(self._check('/no-transaction/'))
+
+    def test_refused_with_transaction(self):
+        self.assertFalse(self._check('/transaction/'))
+
+    @mock.patch('framework.routing.settings.DB_POOLED_CLIENT', True)
+    def test_refused_with_pooled_client(self):
+        self.assertFalse(self._check('/no-transaction/'))
+
+
 class JSONRendererEncoderTestCase(unittest.TestCase):
 
     def test_encode_custom_class(self):
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import mock
+from nose.tools import *  # noqa (PEP8 asserts)
+
+from framework.mongo.handlers import ClientPool
+
+
+class TestClientPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ClientPool(max_pool_size=5)
+        self.patcher = mock.patch('framework.mongo.handlers.get_mongo_client')
+        self.mock_get_client = self.patcher.start()
+        self.mock_get_client.side_effect = lambda **kwargs: mock.Mock()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_client_is_shared_within_process(self):
+        client = self.pool.get_client()
+        assert_is(self.pool.get_client(), client)
+        self.mock_get_client.assert_called_once_with(max_pool_size=5)
+
+    def test_client_is_recreated_after_fork(self):
+        with mock.patch('os.getpid', return_value=1):
+            parent_client = self.pool.get_client()
+        with mock.patch('os.getpid', return_value=2):
+            child_client = self.pool.get_client()
+        assert_is_not(parent_client, child_client)
+        assert_equal(self.pool.stats()['initializations'], 2)
+        assert_equal(self.pool.stats()['pid'], 2)
+
+    def test_checkout_and_checkin_track_occupancy(self):
+        first = self.pool.checkout()
+        second = self.pool.checkout()
+        first.start_request.assert_called_with()
+        assert_equal(self.pool.stats()['in_use'], 2)
+        self.pool.checkin(first)
+        self.pool.checkin(second)
+        stats = self.pool.stats()
+        assert_equal(stats['in_use'], 0)
+        assert_equal(stats['peak_in_use'], 2)
+        assert_equal(stats['checkouts'], 2)
+
+    def test_checkin_outside_request_is_noop(self):
+        client = self.pool.checkout()
+        client.in_request.return_value = False
+        self.pool.checkin(client)
+        assert_false(client.end_request.called)
+        assert_equal(self.pool.stats()['in_use'], 1)
+
+    @mock.patch('framework.mongo.handlers.logger')
+    def test_checkout_logs_when_exhausted(self, mock_logger):
+        clients = [self.pool.checkout() for _ in range(4)]
+        assert_false(mock_logger.warning.called)
+        clients.append(self.pool.checkout())
+        assert_equal(mock_logger.warning.call_count, 1)
+        assert_in("'in_use': 5", mock_logger.warning.call_args[0][0])
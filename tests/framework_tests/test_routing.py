@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import json
 import unittest
 
 from nose.tools import *  # noqa (PEP8 asserts)
@@ -6,7 +7,10 @@ from flask import Flask
 from webtest_plus import TestApp
 
 from framework.exceptions import HTTPError
-from framework.routing import json_renderer, process_rules, Rule
+from framework.routing import (
+    json_renderer, streaming_json_renderer, process_rules, Rule, data_to_lambda,
+    iter_json, buffer_chunks, JSONRenderer,
+)
 
 def error_view():
     raise HTTPError(400)
@@ -40,3 +44,128 @@ class TestJSONRenderer(unittest.TestCase):
         data = res.json
         assert_equal(data['message_short'], 'Invalid')
         assert_equal(data['message_long'], 'Invalid request')
+
+
+def generator_view():
+    return {'items': ({'id': index} for index in range(3)), 'total': 3}
+
+
+def created_generator_view():
+    return generator_view(), 201
+
+
+class TestStreamingJSONRenderer(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.debug = True
+
+        self.wt = TestApp(self.app)
+
+    def test_streams_generators(self):
+        rule = Rule(['/items/'], 'get', generator_view, renderer=streaming_json_renderer)
+        process_rules(self.app, [rule])
+        res = self.wt.get('/items/')
+        assert_equal(res.status_code, 200)
+        assert_equal(res.content_type, 'application/json')
+        assert_equal(res.headers.getall('Content-Type'), ['application/json; charset=utf-8'])
+        assert_equal(res.json, {'items': [{'id': 0}, {'id': 1}, {'id': 2}], 'total': 3})
+
+    def test_streams_with_status_code(self):
+        rule = Rule(['/items/'], 'post', created_generator_view, renderer=streaming_json_renderer)
+        process_rules(self.app, [rule])
+        res = self.wt.post('/items/')
+        assert_equal(res.status_code, 201)
+        assert_equal(res.headers.getall('Content-Type'), ['application/json; charset=utf-8'])
+        assert_equal(res.json['total'], 3)
+
+    def test_non_streaming_renderer_accepts_generators(self):
+        rule = Rule(['/items/'], 'get', generator_view, renderer=json_renderer)
+        process_rules(self.app, [rule])
+        res = self.wt.get('/items/')
+        assert_equal(res.json['items'], [{'id': 0}, {'id': 1}, {'id': 2}])
+
+    def test_error_handling(self):
+        rule = Rule(['/error/'], 'get', error_with_msg, renderer=streaming_json_renderer)
+        process_rules(self.app, [rule])
+        res = self.wt.get('/error/', expect_errors=True)
+        assert_equal(res.status_code, 400)
+        assert_equal(res.json['message_long'], 'Invalid request')
+
+
+class Serializable(object):
+
+    def to_json(self):
+        return {'serialized': True}
+
+
+class TestIterJSON(unittest.TestCase):
+
+    def encode(self, data):
+        return ''.join(iter_json(data, JSONRenderer.Encoder()))
+
+    def test_matches_json_dumps(self):
+        data = {
+            'title': u'Ünicode "quoted"',
+            'count': 3,
+            'ratio': 0.5,
+            'flags': [True, False, None],
+            'nested': {'list': [], 'dict': {}, 'tuple': (1, 2)},
+            1: 'int key',
+            None: 'none key',
+        }
+        assert_equal(self.encode(data), json.dumps(data))
+
+    def test_encodes_iterators_as_arrays(self):
+        data = {'items': iter([1, 2]), 'pairs': (str(x) for x in range(2))}
+        assert_equal(json.loads(self.encode(data)), {'items': [1, 2], 'pairs': ['0', '1']})
+
+    def test_uses_encoder_default(self):
+        assert_equal(self.encode([Serializable()]), '[{"serialized": true}]')
+
+    def test_unserializable(self):
+        with assert_raises(TypeError):
+            self.encode({'object': object()})
+
+    def test_mixed_byte_and_unicode_strings_without_ascii_escaping(self):
+        encoder = JSONRenderer.Encoder(ensure_ascii=False)
+        data = {'title': 'Caf\xc3\xa9', u'descripción': u'Ünicode', 'tags': ['\xc3\xbc']}
+        encoded = ''.join(buffer_chunks(iter_json(data, encoder), 4))
+        assert_equal(json.loads(encoded), {'title': u'Café', u'descripción': u'Ünicode', 'tags': [u'ü']})
+
+    def test_buffer_chunks(self):
+        chunks = list(buffer_chunks(['ab', 'c', 'def', 'g'], 3))
+        assert_equal(chunks, ['abc', 'def', 'g'])
+
+
+class TestDataToLambda(unittest.TestCase):
+
+    def test_returns_equal_data(self):
+        data = {'title': 'Getting started', 'tags': ['a', 'b'], 'meta': {'id': 1}}
+        func = data_to_lambda(data)
+        assert_equal(func(), {'title': 'Getting started', 'tags': ('a', 'b'), 'meta': {'id': 1}})
+
+    def test_top_level_changes_not_shared(self):
+        func = data_to_lambda({'title': 'Getting started'})
+        first = func()
+        first['title'] = 'Changed'
+        first['user'] = 'fred'
+        assert_equal(func(), {'title': 'Getting started'})
+
+    def test_nested_values_cannot_be_changed(self):
+        func = data_to_lambda({'meta': {'id': 1}})
+        with assert_raises(TypeError):
+            func()['meta']['id'] = 2
+        assert_equal(func()['meta']['id'], 1)
+
+    def test_does_not_reference_original_data(self):
+        data = {'meta': {'id': 1}}
+        func = data_to_lambda(data)
+        data['meta']['id'] = 2
+        assert_equal(func()['meta']['id'], 1)
+
+    def test_non_dict_data_is_copied(self):
+        data = ['a', 'b']
+        func = data_to_lambda(data)
+        func().append('c')
+        assert_equal(func(), ['a', 'b'])
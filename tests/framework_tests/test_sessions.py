@@ -1,8 +1,16 @@
+import datetime
+import unittest
+
+import mock
+import itsdangerous
 from nose.tools import *
 
+from framework import sessions
 from framework.sessions import utils
+from framework.sessions.cache import SessionCache
 from tests import factories
-from tests.base import DbTestCase
+from tests.base import DbTestCase, OsfTestCase, test_app
+from website import settings
 from website.models import User
 from website.models import Session
 
@@ -34,3 +42,125 @@ class SessionUtilsTestCase(DbTestCase):
 
         utils.remove_sessions_for_user(self.user)
         assert_equal(1, Session.find().count())
+
+
+class SessionRequestTestCase(OsfTestCase):
+
+    def setUp(self):
+        super(SessionRequestTestCase, self).setUp()
+        self.user = factories.UserFactory()
+        self.session = factories.SessionFactory(user=self.user)
+        self.cookie = itsdangerous.Signer(settings.SECRET_KEY).sign(self.session._id)
+
+    def tearDown(self):
+        super(SessionRequestTestCase, self).tearDown()
+        sessions.session_cache.clear()
+        Session.remove()
+
+    def request_context(self):
+        return test_app.test_request_context(
+            environ_base={'HTTP_COOKIE': '{0}={1}'.format(settings.COOKIE_NAME, self.cookie)},
+        )
+
+    def get_date_modified(self):
+        Session._clear_caches()
+        return Session.load(self.session._id).date_modified
+
+    def test_session_loaded_on_first_use(self):
+        with self.request_context():
+            with mock.patch.object(Session, 'load', wraps=Session.load) as mock_load:
+                sessions.before_request()
+                assert_false(mock_load.called)
+                assert_equal(sessions.session.data['auth_user_id'], self.user._id)
+                mock_load.assert_called_once_with(self.session._id)
+
+    def test_unused_session_not_saved(self):
+        with self.request_context():
+            sessions.before_request()
+            with mock.patch.object(Session, 'save') as mock_save:
+                sessions.after_request(None)
+                assert_false(mock_save.called)
+
+    def test_unchanged_session_not_saved(self):
+        date_modified = self.get_date_modified()
+        with self.request_context():
+            sessions.before_request()
+            assert_true(sessions.session.is_authenticated)
+            sessions.after_request(None)
+        assert_equal(self.get_date_modified(), date_modified)
+
+    def test_changed_session_saved(self):
+        with self.request_context():
+            sessions.before_request()
+            sessions.session.data['status'] = ['Saved']
+            sessions.after_request(None)
+        Session._clear_caches()
+        assert_equal(Session.load(self.session._id).data['status'], ['Saved'])
+
+    def test_stale_session_saved(self):
+        date_modified = datetime.datetime.utcnow() - settings.SESSION_TOUCH_INTERVAL * 2
+        Session._storage[0].store.update(
+            {'_id': self.session._id},
+            {'$set': {'date_modified': date_modified}},
+        )
+        Session._clear_caches()
+        with self.request_context():
+            sessions.before_request()
+            assert_true(sessions.session.is_authenticated)
+            sessions.after_request(None)
+        assert_greater(self.get_date_modified(), date_modified)
+
+    @mock.patch('framework.sessions.session_cache', SessionCache(timeout=60, max_size=10))
+    def test_cached_session_not_loaded(self):
+        with self.request_context():
+            sessions.before_request()
+            assert_true(sessions.session.is_authenticated)
+        with self.request_context():
+            sessions.before_request()
+            with mock.patch.object(Session, 'load') as mock_load:
+                assert_equal(sessions.session.data['auth_user_id'], self.user._id)
+                assert_false(mock_load.called)
+
+    @mock.patch('framework.sessions.session_cache', SessionCache(timeout=60, max_size=10))
+    def test_changed_cached_session_saved(self):
+        with self.request_context():
+            sessions.before_request()
+            assert_true(sessions.session.is_authenticated)
+        with self.request_context():
+            sessions.before_request()
+            sessions.session.data['status'] = ['Saved']
+            sessions.after_request(None)
+        Session._clear_caches()
+        assert_equal(Session.load(self.session._id).data['status'], ['Saved'])
+        assert_equal(Session.find().count(), 1)
+
+
+class SessionCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = SessionCache(timeout=60, max_size=2)
+
+    def test_get_returns_copy(self):
+        now = datetime.datetime.utcnow()
+        self.cache.set('abc', {'tags': ['a']}, now)
+        data, date_modified = self.cache.get('abc')
+        data['tags'].append('b')
+        assert_equal(self.cache.get('abc'), ({'tags': ['a']}, now))
+
+    def test_expired_entries_removed(self):
+        self.cache.set('abc', {}, None)
+        with mock.patch('framework.utils.time.time', return_value=float('inf')):
+            assert_is_none(self.cache.get('abc'))
+        assert_equal(len(self.cache), 0)
+
+    def test_max_size(self):
+        for session_id in ['a', 'b', 'c']:
+            self.cache.set(session_id, {}, None)
+        assert_equal(len(self.cache), 2)
+        assert_is_none(self.cache.get('a'))
+
+    def test_disabled(self):
+        cache = SessionCache(timeout=0, max_size=2)
+        cache.set('abc', {}, None)
+        assert_is_none(cache.get('abc'))
+        assert_equal(len(cache), 0)
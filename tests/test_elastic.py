@@ -6,11 +6,13 @@ from nose.tools import *  # flake8: noqa (PEP8 asserts)
 import mock
 
 from framework.auth.core import Auth
+from framework.mongo import database
 from website import settings
 import website.search.search as search
 from website.search import elastic_search
+from website.search import tasks as search_tasks
 from website.search.util import build_query
-from website.search_migration.migrate import migrate
+from website.search_migration.migrate import migrate, migrate_nodes
 from website.models import Retraction
 
 from tests.base import OsfTestCase
@@ -322,6 +324,13 @@ class TestPublicNodes(SearchTestCase):
         assert_equal(docs[0]['parent_title'], 'hello & world')
         assert_true(docs[0]['parent_url'])
 
+    def test_component_parents_are_not_loaded_individually(self):
+        with mock.patch.object(elastic_search.Node, 'load') as mock_load:
+            docs = query('category:component AND ' + self.title)['results']
+        assert_false(mock_load.called)
+        assert_equal(len(docs), 1)
+        assert_equal(docs[0]['parent_url'], self.project.url)
+
     def test_make_parent_private(self):
         # Make parent of component, public, then private, and verify that the
         # component still appears but doesn't link to the parent in search.
@@ -457,6 +466,96 @@ class TestPublicNodes(SearchTestCase):
         for doc in docs:
             assert doc['key'] in tags
 
+    def test_combined_search_matches_separate_requests(self):
+        search_query = build_query(self.title)
+        with mock.patch.object(settings, 'ELASTIC_COMBINED_SEARCH', False):
+            separate = search.search(search_query, index=elastic_search.INDEX, doc_type='project')
+        with mock.patch.object(settings, 'ELASTIC_COMBINED_SEARCH', True):
+            combined = search.search(search_query, index=elastic_search.INDEX, doc_type='project')
+        assert_equal(combined['counts'], separate['counts'])
+        assert_equal(combined['tags'], separate['tags'])
+        assert_equal(
+            [result['url'] for result in combined['results']],
+            [result['url'] for result in separate['results']],
+        )
+        # Counts cover every type; results only the requested one
+        assert_equal(combined['counts']['total'], 3)
+        assert_equal(len(combined['results']), 1)
+
+
+class TestBuildCombinedQuery(unittest.TestCase):
+
+    def test_adds_aggregations_without_mutating_query(self):
+        query = build_query('queen')
+        combined = elastic_search.build_combined_query(query)
+        assert_not_in('aggregations', query)
+        assert_equal(set(combined['aggregations'].keys()), {'counts', 'tag_cloud'})
+        assert_not_in('post_filter', combined)
+        assert_equal(combined['from'], query['from'])
+
+    def test_filters_hits_by_doc_type(self):
+        combined = elastic_search.build_combined_query(build_query('queen'), doc_type='user')
+        assert_equal(combined['post_filter'], {'terms': {'_type': ['user']}})
+
+    def test_combines_existing_post_filter(self):
+        query = build_query('queen')
+        query['post_filter'] = {'term': {'tags': 'rock'}}
+        combined = elastic_search.build_combined_query(query, doc_type='project,component')
+        assert_equal(combined['post_filter'], {'and': [
+            {'term': {'tags': 'rock'}},
+            {'terms': {'_type': ['project', 'component']}},
+        ]})
+
+
+@requires_search
+class TestSearchIndexQueue(SearchTestCase):
+
+    def setUp(self):
+        super(TestSearchIndexQueue, self).setUp()
+        self.user = UserFactory(fullname='Freddie Mercury')
+        self.async_patch = mock.patch.object(settings, 'SEARCH_INDEX_ASYNC', True)
+        self.async_patch.start()
+        self.project = ProjectFactory(
+            title='Bohemian Rhapsody',
+            creator=self.user,
+            is_public=True,
+        )
+
+    def tearDown(self):
+        self.async_patch.stop()
+        database[search_tasks.QUEUE_COLLECTION].remove()
+        super(TestSearchIndexQueue, self).tearDown()
+
+    def test_node_is_indexed_on_flush(self):
+        assert_equal(len(query(self.project.title)['results']), 0)
+        assert_true(search_tasks.get_queue_depth())
+
+        search_tasks.flush()
+        elastic_search.es.indices.refresh(elastic_search.INDEX)
+
+        assert_equal(len(query(self.project.title)['results']), 1)
+        assert_equal(search_tasks.get_queue_depth(), 0)
+
+    def test_repeated_saves_are_coalesced(self):
+        auth = Auth(self.user)
+        self.project.set_title('Killer Queen', auth=auth, save=True)
+        self.project.set_title('Somebody to Love', auth=auth, save=True)
+        entries = database[search_tasks.QUEUE_COLLECTION].find({'object_id': self.project._id})
+        assert_equal(entries.count(), 1)
+
+    def test_deleted_node_is_removed_on_flush(self):
+        search_tasks.flush()
+        self.project.remove_node(Auth(self.user))
+        search_tasks.flush()
+        elastic_search.es.indices.refresh(elastic_search.INDEX)
+        assert_equal(len(query(self.project.title)['results']), 0)
+
+    def test_entries_queued_during_flush_are_kept(self):
+        batch, entries = search_tasks.claim_batch()
+        search_tasks.enqueue(search_tasks.NODE, self.project._id)
+        database[search_tasks.QUEUE_COLLECTION].remove({'batch': batch})
+        assert_equal(search_tasks.get_queue_depth(), 1)
+
 
 @requires_search
 class TestAddContributor(SearchTestCase):
@@ -540,6 +639,16 @@ class TestAddContributor(SearchTestCase):
         contribs = search.search_contributor(self.name4.split(' ')[0][:-1])
         assert_equal(len(contribs['users']), 0)
 
+    def test_search_n_projects_in_common(self):
+        current_user = UserFactory()
+        for _ in range(2):
+            project = ProjectFactory(creator=current_user)
+            project.add_contributor(self.user, auth=Auth(current_user), save=True)
+        ProjectFactory(creator=self.user)
+        contribs = search.search_contributor(self.name1, current_user=current_user)
+        assert_equal(len(contribs['users']), 1)
+        assert_equal(contribs['users'][0]['n_projects_in_common'], 2)
+
 @requires_search
 class TestProjectSearchResults(SearchTestCase):
     def setUp(self):
@@ -720,6 +829,29 @@ class TestSearchMigration(SearchTestCase):
             is_public=True
         )
 
+    def test_migration_indexes_in_batches(self):
+        ProjectFactory(title='Ziggy Stardust', creator=self.user, is_public=True)
+        ProjectFactory(title='Aladdin Sane', creator=self.user, is_public=False)
+        index = settings.ELASTIC_INDEX + '_batched'
+        search.create_index(index)
+        try:
+            progress = migrate_nodes(index, batch_size=1)
+            self.es.indices.refresh(index=index)
+            assert_equal(progress.processed, 2)
+            assert_equal(progress.indexed, 2)
+            assert_equal(progress.failed, [])
+            results = search.search(build_query('Ziggy'), index=index)['results']
+            assert_equal(len(results), 1)
+        finally:
+            search.delete_index(index)
+
+    def test_failed_batch_is_reported(self):
+        with mock.patch('website.search_migration.migrate.prefetch_node_relations',
+                        side_effect=ValueError):
+            progress = migrate_nodes(settings.ELASTIC_INDEX)
+        assert_equal(progress.indexed, 0)
+        assert_equal(progress.failed, [self.project._id])
+
     def test_first_migration_no_delete(self):
         migrate(delete=False, index=settings.ELASTIC_INDEX, app=self.app.app)
         var = self.es.indices.get_aliases()
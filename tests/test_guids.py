@@ -4,14 +4,14 @@ import mock
 from nose.tools import *  # noqa
 
 from tests.base import OsfTestCase
-from tests.factories import NodeFactory
+from tests.factories import NodeFactory, UserFactory
 
 from modularodm import Q
 from modularodm import fields
 from modularodm.storage.mongostorage import MongoStorage
 
 from framework.mongo import database
-from framework.guid.model import GuidStoredObject
+from framework.guid.model import GuidStoredObject, GuidPool, guid_pool
 
 from website import models
 
@@ -33,6 +33,55 @@ class TestGuidStoredObject(OsfTestCase):
         assert_equal(guids[0]._id, fake_guid._id)
 
 
+class TestGuidPool(OsfTestCase):
+
+    def setUp(self):
+        super(TestGuidPool, self).setUp()
+        self.pool = GuidPool(batch_size=4)
+
+    @mock.patch('framework.guid.model.generate_guid_id')
+    def test_pop_skips_blacklisted_and_taken_ids(self, mock_generate):
+        models.BlacklistGuid(_id='bad22').save()
+        node = NodeFactory()
+        mock_generate.side_effect = ['bad22', node._id, 'new22', 'new33']
+        ids = set([self.pool.pop(), self.pool.pop()])
+        assert_equal(ids, set(['new22', 'new33']))
+        assert_equal(mock_generate.call_count, 4)
+        stats = self.pool.get_stats()
+        assert_equal(stats['size'], 0)
+        assert_equal(stats['allocated'], 2)
+        assert_equal(stats['rejected'], 2)
+
+    @mock.patch('framework.guid.model.generate_guid_id')
+    def test_pop_refills_in_batches(self, mock_generate):
+        mock_generate.side_effect = ['aaa22', 'bbb22', 'ccc22', 'ddd22']
+        self.pool.pop()
+        assert_equal(mock_generate.call_count, 4)
+        assert_equal(self.pool.get_stats()['size'], 3)
+
+    @mock.patch('framework.guid.model.logger')
+    @mock.patch('framework.guid.model.generate_guid_id')
+    def test_refill_logs_stats(self, mock_generate, mock_logger):
+        mock_generate.side_effect = ['aaa22', 'bbb22', 'ccc22', 'ddd22']
+        self.pool.record_collision()
+        self.pool.pop()
+        message = mock_logger.info.call_args[0][0]
+        assert_in("'size': 4", message)
+        assert_in("'collisions': 1", message)
+        assert_in("'collision_rate'", message)
+
+    def test_ensure_guid_retries_after_collision(self):
+        node = NodeFactory()
+        user = UserFactory()
+        collisions = guid_pool.collisions
+        with mock.patch.object(guid_pool, '_ids', ['fresh', node._id]):
+            new_node = NodeFactory(creator=user)
+        assert_equal(new_node._id, 'fresh')
+        assert_equal(guid_pool.collisions, collisions + 1)
+        assert_equal(models.Guid.load('fresh').referent, new_node)
+        assert_equal(models.Guid.load(node._id).referent, node)
+
+
 class TestResolveGuid(OsfTestCase):
 
     def setUp(self):
@@ -20,6 +20,7 @@ from framework.analytics import get_total_activity_count
 from framework.exceptions import PermissionsError
 from framework.auth import User, Auth
 from framework.auth import cas
+from framework.mongo import dummy_request, ObjectId
 from framework.sessions.model import Session
 from framework.auth import exceptions as auth_exc
 from framework.auth.exceptions import ChangePasswordError, ExpiredTokenError
@@ -1829,6 +1830,101 @@ class TestNodeTraversals(OsfTestCase):
         descendants = list(point1.get_descendants_recursive())
         assert_equal(len(descendants), 1)
 
+    def test_ancestor_ids(self):
+        comp = ProjectFactory(creator=self.user, parent=self.root)
+        subcomp = ProjectFactory(creator=self.user, parent=comp)
+        assert_equal(self.root.ancestor_ids, [])
+        assert_equal(comp.ancestor_ids, [self.root._id])
+        assert_equal(subcomp.ancestor_ids, [self.root._id, comp._id])
+
+    def test_pointers_not_in_ancestor_ids(self):
+        comp = ProjectFactory(creator=self.user, parent=self.root)
+        other = ProjectFactory(creator=self.user)
+        other.add_pointer(comp, auth=self.consolidate_auth)
+        assert_equal(comp.ancestor_ids, [self.root._id])
+        assert_equal(list(other.primary_descendants), [])
+
+    def test_primary_descendants(self):
+        comp = ProjectFactory(creator=self.user, parent=self.root)
+        subcomp = ProjectFactory(creator=self.user, parent=comp)
+        self.root.add_pointer(ProjectFactory(creator=self.user), auth=self.consolidate_auth)
+        assert_equal(
+            {node._id for node in self.root.primary_descendants},
+            {comp._id, subcomp._id},
+        )
+
+    def test_parents_and_root(self):
+        comp = ProjectFactory(creator=self.user, parent=self.root)
+        subcomp = ProjectFactory(creator=self.user, parent=comp)
+        assert_equal(subcomp.parents, [comp, self.root])
+        assert_equal(subcomp.root, self.root)
+        assert_is(self.root.root, self.root)
+
+    def test_parents_stop_at_deleted_ancestor(self):
+        comp = ProjectFactory(creator=self.user, parent=self.root)
+        subcomp = ProjectFactory(creator=self.user, parent=comp)
+        comp.is_deleted = True
+        comp.save()
+        assert_equal(subcomp.parents, [])
+        assert_equal(subcomp.root, subcomp)
+
+    def test_set_ancestry_updates_descendants(self):
+        comp = ProjectFactory(creator=self.user, parent=self.root)
+        subcomp = ProjectFactory(creator=self.user, parent=comp)
+        new_root = ProjectFactory(creator=self.user)
+        comp.set_ancestry(new_root)
+        assert_equal(comp.ancestor_ids, [new_root._id])
+        assert_equal(subcomp.ancestor_ids, [new_root._id, comp._id])
+
+    def test_fork_ancestor_ids(self):
+        comp = ProjectFactory(creator=self.user, parent=self.root)
+        ProjectFactory(creator=self.user, parent=comp)
+        fork = self.root.fork_node(self.consolidate_auth)
+        forked_comp = fork.nodes[0]
+        forked_subcomp = forked_comp.nodes[0]
+        assert_equal(fork.ancestor_ids, [])
+        assert_equal(forked_comp.ancestor_ids, [fork._id])
+        assert_equal(forked_subcomp.ancestor_ids, [fork._id, forked_comp._id])
+
+    def test_fork_pointer_ancestor_ids(self):
+        comp = ProjectFactory(creator=self.user, parent=self.root)
+        other = ProjectFactory(creator=self.user)
+        ProjectFactory(creator=self.user, parent=other)
+        pointer = comp.add_pointer(other, auth=self.consolidate_auth)
+        forked = comp.fork_pointer(pointer, auth=self.consolidate_auth)
+        forked_child = forked.nodes[0]
+        assert_equal(forked.ancestor_ids, [self.root._id, comp._id])
+        assert_equal(forked.parents, [comp, self.root])
+        assert_equal(forked.root, self.root)
+        assert_equal(forked_child.ancestor_ids, [self.root._id, comp._id, forked._id])
+        assert_equal(forked_child.root, self.root)
+
+    def test_fork_component_is_top_level(self):
+        comp = ProjectFactory(creator=self.user, parent=self.root)
+        fork = comp.fork_node(self.consolidate_auth)
+        assert_equal(fork.ancestor_ids, [])
+        assert_is(fork.root, fork)
+
+    def test_registration_ancestor_ids(self):
+        comp = ProjectFactory(creator=self.user, parent=self.root)
+        ProjectFactory(creator=self.user, parent=comp)
+        reg = RegistrationFactory(project=self.root)
+        reg_comp = reg.nodes[0]
+        reg_subcomp = reg_comp.nodes[0]
+        assert_equal(reg.ancestor_ids, [])
+        assert_equal(reg_comp.ancestor_ids, [reg._id])
+        assert_equal(reg_subcomp.ancestor_ids, [reg._id, reg_comp._id])
+
+    def test_template_ancestor_ids(self):
+        comp = ProjectFactory(creator=self.user, parent=self.root)
+        ProjectFactory(creator=self.user, parent=comp)
+        new = self.root.use_as_template(auth=self.consolidate_auth)
+        new_comp = new.nodes[0]
+        new_subcomp = new_comp.nodes[0]
+        assert_equal(new.ancestor_ids, [])
+        assert_equal(new_comp.ancestor_ids, [new._id])
+        assert_equal(new_subcomp.ancestor_ids, [new._id, new_comp._id])
+
 class TestRemoveNode(OsfTestCase):
 
     def setUp(self):
@@ -2396,6 +2492,43 @@ class TestProject(OsfTestCase):
         self.project.set_permissions(self.project.creator, ['read', 'write'])
         assert_false(node.is_admin_parent(self.project.creator))
 
+    def test_is_admin_parent_memoized(self):
+        user = UserFactory()
+        node = NodeFactory(parent=self.project, creator=user)
+        child = NodeFactory(parent=node, creator=user)
+        assert_true(child.is_admin_parent(self.project.creator))
+        with mock.patch.object(Node, 'find') as mock_find:
+            assert_true(child.is_admin_parent(self.project.creator))
+            # Ancestors are resolved along with the node
+            assert_true(node.is_admin_parent(self.project.creator))
+            assert_false(mock_find.called)
+
+    def test_is_admin_parent_after_permissions_change(self):
+        user = UserFactory()
+        node = NodeFactory(parent=self.project, creator=user)
+        assert_true(node.is_admin_parent(self.project.creator))
+        self.project.set_permissions(self.project.creator, ['read', 'write'])
+        assert_false(node.is_admin_parent(self.project.creator))
+
+    def test_is_admin_parent_not_memoized_outside_request(self):
+        user = UserFactory()
+        node = NodeFactory(parent=self.project, creator=user)
+        with mock.patch('website.project.permissions.get_cache_key', return_value=dummy_request):
+            assert_true(node.is_admin_parent(self.project.creator))
+            with mock.patch.object(Node, 'find', wraps=Node.find) as mock_find:
+                assert_true(node.is_admin_parent(self.project.creator))
+                assert_true(mock_find.called)
+
+    def test_can_view_private_link_deleted(self):
+        link = PrivateLinkFactory()
+        link.nodes.append(self.project)
+        link.save()
+        auth = Auth(user=UserFactory(), private_key=link.key)
+        assert_true(self.project.can_view(auth))
+        link.is_deleted = True
+        link.save()
+        assert_false(self.project.can_view(auth))
+
     def test_has_permission_read_parent_admin(self):
         user = UserFactory()
         node = NodeFactory(parent=self.project, creator=user)
@@ -2713,9 +2846,40 @@ class TestProject(OsfTestCase):
 
     def test_date_modified(self):
         self.project.logs.append(NodeLogFactory())
+        self.project.save()
         assert_equal(self.project.date_modified, self.project.logs[-1].date)
         assert_not_equal(self.project.date_modified, self.project.date_created)
 
+    def test_date_modified_set_by_add_log(self):
+        log = self.project.add_log(
+            NodeLog.TAG_ADDED,
+            params={'project': self.project._id, 'tag': 'cats'},
+            auth=self.consolidate_auth,
+            log_date=datetime.datetime(2020, 1, 1),
+            save=False,
+        )
+        assert_equal(self.project.date_modified, log.date)
+
+    def test_date_modified_kept_when_logs_unchanged(self):
+        date_modified = datetime.datetime(2020, 1, 1)
+        self.project.date_modified = date_modified
+        with mock.patch.object(NodeLog, 'load') as mock_load:
+            self.project.save()
+        assert_false(mock_load.called)
+        assert_equal(self.project.date_modified, date_modified)
+
+    def test_sort_by_date_modified(self):
+        newer = ProjectFactory(creator=self.user)
+        self.project.add_log(
+            NodeLog.TAG_ADDED,
+            params={'project': self.project._id, 'tag': 'cats'},
+            auth=self.consolidate_auth,
+        )
+        nodes = Node.find(
+            Q('_id', 'in', [self.project._id, newer._id])
+        ).sort('-date_modified')
+        assert_equal([node._id for node in nodes], [self.project._id, newer._id])
+
     def test_replace_contributor(self):
         contrib = UserFactory()
         self.project.add_contributor(contrib, auth=Auth(self.project.creator))
@@ -2972,9 +3136,11 @@ class TestForkNode(OsfTestCase):
         assert_equal(title_prepend + original.title, fork.title)
         assert_equal(original.category, fork.category)
         assert_equal(original.description, fork.description)
-        assert_equal(original.logs, fork.logs[:-1])
-        assert_true(len(fork.logs) == len(original.logs) + 1)
-        assert_equal(fork.logs[-1].action, NodeLog.NODE_FORKED)
+        assert_equal(original.get_logs(), fork.get_logs()[:-1])
+        assert_equal(fork.log_count, original.log_count + 1)
+        assert_equal(fork.last_log.action, NodeLog.NODE_FORKED)
+        # Logs are shared, not copied
+        assert_equal(len(fork.logs), 1)
         assert_equal(original.tags, fork.tags)
         assert_equal(original.parent_node is None, fork.parent_node is None)
 
@@ -3123,6 +3289,49 @@ class TestForkNode(OsfTestCase):
         assert_equal(len(fork.contributors), 1)
         assert_equal(fork.get_permissions(user2), ['read', 'write', 'admin'])
 
+    def test_fork_shares_log_history(self):
+        fork = self.project.fork_node(self.consolidate_auth)
+        assert_equal(fork.log_source_id, self.project._id)
+        assert_equal(fork.log_cutoff_date, self.project.logs[-1].date)
+        assert_not_in(fork._id, self.project.logs[0].node__logged)
+
+        # Logs added to the original after forking are not inherited
+        self.project.set_title('New title', auth=self.consolidate_auth)
+        assert_not_in(self.project.logs[-1], fork.get_logs())
+        assert_equal(fork.log_count, len(self.project.logs))
+
+    def test_fork_log_history_is_cut_off_by_date(self):
+        fork = self.project.fork_node(self.consolidate_auth)
+        # Added after forking, but with an id that sorts before the cutoff log
+        log = NodeLogFactory(_id=str(ObjectId.from_datetime(datetime.datetime(2000, 1, 1))))
+        self.project.logs.append(log)
+        self.project.save()
+        assert_not_in(log._id, fork.get_log_ids())
+        assert_equal(fork.log_count, len(self.project.logs))
+        assert_equal(fork.get_recent_logs(1), [fork.last_log])
+
+    def test_fork_of_fork_log_history(self):
+        fork = self.project.fork_node(self.consolidate_auth)
+        fork.set_title('Fork title', auth=self.consolidate_auth)
+        self.project.set_title('Project title', auth=self.consolidate_auth)
+        fork_of_fork = fork.fork_node(self.consolidate_auth)
+
+        assert_equal(fork_of_fork.get_logs()[:-1], fork.get_logs())
+        assert_equal(fork_of_fork.get_log_ids(), [log._id for log in fork_of_fork.get_logs()])
+        assert_equal(
+            set(log._id for log in NodeLog.find(fork_of_fork.get_log_query())),
+            set(fork_of_fork.get_log_ids()),
+        )
+
+    def test_fork_aggregate_logs_include_inherited_logs(self):
+        component = NodeFactory(creator=self.user, parent=self.project)
+        fork = self.project.fork_node(self.consolidate_auth)
+        logs = fork.get_aggregate_logs_queryset(self.consolidate_auth)
+        expected = set(fork.get_log_ids()) | set(fork.nodes[0].get_log_ids())
+        assert_equal(set(log._id for log in logs), expected)
+        assert_in(self.project.logs[0]._id, expected)
+        assert_in(component.logs[0]._id, expected)
+
     def test_fork_registration(self):
         self.registration = RegistrationFactory(project=self.project)
         fork = self.registration.fork_node(self.consolidate_auth)
@@ -3221,7 +3430,8 @@ class TestRegisterNode(OsfTestCase):
 
     def test_logs(self):
         # Registered node has all logs except for registration approval initiated
-        assert_equal(self.registration.logs, self.project.logs[:-1])
+        assert_equal(self.registration.get_logs(), list(self.project.logs)[:-1])
+        assert_equal(len(self.registration.logs), 0)
 
     def test_tags(self):
         assert_equal(self.registration.tags, self.project.tags)
@@ -3483,6 +3693,86 @@ class TestPermissions(OsfTestCase):
         assert_false(self.project.has_permission(self.project.creator, 'dance'))
 
 
+class TestNodeCounters(OsfTestCase):
+
+    def setUp(self):
+        super(TestNodeCounters, self).setUp()
+        self.user = UserFactory()
+        self.auth = Auth(user=self.user)
+        self.project = ProjectFactory(creator=self.user)
+        # Store the initial counts, so that they are updated from here on
+        assert_equal(self.project.get_counters(), {'forks': 0, 'templated': 0, 'points': 0})
+
+    def assert_counters(self, **expected):
+        stored = self.project.get_counters()
+        assert_equal(stored, self.project.compute_counters())
+        for counter, count in expected.items():
+            assert_equal(stored[counter], count)
+
+    def test_forks(self):
+        fork = self.project.fork_node(self.auth)
+        self.project.fork_node(self.auth)
+        self.assert_counters(forks=2)
+        fork.remove_node(self.auth)
+        self.assert_counters(forks=1)
+
+    def test_registrations_are_not_forks(self):
+        RegistrationFactory(project=self.project)
+        self.assert_counters(forks=0)
+
+    def test_templated(self):
+        templated = self.project.use_as_template(self.auth)
+        self.assert_counters(templated=1)
+        templated.remove_node(self.auth)
+        self.assert_counters(templated=0)
+
+    def test_points(self):
+        other = ProjectFactory(creator=self.user)
+        pointer = other.add_pointer(self.project, auth=self.auth)
+        self.assert_counters(points=1)
+        other.fork_node(self.auth)
+        self.assert_counters(points=2)
+        other.rm_pointer(pointer, auth=self.auth)
+        other.save()
+        self.assert_counters(points=1)
+
+    def test_fork_pointer(self):
+        other = ProjectFactory(creator=self.user)
+        pointer = other.add_pointer(self.project, auth=self.auth)
+        self.assert_counters(points=1, forks=0)
+        other.fork_pointer(pointer, auth=self.auth)
+        self.assert_counters(points=0, forks=1)
+
+    def test_points_exclude_folders(self):
+        folder = FolderFactory(creator=self.user)
+        folder.add_pointer(self.project, auth=self.auth)
+        self.assert_counters(points=0)
+
+    def test_points_of_deleted_node(self):
+        other = ProjectFactory(creator=self.user)
+        other.add_pointer(self.project, auth=self.auth)
+        other.remove_node(self.auth)
+        self.assert_counters(points=0)
+
+    def test_points_of_deleted_registration(self):
+        other = ProjectFactory(creator=self.user)
+        other.add_pointer(self.project, auth=self.auth)
+        registration = RegistrationFactory(project=other)
+        self.assert_counters(points=2)
+        registration.delete_registration_tree(save=True)
+        self.assert_counters(points=1)
+
+    def test_points_of_restored_node(self):
+        other = ProjectFactory(creator=self.user)
+        other.add_pointer(self.project, auth=self.auth)
+        other.is_deleted = True
+        other.save()
+        self.assert_counters(points=0)
+        other.is_deleted = False
+        other.save()
+        self.assert_counters(points=1)
+
+
 class TestPointer(OsfTestCase):
 
     def setUp(self):
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import mock
 from nose.tools import *  # noqa (PEP8 asserts)
 
 from tests.factories import (
@@ -12,12 +13,12 @@ from tests.factories import (
 )
 from tests.base import OsfTestCase
 
-from framework.auth import Auth
+from framework.auth import Auth, User
 from framework import utils as framework_utils
 from website.project.views.node import _get_summary, _view_project, _serialize_node_search
 from website.views import _render_node
 from website.profile import utils
-from website.views import serialize_log
+from website.views import serialize_log, serialize_logs
 from website.util import permissions
 
 
@@ -173,6 +174,46 @@ class TestNodeLogSerializers(OsfTestCase):
         assert_equal(d['params'], log.params)
         assert_equal(d['node']['title'], log.node.title)
 
+    def test_serialize_logs(self):
+        user = UserFactory()
+        contributor = UserFactory()
+        nodes = [NodeFactory(), NodeFactory()]
+        logs = []
+        for node in nodes * 2:
+            log = NodeLogFactory(
+                user=user,
+                params={'node': node._id, 'contributors': [contributor._id, 'missing']},
+            )
+            node.logs.append(log)
+            node.save()
+            logs.append(log)
+        serialized = list(serialize_logs(logs))
+        assert_equal(serialized, [serialize_log(log) for log in logs])
+        assert_equal(serialized[0]['user']['fullname'], user.fullname)
+        assert_equal(serialized[1]['node']['id'], nodes[1]._id)
+        assert_equal(serialized[0]['contributors'][0]['fullname'], contributor.fullname)
+        assert_is_none(serialized[0]['contributors'][1])
+
+    def test_serialize_logs_in_batches(self):
+        node = NodeFactory()
+        logs = [NodeLogFactory(params={'node': node._id}) for _ in range(3)]
+        serialized = serialize_logs(iter(logs), batch_size=2)
+        with mock.patch('website.views.User.find', wraps=User.find) as mock_find:
+            assert_equal(next(serialized)['id'], logs[0]._id)
+            assert_equal(mock_find.call_count, 1)
+            assert_equal([each['id'] for each in serialized], [log._id for log in logs[1:]])
+            assert_equal(mock_find.call_count, 2)
+
+    def test_serialize_logs_unclaimed_contributor_name(self):
+        node = NodeFactory()
+        unreg = node.add_unregistered_contributor(
+            fullname='Name On Node', email='unclaimed@example.com',
+            auth=Auth(node.creator), save=True,
+        )
+        log = NodeLogFactory(params={'node': node._id, 'contributors': [unreg._id]})
+        d = next(serialize_logs([log]))
+        assert_equal(d['contributors'][0]['fullname'], 'Name On Node')
+
     def test_serialize_node_for_logs(self):
         node = NodeFactory()
         d = node.serialize()
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import os
+import copy
 import mock
 import unittest
 from flask import Flask
@@ -10,7 +11,7 @@ from tests.base import OsfTestCase
 from tests.factories import RegistrationFactory
 
 from framework.routing import Rule, json_renderer
-from framework.utils import secure_filename
+from framework.utils import secure_filename, freeze, FrozenDict, TTLCache
 from website.routes import process_rules, OsfWebRenderer
 from website import settings
 from website.util import paths
@@ -248,6 +249,17 @@ class TestGetMimeTypes(unittest.TestCase):
         assert_equal('text/x-python', mimetype)
 
 
+class TestTTLCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = TTLCache(timeout=60, max_size=3)
+
+    def test_get_returns_copy(self):
+        self.cache.set('abc', {'tags': ['a']})
+        self.cache.get('abc')['tags'].append('b')
+        assert_equal(self.cache.get('abc'), {'tags': ['a']})
+
+
 class TestFrameworkUtils(unittest.TestCase):
 
     def test_leading_underscores(self):
@@ -277,6 +289,27 @@ class TestFrameworkUtils(unittest.TestCase):
             secure_filename(u'i contain cool \xfcml\xe4uts.txt')
         )
 
+    def test_freeze(self):
+        frozen = freeze({'tags': ['a', {'b': 1}], 'title': 'Title'})
+        assert_is_instance(frozen, FrozenDict)
+        assert_equal(frozen['tags'], ('a', {'b': 1}))
+        assert_is_instance(frozen['tags'][1], FrozenDict)
+
+    def test_frozen_dict_cannot_be_changed(self):
+        frozen = FrozenDict({'title': 'Title'})
+        with assert_raises(TypeError):
+            frozen['title'] = 'Changed'
+        with assert_raises(TypeError):
+            frozen.update({'title': 'Changed'})
+        with assert_raises(TypeError):
+            del frozen['title']
+        assert_equal(frozen, {'title': 'Title'})
+
+    def test_frozen_dict_copy_is_self(self):
+        frozen = FrozenDict({'title': 'Title'})
+        assert_is(copy.copy(frozen), frozen)
+        assert_is(copy.deepcopy(frozen), frozen)
+
 
 class TestWebpackFilter(unittest.TestCase):
 
@@ -752,6 +752,67 @@ class TestProjectViews(OsfTestCase):
         assert_equal(res.json['page'], 1)
         assert_equal(res.json['pages'], 2)
 
+    def test_get_logs_by_cursor(self):
+        for _ in range(12):
+            self.project.logs.append(
+                NodeLogFactory(
+                    user=self.user1,
+                    action='file_added',
+                    params={'node': self.project._id}
+                )
+            )
+        self.project.save()
+        log_ids = sorted([log._id for log in self.project.logs], reverse=True)
+        url = self.project.api_url_for('get_logs')
+        res = self.app.get(url, {'before': '', 'count': 5}, auth=self.auth)
+        assert_equal([log['id'] for log in res.json['logs']], log_ids[:5])
+        assert_is_none(res.json['total'])
+        assert_is_none(res.json['after'])
+        assert_equal(res.json['before'], log_ids[4])
+        # Next older page
+        res = self.app.get(url, {'before': res.json['before'], 'count': 5}, auth=self.auth)
+        assert_equal([log['id'] for log in res.json['logs']], log_ids[5:10])
+        assert_equal(res.json['after'], log_ids[5])
+        # Last page: 1 project create log, 1 add contributor log, then 12
+        # generated logs
+        res = self.app.get(url, {'before': res.json['before'], 'count': 5}, auth=self.auth)
+        assert_equal([log['id'] for log in res.json['logs']], log_ids[10:])
+        assert_is_none(res.json['before'])
+        # Back to the newer page
+        res = self.app.get(url, {'after': res.json['after'], 'count': 5}, auth=self.auth)
+        assert_equal([log['id'] for log in res.json['logs']], log_ids[5:10])
+        assert_equal(res.json['after'], log_ids[5])
+        assert_equal(res.json['before'], log_ids[9])
+
+    def test_get_logs_by_cursor_approximate_total(self):
+        url = self.project.api_url_for('get_logs')
+        res = self.app.get(url, {'before': '', 'approximate_total': 1}, auth=self.auth)
+        assert_equal(res.json['total'], len(self.project.logs))
+
+    @mock.patch('website.settings.AGGREGATE_LOG_COUNT_LIMIT', 1)
+    def test_get_logs_by_cursor_approximate_total_is_capped(self):
+        url = self.project.api_url_for('get_logs')
+        res = self.app.get(url, {'before': '', 'approximate_total': 1}, auth=self.auth)
+        assert_equal(res.json['total'], 1)
+
+    @mock.patch('website.project.model.Node.get_descendants_recursive')
+    def test_get_logs_by_cursor_walks_descendants_once(self, mock_descendants):
+        mock_descendants.return_value = []
+        url = self.project.api_url_for('get_logs')
+        self.app.get(url, {'before': '', 'approximate_total': 1}, auth=self.auth)
+        assert_equal(mock_descendants.call_count, 1)
+
+    def test_get_logs_by_cursor_invalid_cursor(self):
+        url = self.project.api_url_for('get_logs')
+        res = self.app.get(
+            url, {'before': 'invalid'}, auth=self.auth, expect_errors=True
+        )
+        assert_equal(res.status_code, 400)
+        assert_equal(
+            res.json['message_long'],
+            'Invalid value for "before".'
+        )
+
     def test_logs_private(self):
         """Add logs to a public project, then to its private component. Get
         the ten most recent logs; assert that ten logs are returned and that
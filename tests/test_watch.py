@@ -12,6 +12,7 @@ from framework.exceptions import HTTPError
 from tests.base import OsfTestCase
 from tests.factories import (UserFactory, ProjectFactory,
                              WatchConfigFactory)
+from framework.auth.core import _merge_into_reversed
 from website.views import paginate
 import math
 
@@ -81,6 +82,43 @@ class TestWatching(OsfTestCase):
         log_ids = list(self.user.get_recent_log_ids(since=since))
         assert_equal(len(log_ids), 2)
 
+    def test_get_recent_log_ids_merges_watched_nodes(self):
+        other = ProjectFactory(creator=self.user)
+        other_log = other.add_log(
+            'tag_added',
+            params={'project': other._primary_key},
+            auth=self.consolidate_auth,
+            save=True,
+        )
+        self._watch_project(self.project)
+        self._watch_project(other)
+        log_ids = list(self.user.get_recent_log_ids())
+        assert_equal(log_ids, sorted(log_ids, reverse=True))
+        assert_equal(log_ids[0], other_log._id)
+        assert_in(self.last_log._id, log_ids)
+        assert_equal(len(log_ids), len(set(log_ids)))
+
+    def test_get_recent_log_ids_shared_history_not_repeated(self):
+        fork = self.project.fork_node(self.consolidate_auth)
+        self._watch_project(self.project)
+        self._watch_project(fork)
+        log_ids = list(self.user.get_recent_log_ids())
+        assert_equal(len(log_ids), len(set(log_ids)))
+        assert_equal(log_ids.count(self.last_log._id), 1)
+        assert_in(fork.logs[-1]._id, log_ids)
+
+    def test_get_recent_log_count(self):
+        fork = self.project.fork_node(self.consolidate_auth)
+        self._watch_project(self.project)
+        self._watch_project(fork)
+        assert_equal(
+            self.user.get_recent_log_count(),
+            len(list(self.user.get_recent_log_ids())),
+        )
+
+    def test_get_recent_log_count_not_watching(self):
+        assert_equal(self.user.get_recent_log_count(), 0)
+
     def test_get_daily_digest_log_ids(self):
         self._watch_project(self.project)
         day_log_ids = list(self.user.get_daily_digest_log_ids())
@@ -127,5 +165,20 @@ class TestWatching(OsfTestCase):
         with assert_raises(HTTPError):
             paginate(self.user.get_recent_log_ids(), total, page, size)
 
+
+class TestMergeIntoReversed(unittest.TestCase):
+
+    def test_merge(self):
+        merged = _merge_into_reversed([9, 4, 1], [8, 4], [], [7, 2])
+        assert_equal(list(merged), [9, 8, 7, 4, 4, 2, 1])
+
+    def test_merge_is_lazy(self):
+        def items():
+            yield 3
+            raise AssertionError('Consumed too far')
+        merged = _merge_into_reversed(items(), [2, 1])
+        assert_equal(next(merged), 3)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -9,6 +9,7 @@ from modularodm import storage
 from werkzeug.contrib.fixers import ProxyFix
 import framework
 from framework.flask import app, add_handlers
+from framework.routing import precompile_templates
 from framework.logging import logger
 from framework.mongo import set_up_storage
 from framework.addons.utils import render_addon_capabilities
@@ -85,6 +86,17 @@ def build_log_templates(settings):
         build_fp.write('\n')
         build_addon_log_templates(build_fp, settings)
 
+def precompile_all_templates(settings):
+    """Compile the core and addon mako templates, so that they are cached
+    before the first request is served.
+    """
+    directories = [settings.TEMPLATES_PATH] + [
+        os.path.join(settings.ADDON_PATH, addon.short_name, 'templates')
+        for addon in settings.ADDONS_AVAILABLE
+    ]
+    count = precompile_templates(directories)
+    logger.debug('Precompiled {0} templates'.format(count))
+
 def do_set_backends(settings):
     logger.debug('Setting storage backends')
     set_up_storage(
@@ -124,6 +136,9 @@ def init_app(settings_module='website.settings', set_backends=True, routes=True,
     if attach_request_handlers:
         attach_handlers(app, settings)
 
+    if settings.PRECOMPILE_TEMPLATES and not app.debug:
+        precompile_all_templates(settings)
+
     if app.debug:
         logger.info("Sentry disabled; Flask's debug mode enabled")
     else:
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""Denormalized relationship counts of nodes, shown on the project overview.
+Counts are stored in a side collection, one document per node, and updated
+atomically when forks, templated copies and pointers are created or deleted,
+so that reading them does not load the related nodes.
+
+A node's counts are computed and stored the first time they are read;
+increments to counts that have not been stored yet are skipped. Run
+scripts/refresh_node_counters.py to correct counts that have drifted.
+"""
+
+from framework.mongo import database
+
+
+FORKS = 'forks'
+TEMPLATED = 'templated'
+POINTS = 'points'
+
+COUNTERS = (FORKS, TEMPLATED, POINTS)
+
+
+def get_collection(db=None):
+    db = db or database  # default to local proxy
+    return db['nodecounters']
+
+
+def increment_node_counter(node_id, counter, amount=1, db=None):
+    get_collection(db).update(
+        {'_id': node_id},
+        {'$inc': {counter: amount}},
+        manipulate=False,
+    )
+
+
+def get_node_counters(node_id, db=None):
+    """Return a dictionary of the stored counts of a node, or ``None`` if they
+    have not been stored.
+    """
+    result = get_collection(db).find_one({'_id': node_id})
+    if result is None:
+        return None
+    return {counter: max(result.get(counter, 0), 0) for counter in COUNTERS}
+
+
+def set_node_counters(node_id, counts, db=None):
+    get_collection(db).update(
+        {'_id': node_id},
+        {'$set': counts},
+        upsert=True,
+        manipulate=False,
+    )
@@ -10,6 +10,7 @@ from collections import OrderedDict
 import warnings
 
 import pytz
+import pymongo
 from flask import request
 from django.core.urlresolvers import reverse
 
@@ -51,8 +52,10 @@ from website.citations.utils import datetime_to_csl
 from website.identifiers.model import IdentifierMixin
 from website.util.permissions import expand_permissions
 from website.util.permissions import CREATOR_PERMISSIONS, DEFAULT_CONTRIBUTOR_PERMISSIONS, ADMIN
+from website.project.permissions import get_permission_resolver, clear_permission_resolver
 from website.project.metadata.schemas import OSF_META_SCHEMAS
 from website.project import signals as project_signals
+from website.project import counters
 
 logger = logging.getLogger(__name__)
 
@@ -264,6 +267,16 @@ class Comment(GuidStoredObject):
 @unique_on(['params.node', '_id'])
 class NodeLog(StoredObject):
 
+    __indices__ = [
+        {
+            # Logs of a node newest first, e.g. for activity feeds
+            'key_or_list': [
+                ('__backrefs.logged.node.logs', pymongo.ASCENDING),
+                ('_id', pymongo.DESCENDING),
+            ],
+        },
+    ]
+
     _id = fields.StringField(primary=True, default=lambda: str(ObjectId()))
 
     date = fields.DateTimeField(default=datetime.datetime.utcnow, index=True)
@@ -404,12 +417,24 @@ class NodeLog(StoredObject):
             return node_to_check.can_view(auth)
         return False
 
+    @property
+    def user_id(self):
+        """Primary key of `user`, read without loading the user."""
+        return self._fields['user']._get_underlying_data(self)
+
     def _render_log_contributor(self, contributor, anonymous=False):
         user = User.load(contributor)
         if not user:
             return None
-        if self.node:
-            fullname = user.display_full_name(node=self.node)
+        return self.render_contributor(user, self.node, anonymous=anonymous)
+
+    @staticmethod
+    def render_contributor(user, node=None, anonymous=False):
+        """Render a contributor named in a log's params, as displayed on
+        `node`.
+        """
+        if node:
+            fullname = user.display_full_name(node=node)
         else:
             fullname = user.fullname
         return {
@@ -528,6 +553,15 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
     #: Whether this is a pointer or not
     primary = True
 
+    __indices__ = [
+        {
+            # Exact-match membership queries, e.g. Q('contributors', 'eq', user._id)
+            'key_or_list': [
+                ('contributors', pymongo.ASCENDING),
+            ],
+        },
+    ]
+
     # Node fields that trigger an update to Solr on save
     SOLR_UPDATE_FIELDS = {
         'title',
@@ -570,6 +604,9 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
     _id = fields.StringField(primary=True)
 
     date_created = fields.DateTimeField(auto_now_add=datetime.datetime.utcnow, index=True)
+    # Date of the most recent log, or of creation if there are no logs; set
+    # by `add_log` and `save`
+    date_modified = fields.DateTimeField(index=True)
 
     # Privacy
     is_public = fields.BooleanField(default=False, index=True)
@@ -624,12 +661,20 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
     users_watching_node = fields.ForeignField('user', list=True, backref='watched')
 
     logs = fields.ForeignField('nodelog', list=True, backref='logged')
+    # Forks and registrations share the log history of the node they were
+    # created from instead of copying it: their history is that node's history
+    # up to and including the log dated `log_cutoff_date`, followed by `logs`
+    log_source_id = fields.StringField()
+    log_cutoff_date = fields.DateTimeField()
     tags = fields.ForeignField('tag', list=True, backref='tagged')
 
     # Tags for internal use
     system_tags = fields.StringField(list=True)
 
     nodes = fields.AbstractForeignField(list=True, backref='parent')
+    # Ids of the primary ancestors of this node, from the root down to its
+    # parent; kept current by `set_ancestry`
+    ancestor_ids = fields.StringField(list=True, index=True)
     forked_from = fields.ForeignField('node', backref='forked', index=True)
     registered_from = fields.ForeignField('node', backref='registrations', index=True)
 
@@ -806,9 +851,9 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
     def is_admin_parent(self, user):
         if self.has_permission(user, 'admin', check_parent=False):
             return True
-        if self.parent_node:
-            return self.parent_node.is_admin_parent(user)
-        return False
+        if user is None:
+            return False
+        return get_permission_resolver().has_admin_ancestor(self, user)
 
     def can_view(self, auth):
         if not auth and not self.is_public:
@@ -817,7 +862,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         return (
             self.is_public or
             (auth.user and self.has_permission(auth.user, 'read')) or
-            auth.private_key in self.private_link_keys_active or
+            auth.private_key in get_permission_resolver().private_link_keys(self) or
             self.is_admin_parent(auth.user)
         )
 
@@ -875,6 +920,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
             if permission in self.permissions[user._id]:
                 raise ValueError('User already has permission {0}'.format(permission))
             self.permissions[user._id].append(permission)
+        clear_permission_resolver()
         if save:
             self.save()
 
@@ -890,6 +936,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
             self.permissions[user._id].remove(permission)
         except (KeyError, ValueError):
             raise ValueError('User does not have permission {0}'.format(permission))
+        clear_permission_resolver()
         if save:
             self.save()
 
@@ -908,11 +955,13 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
                     user._id, self._id,
                 )
             )
+        clear_permission_resolver()
         if save:
             self.save()
 
     def set_permissions(self, user, permissions, save=False):
         self.permissions[user._id] = permissions
+        clear_permission_resolver()
         if save:
             self.save()
 
@@ -987,9 +1036,22 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
 
     @property
     def parents(self):
-        if self.parent_node:
-            return [self.parent_node] + self.parent_node.parents
-        return []
+        """Ancestors of this node, nearest first, up to the first deleted
+        ancestor. Loaded with a single query on `ancestor_ids`.
+        """
+        if not self.ancestor_ids:
+            return []
+        ancestors = {
+            node._id: node
+            for node in Node.find(Q('_id', 'in', list(self.ancestor_ids)))
+        }
+        parents = []
+        for ancestor_id in reversed(self.ancestor_ids):
+            ancestor = ancestors.get(ancestor_id)
+            if ancestor is None or ancestor.is_deleted:
+                break
+            parents.append(ancestor)
+        return parents
 
     @property
     def admin_contributor_ids(self, contributors=None):
@@ -1114,12 +1176,31 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
                      auth=auth)
         return updated
 
+    def _logs_changed(self):
+        """Whether `logs` differs from the stored log list."""
+        if not self._is_loaded:
+            return True
+        cached_data = self._get_cached_data(self._stored_key)
+        return cached_data is None or cached_data.get('logs') != self.logs._to_primary_keys()
+
     def save(self, *args, **kwargs):
         update_piwik = kwargs.pop('update_piwik', True)
         self.adjust_permissions()
+        # Permissions, deletion or ancestry may have changed
+        clear_permission_resolver()
+
+        # `add_log` keeps date_modified current; also keep it current if logs
+        # were changed directly
+        if self.logs and self._logs_changed():
+            self.date_modified = self.logs[-1].date
+        elif self.date_modified is None:
+            self.date_modified = self.date_created or datetime.datetime.utcnow()
 
         first_save = not self._is_loaded
 
+        if first_save and getattr(self, 'parent', None):
+            self.ancestor_ids = list(self.parent.ancestor_ids) + [self.parent._id]
+
         if first_save and self.is_dashboard:
             existing_dashboards = self.creator.node__contributed.find(
                 Q('is_dashboard', 'eq', True)
@@ -1136,6 +1217,11 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
 
         saved_fields = super(Node, self).save(*args, **kwargs)
 
+        # Keep the counts of related nodes current however the node was
+        # deleted (or restored)
+        if not first_save and 'is_deleted' in saved_fields:
+            self.update_related_counters(-1 if self.is_deleted else 1)
+
         if first_save and is_original and not suppress_log:
             # TODO: This logic also exists in self.use_as_template()
             for addon in settings.ADDONS_AVAILABLE:
@@ -1230,6 +1316,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         new.is_fork = False
         new.is_registration = False
         new.piwik_site_id = None
+        new.ancestor_ids = []
 
         # If that title hasn't been changed, apply the default prefix (once)
         if (new.title == self.title
@@ -1275,6 +1362,9 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         ]
 
         new.save()
+        for child in new.nodes_primary:
+            child.set_ancestry(new)
+        new.update_related_counters(1)
         return new
 
     ############
@@ -1313,6 +1403,8 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         pointer = Pointer(node=node)
         pointer.save()
         self.nodes.append(pointer)
+        if not self.is_folder and not self.is_deleted:
+            counters.increment_node_counter(node._id, counters.POINTS)
 
         # Add log
         self.add_log(
@@ -1349,6 +1441,8 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         # Remove `Pointer` object; will also remove self from `nodes` list of
         # parent node
         Pointer.remove_one(pointer)
+        if not self.is_folder and not self.is_deleted:
+            counters.increment_node_counter(pointer.node._id, counters.POINTS, -1)
 
         # Add log
         self.add_log(
@@ -1393,37 +1487,195 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
     def depth(self):
         return len(self.parents)
 
+    @property
+    def primary_descendants(self):
+        """Query for the primary descendants of this node at any depth,
+        including deleted nodes.
+        """
+        return Node.find(Q('ancestor_ids', 'eq', self._id))
+
+    def set_ancestry(self, parent=None):
+        """Set and save `ancestor_ids` for this node as a primary child of
+        ``parent``, or as a top-level node if ``parent`` is ``None``, and
+        update the ancestry of its primary descendants to match.
+        """
+        ancestor_ids = list(parent.ancestor_ids) + [parent._id] if parent else []
+        if ancestor_ids == list(self.ancestor_ids):
+            return
+        self.ancestor_ids = ancestor_ids
+        self.save()
+        path = ancestor_ids + [self._id]
+        for descendant in self.primary_descendants:
+            index = descendant.ancestor_ids.index(self._id)
+            descendant.ancestor_ids = path + list(descendant.ancestor_ids[index + 1:])
+            descendant.save()
+
     def next_descendants(self, auth, condition=lambda auth, node: True):
         """
         Recursively find the first set of descedants under a given node that meet a given condition
 
         returns a list of [(node, [children]), ...]
         """
+        # Load the whole subtree at once; the recursion below then finds
+        # each primary node in the object cache
+        list(self.primary_descendants)
+        return self._next_descendants(auth, condition)
+
+    def _next_descendants(self, auth, condition):
         ret = []
         for node in self.nodes:
             if condition(auth, node):
                 # base case
                 ret.append((node, []))
             else:
-                ret.append((node, node.next_descendants(auth, condition)))
+                ret.append((node, node._next_descendants(auth, condition)))
         ret = [item for item in ret if item[1] or condition(auth, item[0])]  # prune empty branches
         return ret
 
     def get_descendants_recursive(self, include=lambda n: True):
+        # Load the whole subtree at once; the recursion below then finds
+        # each primary node in the object cache
+        list(self.primary_descendants)
+        return self._get_descendants_recursive(include)
+
+    def _get_descendants_recursive(self, include):
         for node in self.nodes:
             if include(node):
                 yield node
             if node.primary:
-                for descendant in node.get_descendants_recursive(include):
+                for descendant in node._get_descendants_recursive(include):
                     if include(descendant):
                         yield descendant
 
+    def _get_aggregate_log_nodes(self, auth):
+        # Remembered for the request, so that building the log query and
+        # counting its logs walk the descendants only once
+        node_ids = get_permission_resolver().viewable_descendant_ids(self, auth)
+        return [self] + [Node.load(node_id) for node_id in node_ids]
+
+    def get_aggregate_logs_query(self, auth):
+        """Return a query for the logs of this node and of its descendants
+        that `auth` can view.
+        """
+        nodes = self._get_aggregate_log_nodes(auth)
+        query = Q('__backrefs.logged.node.logs', 'in', [node._id for node in nodes])
+        for node in nodes:
+            for inherited_query in node._get_inherited_log_queries():
+                query = query | inherited_query
+        return query
+
     def get_aggregate_logs_queryset(self, auth):
-        ids = [self._id] + [n._id
-                            for n in self.get_descendants_recursive()
-                            if n.can_view(auth)]
-        query = Q('__backrefs.logged.node.logs', 'in', ids)
-        return NodeLog.find(query).sort('-_id')
+        return NodeLog.find(self.get_aggregate_logs_query(auth)).sort('-_id')
+
+    def get_aggregate_log_count_estimate(self, auth):
+        """Count the logs in `get_aggregate_logs_queryset` on the database
+        server, stopping at `settings.AGGREGATE_LOG_COUNT_LIMIT` logs so that
+        long histories do not make the count slow.
+        """
+        return NodeLog.find(
+            self.get_aggregate_logs_query(auth)
+        ).limit(settings.AGGREGATE_LOG_COUNT_LIMIT).count()
+
+    def _get_log_sources(self):
+        """Yield ``(node, cutoff)`` for each node whose logs are part of the
+        log history of this node, starting with this node. Only the logs of
+        `node` dated up to and including `cutoff` are part of the history;
+        `cutoff` is ``None`` if all of them are.
+        """
+        node, cutoff = self, None
+        while node is not None:
+            yield node, cutoff
+            if node.log_source_id is None:
+                break
+            if cutoff is None or node.log_cutoff_date < cutoff:
+                cutoff = node.log_cutoff_date
+            node = Node.load(node.log_source_id)
+
+    def _get_inherited_log_queries(self):
+        return [
+            Q('__backrefs.logged.node.logs', 'eq', node._id) & Q('date', 'lte', cutoff)
+            for node, cutoff in self._get_log_sources()
+            if cutoff is not None
+        ]
+
+    def get_log_query(self):
+        """Return a query for the logs in the history of this node, including
+        logs inherited from the node it was forked or registered from.
+        """
+        query = Q('__backrefs.logged.node.logs', 'eq', self._id)
+        for inherited_query in self._get_inherited_log_queries():
+            query = query | inherited_query
+        return query
+
+    def _find_logs(self, newest_first=False, limit=None):
+        """Query the logs in the history of this node in order of date, with
+        ties broken by id. Only used for shared histories; other nodes read
+        `logs` directly.
+        """
+        if newest_first:
+            logs = NodeLog.find(self.get_log_query()).sort('-date', '-_id')
+        else:
+            logs = NodeLog.find(self.get_log_query()).sort('date', '_id')
+        if limit is not None:
+            logs = logs.limit(limit)
+        return logs
+
+    def get_log_ids(self):
+        """Return the ids of the logs in the history of this node, oldest first."""
+        if self.log_source_id is None:
+            return self.logs._to_primary_keys()
+        return [log._id for log in self._find_logs()]
+
+    def iter_log_ids(self, since_id=None):
+        """Return a lazy iterator over the ids of the logs in the history of
+        this node, newest first. Ids are read from the log index in batches,
+        so only as many logs are fetched as are consumed.
+
+        :param since_id: If given, only yield ids greater than ``since_id``.
+        """
+        collection = NodeLog._storage[0].store
+        since_date = None
+        if since_id is not None:
+            since_date = ObjectId(since_id).generation_time.replace(tzinfo=None)
+        cursors = []
+        for node, cutoff in self._get_log_sources():
+            if cutoff is not None and since_date is not None and cutoff < since_date:
+                break
+            spec = {'__backrefs.logged.node.logs': node._id}
+            if since_id is not None:
+                spec['_id'] = {'$gt': since_id}
+            if cutoff is not None:
+                spec['date'] = {'$lte': cutoff}
+            cursors.append(
+                collection.find(spec, {'_id': True})
+                .sort('_id', pymongo.DESCENDING)
+                .batch_size(settings.LOG_FEED_BATCH_SIZE)
+            )
+        # Each source's logs are older than those of the sources before it
+        return (record['_id'] for record in itertools.chain(*cursors))
+
+    def get_logs(self):
+        """Return the logs in the history of this node, oldest first."""
+        if self.log_source_id is None:
+            return list(self.logs)
+        return list(self._find_logs())
+
+    @property
+    def log_count(self):
+        if self.log_source_id is None:
+            return len(self.logs)
+        return NodeLog.find(self.get_log_query()).count()
+
+    @property
+    def last_log(self):
+        """The most recent log in the history of this node, or ``None``."""
+        if self.logs:
+            return self.logs[-1]
+        if self.log_source_id is not None:
+            logs = list(self._find_logs(newest_first=True, limit=1))
+            if logs:
+                return logs[0]
+        return None
 
     @property
     def nodes_pointer(self):
@@ -1504,6 +1756,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
             raise ValueError('Could not fork node')
 
         self.nodes[index] = forked
+        forked.set_ancestry(self)
 
         # Add log
         self.add_log(
@@ -1529,6 +1782,8 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
             # removing pointer, else remove will fail when trying to remove
             # backref from self to pointer.
             Pointer.remove_one(pointer)
+            if not self.is_folder and not self.is_deleted:
+                counters.increment_node_counter(node._id, counters.POINTS, -1)
 
         # Return forked content
         return forked
@@ -1539,17 +1794,9 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
 
         :param int n: Number of logs to retrieve
         """
-        return list(reversed(self.logs)[:n])
-
-    @property
-    def date_modified(self):
-        '''The most recent datetime when this node was modified, based on
-        the logs.
-        '''
-        try:
-            return self.logs[-1].date
-        except IndexError:
-            return self.date_created
+        if self.log_source_id is None:
+            return list(reversed(self.logs[-n:])) if n else []
+        return list(self._find_logs(newest_first=True, limit=n))
 
     def set_title(self, title, auth, save=False):
         """Set the title of this Node and log it.
@@ -1692,6 +1939,19 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
 
         return True
 
+    def set_log_source(self, node):
+        """Make the current log history of `node` the start of the log
+        history of this node. The logs are shared, not copied, so this takes
+        constant time however many logs `node` has.
+        """
+        if node.logs:
+            self.log_source_id = node._id
+            self.log_cutoff_date = node.logs[-1].date
+        else:
+            # `node` has no logs of its own; share the history it inherits
+            self.log_source_id = node.log_source_id
+            self.log_cutoff_date = node.log_cutoff_date
+
     def fork_node(self, auth, title='Fork of '):
         """Recursively fork a node.
 
@@ -1718,8 +1978,10 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         # the cloned node must pass itself to its wiki objects to build the
         # correct URLs to that content.
         forked = original.clone()
+        forked.ancestor_ids = []
 
-        forked.logs = self.logs
+        forked.logs = []
+        forked.set_log_source(original)
         forked.tags = self.tags
 
         # Recursively fork child nodes
@@ -1768,6 +2030,10 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         )
 
         forked.save()
+        for child in forked.nodes_primary:
+            child.set_ancestry(forked)
+        forked.update_related_counters(1)
+
         # After fork callback
         for addon in original.get_addons():
             _, message = addon.after_fork(original, forked, user)
@@ -1810,6 +2076,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
             raise NodeStateError('Cannot register deleted node.')
 
         registered = original.clone()
+        registered.ancestor_ids = []
 
         registered.is_registration = True
         registered.registered_date = when
@@ -1823,7 +2090,8 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         registered.contributors = self.contributors
         registered.forked_from = self.forked_from
         registered.creator = self.creator
-        registered.logs = self.logs
+        registered.logs = []
+        registered.set_log_source(original)
         registered.tags = self.tags
         registered.piwik_site_id = None
 
@@ -1847,6 +2115,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
                     registered.nodes.append(child_registration)
 
         registered.save()
+        registered.update_related_counters(1)
 
         if settings.ENABLE_ARCHIVER:
             project_signals.after_create_registration.send(self, dst=registered, user=auth.user)
@@ -1902,6 +2171,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
             log.date = log_date
         log.save()
         self.logs.append(log)
+        self.date_modified = log.date
         if save:
             self.save()
         if user:
@@ -1977,8 +2247,9 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         if doi:
             csl['DOI'] = doi
 
-        if self.logs:
-            csl['issued'] = datetime_to_csl(self.logs[-1].date)
+        last_log = self.last_log
+        if last_log:
+            csl['issued'] = datetime_to_csl(last_log.date)
 
         return csl
 
@@ -2008,6 +2279,47 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
             if not x.is_deleted
         ]
 
+    def compute_counters(self):
+        """Count the forks, templated copies and incoming pointers of this
+        node from the database. See `website.project.counters`.
+        """
+        return {
+            counters.FORKS: Node.find(
+                Q('forked_from', 'eq', self._id) &
+                Q('is_deleted', 'eq', False) &
+                Q('is_registration', 'ne', True)
+            ).count(),
+            counters.TEMPLATED: Node.find(
+                Q('template_node', 'eq', self._id) &
+                Q('is_deleted', 'ne', True)
+            ).count(),
+            counters.POINTS: len(self.get_points(deleted=False, folders=False, resolve=False)),
+        }
+
+    def get_counters(self):
+        """Return the stored counts of forks, templated copies and incoming
+        pointers of this node, computing and storing them if necessary.
+        """
+        node_counters = counters.get_node_counters(self._id)
+        if node_counters is None:
+            node_counters = self.compute_counters()
+            counters.set_node_counters(self._id, node_counters)
+        return node_counters
+
+    def update_related_counters(self, amount):
+        """Add `amount` to the counts of the nodes that this node counts
+        towards: the node it is a fork of, the node it was templated from
+        and the nodes its pointers point to. Called when this node is
+        created (1), and from `save` when it is deleted (-1) or restored (1).
+        """
+        if self.is_fork and not self.is_registration and self.forked_from:
+            counters.increment_node_counter(self.forked_from._id, counters.FORKS, amount)
+        if self.template_node:
+            counters.increment_node_counter(self.template_node._id, counters.TEMPLATED, amount)
+        if not self.is_folder:
+            for pointer in self.nodes_pointer:
+                counters.increment_node_counter(pointer.node._id, counters.POINTS, amount)
+
     @property
     def parent_node(self):
         """The parent node, if it exists, otherwise ``None``. Note: this
@@ -2026,13 +2338,12 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
     def parent_node(self, parent):
         parent.nodes.append(self)
         parent.save()
+        self.set_ancestry(parent)
 
     @property
     def root(self):
-        if self.parent_node:
-            return self.parent_node.root
-        else:
-            return self
+        parents = self.parents
+        return parents[-1] if parents else self
 
     @property
     def archiving(self):
@@ -2936,6 +3247,10 @@ class PrivateLink(StoredObject):
     nodes = fields.ForeignField('node', list=True, backref='shared')
     creator = fields.ForeignField('user', backref='created')
 
+    def save(self, *args, **kwargs):
+        clear_permission_resolver()
+        return super(PrivateLink, self).save(*args, **kwargs)
+
     @property
     def node_ids(self):
         node_ids = [node._id for node in self.nodes]
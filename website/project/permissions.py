@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Request-scoped memoization of node permission checks. Views often check
+the same users against the same nodes and their ancestors many times in one
+request; the resolver for the request answers repeated checks from memory.
+
+Only state that is expensive to compute is memoized: whether a user inherits
+read access from an admin ancestor, the active private link keys of a node,
+and which descendants of a node a user can view. A user's own permissions on a node are always read from the node.
+Memoized state is discarded whenever permissions, private links or nodes
+are changed through their model methods.
+"""
+
+import weakref
+
+from framework.mongo import get_cache_key, dummy_request
+
+from website.util.permissions import ADMIN
+
+
+_resolvers = weakref.WeakKeyDictionary()
+
+
+class PermissionResolver(object):
+
+    def __init__(self):
+        # (node id, user id) => whether user is admin on any ancestor of node
+        self._admin_ancestors = {}
+        # node id => active private link keys
+        self._link_keys = {}
+        # (node id, user id, private link key) => ids of viewable descendants
+        self._viewable_descendants = {}
+
+    def has_admin_ancestor(self, node, user):
+        """Whether ``user`` is an admin on any (non-deleted) ancestor of
+        ``node``. Answers for every ancestor of ``node`` are memoized at the
+        same time.
+        """
+        key = (node._id, user._id)
+        if key not in self._admin_ancestors:
+            found = False
+            for each in list(reversed(node.parents)) + [node]:
+                self._admin_ancestors[(each._id, user._id)] = found
+                found = found or ADMIN in each.permissions.get(user._id, [])
+        return self._admin_ancestors[key]
+
+    def private_link_keys(self, node):
+        if node._id not in self._link_keys:
+            self._link_keys[node._id] = set(node.private_link_keys_active)
+        return self._link_keys[node._id]
+
+    def viewable_descendant_ids(self, node, auth):
+        """Ids of the descendants of ``node`` that ``auth`` can view."""
+        key = (node._id, auth.user._id if auth.user else None, auth.private_key)
+        if key not in self._viewable_descendants:
+            self._viewable_descendants[key] = [
+                each._id for each in node.get_descendants_recursive()
+                if each.can_view(auth)
+            ]
+        return self._viewable_descendants[key]
+
+
+def get_permission_resolver():
+    """Return the permission resolver for the current Flask or Django request.
+    Outside of a request, return a new resolver, so that nothing is memoized
+    between calls.
+    """
+    key = get_cache_key()
+    if key is dummy_request:
+        return PermissionResolver()
+    resolver = _resolvers.get(key)
+    if resolver is None:
+        resolver = _resolvers[key] = PermissionResolver()
+    return resolver
+
+
+def clear_permission_resolver():
+    """Discard the memoized permissions of the current request."""
+    key = get_cache_key()
+    if key is not dummy_request:
+        _resolvers.pop(key, None)
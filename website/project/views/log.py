@@ -3,14 +3,16 @@ import httplib as http
 import logging
 import math
 
+import bson
 from flask import request
+from modularodm import Q
 
 from framework.exceptions import HTTPError
 from framework.auth.decorators import collect_auth
 from framework.transactions.handlers import no_auto_transaction
 
 
-from website.views import serialize_log, validate_page_num
+from website.views import serialize_log, serialize_logs, validate_page_num
 from website.project.model import NodeLog
 from website.project.model import has_anonymous_link
 from website.project.decorators import must_be_valid_project
@@ -48,20 +50,73 @@ def _get_logs(node, count, auth, page=0):
 
     start = page * count
     stop = start + count
-    logs = [
-        serialize_log(log, auth=auth, anonymous=has_anonymous_link(node, auth))
-        for log in logs_set[start:stop]
-    ]
+    logs = list(serialize_logs(
+        logs_set[start:stop], auth=auth, anonymous=has_anonymous_link(node, auth)
+    ))
 
     return logs, total, pages
 
+
+def _get_logs_by_cursor(node, count, auth, before=None, after=None, approximate_total=False):
+    """Return a page of up to `count` logs, newest first, that are older than
+    the log with id `before` or newer than the log with id `after`. If neither
+    is given, return the newest logs. Pages are selected with indexed ``_id``
+    ranges, so deep pages cost no more than the first one.
+
+    :return list: List of serialized logs,
+            int: approximate number of logs, or ``None`` unless
+                `approximate_total`,
+            str: cursor for the next older page, or ``None`` if there is none,
+            str: cursor for the next newer page, or ``None`` if there is none
+
+    """
+    query = node.get_aggregate_logs_query(auth)
+    if after is not None:
+        logs_set = NodeLog.find(query & Q('_id', 'gt', after)).sort('_id')
+    elif before is not None:
+        logs_set = NodeLog.find(query & Q('_id', 'lt', before)).sort('-_id')
+    else:
+        logs_set = NodeLog.find(query).sort('-_id')
+    # Fetch one extra log to tell whether there are more in this direction
+    page = list(logs_set[:count + 1])
+    has_more = len(page) > count
+    page = page[:count]
+    if after is not None:
+        page.reverse()
+
+    logs = list(serialize_logs(page, auth=auth, anonymous=has_anonymous_link(node, auth)))
+
+    if after is not None:
+        newer = page[0]._id if has_more else None
+        older = page[-1]._id if page else after
+    else:
+        older = page[-1]._id if has_more else None
+        newer = page[0]._id if page and before is not None else before
+
+    total = node.get_aggregate_log_count_estimate(auth) if approximate_total else None
+    return logs, total, older, newer
+
+
+def _get_log_cursor(name):
+    cursor = request.args.get(name) or None
+    if cursor is not None and not bson.ObjectId.is_valid(cursor):
+        raise HTTPError(http.BAD_REQUEST, data=dict(
+            message_long='Invalid value for "{0}".'.format(name)
+        ))
+    return cursor
+
+
 @no_auto_transaction
 @collect_auth
 @must_be_valid_project(retractions_valid=True)
 def get_logs(auth, node, **kwargs):
+    """Return a page of the logs of a node and its components. Pages are
+    numbered by ``page``, unless a ``before`` or ``after`` log id is given (an
+    empty ``before`` starts at the newest log); such pages also include the
+    cursors of the adjacent pages, and a ``total`` only if ``approximate_total``
+    is given.
     """
-
-    """
+    use_cursor = 'before' in request.args or 'after' in request.args
     try:
         page = int(request.args.get('page', 0))
     except ValueError:
@@ -83,5 +138,14 @@ def get_logs(auth, node, **kwargs):
 
     # Serialize up to `count` logs in reverse chronological order; skip
     # logs that the current user / API key cannot access
+    if use_cursor:
+        logs, total, before, after = _get_logs_by_cursor(
+            node, count, auth,
+            before=_get_log_cursor('before'),
+            after=_get_log_cursor('after'),
+            approximate_total='approximate_total' in request.args,
+        )
+        return {'logs': logs, 'total': total, 'before': before, 'after': after}
+
     logs, total, pages = _get_logs(node, count, auth, page)
     return {'logs': logs, 'total': total, 'pages': pages, 'page': page}
@@ -34,11 +34,12 @@ from website.util.permissions import ADMIN, READ, WRITE
 from website.util.rubeus import collect_addon_js
 from website.project.model import has_anonymous_link, get_pointer_parent, NodeUpdateError
 from website.project.forms import NewNodeForm
-from website.models import Node, Pointer, WatchConfig, PrivateLink
+from website.models import Node, NodeLog, Pointer, WatchConfig, PrivateLink
 from website import settings
 from website.views import _render_nodes, find_dashboard, validate_page_num
 from website.profile import utils
 from website.project import new_folder
+from website.project import counters
 from website.util.sanitize import strip_html
 
 logger = logging.getLogger(__name__)
@@ -704,6 +705,7 @@ def _view_project(node, auth, primary=False):
     anonymous = has_anonymous_link(node, auth)
     widgets, configs, js, css = _render_addon(node)
     redirect_url = node.url + '?view_only=None'
+    node_counters = node.get_counters()
 
     # Before page load callback; skip if not primary call
     if primary:
@@ -729,7 +731,7 @@ def _view_project(node, auth, primary=False):
             'is_public': node.is_public,
             'is_archiving': node.archiving,
             'date_created': iso8601format(node.date_created),
-            'date_modified': iso8601format(node.logs[-1].date) if node.logs else '',
+            'date_modified': iso8601format(node.last_log.date) if node.last_log else '',
             'tags': [tag._primary_key for tag in node.tags],
             'children': bool(node.nodes_active),
             'is_registration': node.is_registration,
@@ -754,13 +756,13 @@ def _view_project(node, auth, primary=False):
             'forked_from_id': node.forked_from._primary_key if node.is_fork else '',
             'forked_from_display_absolute_url': node.forked_from.display_absolute_url if node.is_fork else '',
             'forked_date': iso8601format(node.forked_date) if node.is_fork else '',
-            'fork_count': len(node.forks),
-            'templated_count': len(node.templated_list),
+            'fork_count': node_counters[counters.FORKS],
+            'templated_count': node_counters[counters.TEMPLATED],
             'watched_count': len(node.watchconfig__watched),
             'private_links': [x.to_json() for x in node.private_links_active],
             'link': view_only_link,
             'anonymous': anonymous,
-            'points': len(node.get_points(deleted=False, folders=False)),
+            'points': node_counters[counters.POINTS],
             'piwik_site_id': node.piwik_site_id,
             'comment_level': node.comment_level,
             'has_comments': bool(getattr(node, 'commented', [])),
@@ -870,15 +872,15 @@ def get_editable_children(auth, node, **kwargs):
 def _get_user_activity(node, auth, rescale_ratio):
 
     # Counters
-    total_count = len(node.logs)
+    total_count = node.log_count
 
     # Note: It's typically much faster to find logs of a given node
-    # attached to a given user using node.logs.find(...) than by
-    # loading the logs into Python and checking each one. However,
-    # using deep caching might be even faster down the road.
+    # attached to a given user with a query than by loading the logs
+    # into Python and checking each one. However, using deep caching
+    # might be even faster down the road.
 
     if auth.user:
-        ua_count = node.logs.find(Q('user', 'eq', auth.user)).count()
+        ua_count = NodeLog.find(node.get_log_query() & Q('user', 'eq', auth.user)).count()
     else:
         ua_count = 0
 
@@ -899,7 +901,7 @@ def _get_user_activity(node, auth, rescale_ratio):
 
 @must_be_valid_project
 def get_recent_logs(node, **kwargs):
-    logs = list(reversed(node.logs._to_primary_keys()))[:3]
+    logs = [log._id for log in node.get_recent_logs(3)]
     return {'logs': logs}
 
 
@@ -951,7 +953,7 @@ def _get_summary(node, auth, rescale_ratio, primary=True, link_id=None, show_pat
         if rescale_ratio:
             ua_count, ua, non_ua = _get_user_activity(node, auth, rescale_ratio)
             summary.update({
-                'nlogs': len(node.logs),
+                'nlogs': node.log_count,
                 'ua_count': ua_count,
                 'ua': ua,
                 'non_ua': non_ua,
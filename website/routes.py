@@ -16,6 +16,7 @@ from framework.exceptions import HTTPError
 from framework.auth import get_display_name
 from framework.routing import xml_renderer
 from framework.routing import json_renderer
+from framework.routing import streaming_json_renderer
 from framework.routing import process_rules
 from framework.auth import views as auth_views
 from framework.routing import render_mako_string
@@ -1349,7 +1350,7 @@ def make_url_map(app):
 
         Rule([
             '/watched/logs/'
-        ], 'get', website_views.watched_logs_get, json_renderer),
+        ], 'get', website_views.watched_logs_get, streaming_json_renderer),
 
         ### Accounts ###
         Rule([
@@ -1375,7 +1376,7 @@ def make_url_map(app):
             ],
             'get',
             project_views.file.grid_data,
-            json_renderer
+            streaming_json_renderer
         ),
 
         # Settings
@@ -10,6 +10,7 @@ import unicodedata
 
 import six
 
+from modularodm import Q
 from elasticsearch import (
     Elasticsearch,
     RequestError,
@@ -97,7 +98,14 @@ def get_counts(count_query, clean=True):
 
     res = es.search(index=INDEX, doc_type=None, search_type='count', body=count_query)
 
-    counts = {x['key']: x['doc_count'] for x in res['aggregations']['counts']['buckets'] if x['key'] in ALIASES.keys()}
+    return format_counts(res['aggregations']['counts']['buckets'])
+
+
+def format_counts(buckets):
+    """Convert `_type` aggregation buckets into a mapping from doc_type to
+    count, plus the sum of all counts under `total`.
+    """
+    counts = {x['key']: x['doc_count'] for x in buckets if x['key'] in ALIASES.keys()}
 
     counts['total'] = sum([val for val in counts.values()])
     return counts
@@ -132,6 +140,9 @@ def search(query, index=None, doc_type='_all'):
         typeAliases: the doc_types that exist in the search database
     """
     index = index or INDEX
+    if settings.ELASTIC_COMBINED_SEARCH:
+        return search_combined(query, index=index, doc_type=doc_type)
+
     tag_query = copy.deepcopy(query)
     count_query = copy.deepcopy(query)
 
@@ -158,19 +169,77 @@ def search(query, index=None, doc_type='_all'):
     return return_value
 
 
+def build_combined_query(query, doc_type='_all'):
+    """Add the type count and tag cloud aggregations to a copy of ``query``.
+
+    Aggregations are computed over every doc_type, as they are by `get_counts`
+    and `get_tags`; a restriction to ``doc_type`` is applied to the hits only,
+    as a post filter.
+    """
+    combined = dict(query)
+    combined['aggregations'] = {
+        'counts': {
+            'terms': {
+                'field': '_type',
+            }
+        },
+        'tag_cloud': {
+            'terms': {'field': 'tags'}
+        },
+    }
+    if doc_type and doc_type != '_all':
+        type_filter = {'terms': {'_type': doc_type.split(',')}}
+        if 'post_filter' in combined:
+            combined['post_filter'] = {'and': [combined['post_filter'], type_filter]}
+        else:
+            combined['post_filter'] = type_filter
+    return combined
+
+
+@requires_search
+def search_combined(query, index=None, doc_type='_all'):
+    """Search for a query, fetching results, counts and tags in a single
+    request to elasticsearch. Returns the same structure as `search`.
+    """
+    index = index or INDEX
+    raw_results = es.search(index=index, doc_type=None, body=build_combined_query(query, doc_type))
+    aggregations = raw_results['aggregations']
+
+    results = [hit['_source'] for hit in raw_results['hits']['hits']]
+    return {
+        'results': format_results(results),
+        'counts': format_counts(aggregations['counts']['buckets']),
+        'tags': aggregations['tag_cloud']['buckets'],
+        'typeAliases': ALIASES
+    }
+
+
 def format_results(results):
+    parents = load_parents([
+        result['parent_id'] for result in results
+        if result.get('category') in {'project', 'component', 'registration'}
+        and result.get('parent_id')
+    ])
     ret = []
     for result in results:
         if result.get('category') == 'user':
             result['url'] = '/profile/' + result['id']
         elif result.get('category') in {'project', 'component', 'registration'}:
-            result = format_result(result, result.get('parent_id'))
+            result = format_result(result, result.get('parent_id'), parents=parents)
         ret.append(result)
     return ret
 
 
-def format_result(result, parent_id=None):
-    parent_info = load_parent(parent_id)
+def format_result(result, parent_id=None, parents=None):
+    """Format a node search result.
+
+    :param dict parents: Optional mapping of parent ids to parent info, as
+        returned by `load_parents`; if not given, the parent is loaded
+    """
+    if parents is None:
+        parent_info = load_parent(parent_id)
+    else:
+        parent_info = parents.get(parent_id)
     formatted_result = {
         'contributors': result['contributors'],
         'wiki_link': result['url'] + 'wiki/',
@@ -201,8 +270,25 @@ def load_parent(parent_id):
     parent = Node.load(parent_id)
     if parent is None:
         return None
+    return serialize_parent(parent)
+
+
+def load_parents(parent_ids):
+    """Load the parents of a page of results with a single query.
+
+    :return: Dictionary mapping each parent id found to its parent info
+    """
+    if not parent_ids:
+        return {}
+    return {
+        parent._id: serialize_parent(parent)
+        for parent in Node.find(Q('_id', 'in', list(set(parent_ids))))
+    }
+
+
+def serialize_parent(parent):
     parent_info = {}
-    if parent is not None and parent.is_public:
+    if parent.is_public:
         parent_info['title'] = parent.title
         parent_info['url'] = parent.url
         parent_info['is_registration'] = parent.is_registration
@@ -227,70 +313,169 @@ def get_doctype_from_node(node):
         return node.category
 
 
+def get_node_parent_id(node, category):
+    """Return the parent id to store for ``node``.
+
+    :raises: IndexError if ``node`` is an orphaned component
+    """
+    if category == 'project':
+        return None
+    return node.parent_id
+
+
+def serialize_node(node, category, parent_id=None):
+    """Build the search document for a public node."""
+    from website.addons.wiki.model import NodeWikiPage
+
+    try:
+        normalized_title = six.u(node.title)
+    except TypeError:
+        normalized_title = node.title
+    normalized_title = unicodedata.normalize('NFKD', normalized_title).encode('ascii', 'ignore')
+
+    elastic_document = {
+        'id': node._id,
+        'contributors': [
+            {
+                'fullname': x.fullname,
+                'url': x.profile_url if x.is_active else None
+            }
+            for x in node.visible_contributors
+            if x is not None
+        ],
+        'title': node.title,
+        'normalized_title': normalized_title,
+        'category': category,
+        'public': node.is_public,
+        'tags': [tag._id for tag in node.tags if tag],
+        'description': node.description,
+        'url': node.url,
+        'is_registration': node.is_registration,
+        'is_pending_registration': node.is_pending_registration,
+        'is_retracted': node.is_retracted,
+        'is_pending_retraction': node.is_pending_retraction,
+        'embargo_end_date': node.embargo_end_date.strftime("%A, %b. %d, %Y") if node.embargo_end_date else False,
+        'is_pending_embargo': node.is_pending_embargo,
+        'registered_date': node.registered_date,
+        'wikis': {},
+        'parent_id': parent_id,
+        'date_created': node.date_created,
+        'boost': int(not node.is_registration) + 1,  # This is for making registered projects less relevant
+    }
+
+    if not node.is_retracted:
+        for wiki in [
+            NodeWikiPage.load(x)
+            for x in node.wiki_pages_current.values()
+        ]:
+            elastic_document['wikis'][wiki.page_name] = wiki.raw_text(node)
+
+    return elastic_document
+
+
+def is_node_searchable(node):
+    return node.is_public and not node.is_deleted and not node.archiving
+
+
 @requires_search
 def update_node(node, index=None):
     index = index or INDEX
-    from website.addons.wiki.model import NodeWikiPage
 
     category = get_doctype_from_node(node)
 
-    if category == 'project':
-        elastic_document_id = node._id
-        parent_id = None
-    else:
-        try:
-            elastic_document_id = node._id
-            parent_id = node.parent_id
-        except IndexError:
-            # Skip orphaned components
-            return
-    if node.is_deleted or not node.is_public or node.archiving:
+    elastic_document_id = node._id
+    try:
+        parent_id = get_node_parent_id(node, category)
+    except IndexError:
+        # Skip orphaned components
+        return
+    if not is_node_searchable(node):
         delete_doc(elastic_document_id, node)
     else:
-        try:
-            normalized_title = six.u(node.title)
-        except TypeError:
-            normalized_title = node.title
-        normalized_title = unicodedata.normalize('NFKD', normalized_title).encode('ascii', 'ignore')
-
-        elastic_document = {
-            'id': elastic_document_id,
-            'contributors': [
-                {
-                    'fullname': x.fullname,
-                    'url': x.profile_url if x.is_active else None
-                }
-                for x in node.visible_contributors
-                if x is not None
-            ],
-            'title': node.title,
-            'normalized_title': normalized_title,
-            'category': category,
-            'public': node.is_public,
-            'tags': [tag._id for tag in node.tags if tag],
-            'description': node.description,
-            'url': node.url,
-            'is_registration': node.is_registration,
-            'is_pending_registration': node.is_pending_registration,
-            'is_retracted': node.is_retracted,
-            'is_pending_retraction': node.is_pending_retraction,
-            'embargo_end_date': node.embargo_end_date.strftime("%A, %b. %d, %Y") if node.embargo_end_date else False,
-            'is_pending_embargo': node.is_pending_embargo,
-            'registered_date': node.registered_date,
-            'wikis': {},
-            'parent_id': parent_id,
-            'date_created': node.date_created,
-            'boost': int(not node.is_registration) + 1,  # This is for making registered projects less relevant
+        elastic_document = serialize_node(node, category, parent_id)
+        es.index(index=index, doc_type=category, id=elastic_document_id, body=elastic_document, refresh=True)
+
+
+def get_node_action(node, index):
+    """Return the bulk action that brings the search entry for ``node`` up to
+    date, or `None` if ``node`` is an orphaned component.
+    """
+    category = get_doctype_from_node(node)
+    try:
+        parent_id = get_node_parent_id(node, category)
+    except IndexError:
+        return None
+    if not is_node_searchable(node):
+        return {
+            '_op_type': 'delete',
+            '_index': index,
+            '_type': 'registration' if node.is_registration else node.project_or_component,
+            '_id': node._id,
         }
+    return {
+        '_op_type': 'index',
+        '_index': index,
+        '_type': category,
+        '_id': node._id,
+        '_source': serialize_node(node, category, parent_id),
+    }
 
-        if not node.is_retracted:
-            for wiki in [
-                NodeWikiPage.load(x)
-                for x in node.wiki_pages_current.values()
-            ]:
-                elastic_document['wikis'][wiki.page_name] = wiki.raw_text(node)
 
-        es.index(index=index, doc_type=category, id=elastic_document_id, body=elastic_document, refresh=True)
+def get_user_action(user, index):
+    """Return the bulk action that brings the search entry for ``user`` up to
+    date.
+    """
+    if not user.is_active:
+        return {
+            '_op_type': 'delete',
+            '_index': index,
+            '_type': 'user',
+            '_id': user._id,
+        }
+    return {
+        '_op_type': 'index',
+        '_index': index,
+        '_type': 'user',
+        '_id': user._id,
+        '_source': serialize_user(user),
+    }
+
+
+@requires_search
+def bulk_update_nodes(nodes, index=None, refresh=False):
+    """Index or delete the search entries for ``nodes`` in bulk requests.
+
+    :param bool refresh: Refresh the index once all actions are written
+    :return: Tuple of the number of successful actions and a list of errors
+    """
+    index = index or INDEX
+    actions = [get_node_action(node, index) for node in nodes]
+    return _bulk([action for action in actions if action is not None], refresh=refresh)
+
+
+@requires_search
+def bulk_update_users(users, index=None, refresh=False):
+    """Index or delete the search entries for ``users`` in bulk requests.
+
+    :param bool refresh: Refresh the index once all actions are written
+    :return: Tuple of the number of successful actions and a list of errors
+    """
+    index = index or INDEX
+    return _bulk([get_user_action(user, index) for user in users], refresh=refresh)
+
+
+def _bulk(actions, refresh=False):
+    if not actions:
+        return 0, []
+    success, errors = helpers.bulk(es, actions, refresh=refresh, raise_on_error=False)
+    # Deleting an entry that was never indexed is not an error
+    errors = [
+        error for error in errors
+        if error.get('delete', {}).get('status') != 404
+    ]
+    for error in errors:
+        logger.error('Failed to update search entry: {0}'.format(error))
+    return success, errors
 
 
 def bulk_update_contributors(nodes, index=INDEX):
@@ -321,16 +506,8 @@ def bulk_update_contributors(nodes, index=INDEX):
     return helpers.bulk(es, actions)
 
 
-@requires_search
-def update_user(user, index=None):
-    index = index or INDEX
-    if not user.is_active:
-        try:
-            es.delete(index=index, doc_type='user', id=user._id, refresh=True, ignore=[404])
-        except NotFoundError:
-            pass
-        return
-
+def serialize_user(user):
+    """Build the search document for an active user."""
     names = dict(
         fullname=user.fullname,
         given_name=user.given_name,
@@ -365,6 +542,20 @@ def update_user(user, index=None):
         'boost': 2,  # TODO(fabianvf): Probably should make this a constant or something
     }
 
+    return user_doc
+
+
+@requires_search
+def update_user(user, index=None):
+    index = index or INDEX
+    if not user.is_active:
+        try:
+            es.delete(index=index, doc_type='user', id=user._id, refresh=True, ignore=[404])
+        except NotFoundError:
+            pass
+        return
+
+    user_doc = serialize_user(user)
     es.index(index=index, doc_type='user', body=user_doc, id=user._id, refresh=True)
 
 
@@ -462,19 +653,27 @@ def search_contributor(query, page=0, size=10, exclude=None, current_user=None):
     pages = math.ceil(results['counts'].get('user', 0) / size)
     validate_page_num(page, pages)
 
+    # Load all users on the page with a single query
+    user_ids = [doc['id'] for doc in docs]
+    users_by_id = {user._id: user for user in User.find(Q('_id', 'in', user_ids))}
+    if current_user:
+        current_user_projects = set(current_user.node__contributed._to_primary_keys())
+
     users = []
     for doc in docs:
         # TODO: use utils.serialize_user
-        user = User.load(doc['id'])
+        user = users_by_id.get(doc['id'])
 
+        if user is None:
+            logger.error('Could not load user {0}'.format(doc['id']))
+            continue
         if current_user:
-            n_projects_in_common = current_user.n_projects_in_common(user)
+            n_projects_in_common = len(current_user_projects.intersection(
+                user.node__contributed._to_primary_keys()
+            ))
         else:
             n_projects_in_common = 0
 
-        if user is None:
-            logger.error('Could not load user {0}'.format(doc['id']))
-            continue
         if user.is_active:  # exclude merged, unregistered, etc.
             current_employment = None
             education = None
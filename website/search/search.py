@@ -2,6 +2,7 @@ import logging
 
 from website import settings
 from website.search import share_search
+from website.search import tasks
 
 logger = logging.getLogger(__name__)
 
@@ -26,9 +27,17 @@ def search(query, index=None, doc_type=None):
 
 @requires_search
 def update_node(node, index=None):
+    if index is None and settings.SEARCH_INDEX_ASYNC:
+        tasks.enqueue(tasks.NODE, node._id)
+        return
     index = index or settings.ELASTIC_INDEX
     search_engine.update_node(node, index=index)
 
+@requires_search
+def bulk_update_nodes(nodes, index=None, refresh=False):
+    index = index or settings.ELASTIC_INDEX
+    return search_engine.bulk_update_nodes(nodes, index=index, refresh=refresh)
+
 @requires_search
 def delete_node(node, index=None):
     index = index or settings.ELASTIC_INDEX
@@ -43,9 +52,17 @@ def update_contributors(nodes):
 
 @requires_search
 def update_user(user, index=None):
+    if index is None and settings.SEARCH_INDEX_ASYNC:
+        tasks.enqueue(tasks.USER, user._id)
+        return
     index = index or settings.ELASTIC_INDEX
     search_engine.update_user(user, index=index)
 
+@requires_search
+def bulk_update_users(users, index=None, refresh=False):
+    index = index or settings.ELASTIC_INDEX
+    return search_engine.bulk_update_users(users, index=index, refresh=refresh)
+
 
 @requires_search
 def delete_all():
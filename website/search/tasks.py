@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Deferred search indexing. Saving a node or user records its id in a queue
+collection; a celery task later drains the queue and updates the search index
+with bulk requests. Ids queued more than once before the next flush are
+indexed only once.
+"""
+
+import logging
+import datetime
+
+from bson import ObjectId
+from modularodm import Q
+
+from framework.mongo import database
+from framework.tasks import app
+from framework.tasks.handlers import enqueue_task
+from framework.transactions.context import transaction
+
+from website import settings
+
+
+logger = logging.getLogger(__name__)
+
+QUEUE_COLLECTION = 'searchindexqueue'
+
+NODE = 'node'
+USER = 'user'
+
+# Batches claimed longer ago than this are assumed to belong to a crashed
+# worker and are claimed again
+CLAIM_TIMEOUT = datetime.timedelta(minutes=10)
+
+
+def enqueue(kind, object_id, db=None):
+    """Queue the search entry for a node or user to be updated, and schedule
+    a flush of the queue.
+
+    :param str kind: `NODE` or `USER`
+    :param str object_id: Primary key of the node or user
+    """
+    db = db or database
+    db[QUEUE_COLLECTION].update(
+        {'_id': '{0}:{1}'.format(kind, object_id)},
+        {
+            '$set': {
+                'kind': kind,
+                'object_id': object_id,
+                'batch': None,
+                'date_queued': datetime.datetime.utcnow(),
+            },
+        },
+        upsert=True,
+        manipulate=False,
+    )
+    signature = flush_queue.si()
+    signature.set(countdown=settings.SEARCH_INDEX_FLUSH_DELAY)
+    enqueue_task(signature)
+
+
+def get_queue_depth(db=None):
+    """Return the number of search entries waiting to be updated."""
+    db = db or database
+    return db[QUEUE_COLLECTION].count()
+
+
+def claim_batch(db=None):
+    """Mark every unclaimed (or abandoned) queue entry with a new batch id.
+
+    :return: The batch id and the claimed entries
+    """
+    db = db or database
+    collection = db[QUEUE_COLLECTION]
+    batch = str(ObjectId())
+    now = datetime.datetime.utcnow()
+    collection.update(
+        {'$or': [
+            {'batch': None},
+            {'date_claimed': {'$lt': now - CLAIM_TIMEOUT}},
+        ]},
+        {'$set': {'batch': batch, 'date_claimed': now}},
+        multi=True,
+    )
+    return batch, list(collection.find({'batch': batch}))
+
+
+def flush(db=None):
+    """Update the search entries for all queued nodes and users. Entries
+    queued again while the flush is running are kept for the next flush.
+
+    :return: Number of queue entries processed
+    """
+    from website.models import Node, User
+    from website.search import search
+
+    db = db or database
+    batch, entries = claim_batch(db=db)
+    if not entries:
+        return 0
+    node_ids = [entry['object_id'] for entry in entries if entry['kind'] == NODE]
+    user_ids = [entry['object_id'] for entry in entries if entry['kind'] == USER]
+    if node_ids:
+        search.bulk_update_nodes(Node.find(Q('_id', 'in', node_ids)))
+    if user_ids:
+        search.bulk_update_users(User.find(Q('_id', 'in', user_ids)))
+    db[QUEUE_COLLECTION].remove({'batch': batch})
+    logger.info('Flushed {0} search updates; {1} remaining'.format(
+        len(entries), get_queue_depth(db=db),
+    ))
+    return len(entries)
+
+
+@app.task
+@transaction()
+def flush_queue():
+    flush()
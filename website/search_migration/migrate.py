@@ -3,47 +3,208 @@
 '''Migration script for Search-enabled Models.'''
 from __future__ import absolute_import
 
+import time
 import logging
+import multiprocessing
 
-from elasticsearch import helpers
+from elasticsearch import Elasticsearch, helpers
 from modularodm.query.querydialect import DefaultQueryDialect as Q
 
 from website import settings
 from framework.auth import User
-from website.models import Node
+from framework.mongo import database, StoredObject
+from website.models import Node, Tag
 from website.app import init_app
+from website.addons.wiki.model import NodeWikiPage
 import website.search.search as search
 from scripts import utils as script_utils
+from website.search import elastic_search
 from website.search.elastic_search import es
 
 
 logger = logging.getLogger(__name__)
 
-def migrate_nodes(index):
-    logger.info("Migrating nodes to index: {}".format(index))
-    n_iter = 0
-    nodes = Node.find(Q('is_public', 'eq', True) & Q('is_deleted', 'eq', False))
+# Number of documents built and written per bulk request
+BATCH_SIZE = 500
+
+# Refresh interval restored on the new index once all documents are written
+REFRESH_INTERVAL = '1s'
+
+
+class Progress(object):
+    """Track and log progress, throughput and failures of a reindex.
+
+    :param str name: Name of the documents being indexed, for logging
+    :param int total: Number of documents to process
+    """
+
+    def __init__(self, name, total):
+        self.name = name
+        self.total = total
+        self.processed = 0
+        self.indexed = 0
+        self.failed = []
+        self.start = time.time()
+
+    @property
+    def elapsed(self):
+        return time.time() - self.start
+
+    @property
+    def throughput(self):
+        """Documents processed per second."""
+        return self.processed / self.elapsed if self.elapsed else 0
+
+    def update(self, processed, indexed, failed):
+        self.processed += processed
+        self.indexed += indexed
+        self.failed.extend(failed)
+        logger.info('{0}: {1}/{2} processed, {3} indexed, {4} failed ({5:.1f}/s)'.format(
+            self.name, self.processed, self.total, self.indexed, len(self.failed), self.throughput,
+        ))
+
+    def finish(self):
+        logger.info('{0}: finished {1} in {2:.1f}s; {3} indexed, {4} failed'.format(
+            self.name, self.processed, self.elapsed, self.indexed, len(self.failed),
+        ))
+        if self.failed:
+            logger.error('{0} that failed to index: {1}'.format(self.name, self.failed))
+
+
+def _init_worker():
+    """Initialize a reindex worker process. Connections opened by the parent
+    must not be shared with forked children, so use a per-process MongoDB
+    client and open a new elasticsearch connection.
+    """
+    settings.DB_POOLED_CLIENT = True
+    elastic_search.es = Elasticsearch(
+        settings.ELASTIC_URI,
+        request_timeout=settings.ELASTIC_TIMEOUT,
+    )
+
+
+def _failed_ids(errors):
+    return [error.values()[0].get('_id') for error in errors]
+
+
+def prefetch_node_relations(nodes):
+    """Load the contributors, tags and current wiki pages of ``nodes`` with
+    one query per collection, so that building their search documents reads
+    them from the ODM cache.
+    """
+    contributor_ids, tag_ids, wiki_ids = set(), set(), set()
     for node in nodes:
-        search.update_node(node, index=index)
-        n_iter += 1
+        contributor_ids.update(node.contributors._to_primary_keys())
+        tag_ids.update(node.tags._to_primary_keys())
+        wiki_ids.update(node.wiki_pages_current.values())
+    list(User.find(Q('_id', 'in', list(contributor_ids))))
+    list(Tag.find(Q('_id', 'in', list(tag_ids))))
+    list(NodeWikiPage.find(Q('_id', 'in', list(wiki_ids))))
+
+
+def index_node_batch(args):
+    """Build and write the search documents for a batch of nodes.
+
+    :param tuple args: Index name and list of node ids
+    :return: Tuple of the number of nodes processed, the number indexed and
+        the ids of nodes that failed
+    """
+    index, node_ids = args
+    try:
+        nodes = list(Node.find(Q('_id', 'in', node_ids)))
+        prefetch_node_relations(nodes)
+        indexed, errors = search.bulk_update_nodes(nodes, index=index)
+    except Exception as error:
+        logger.exception(error)
+        return len(node_ids), 0, node_ids
+    finally:
+        StoredObject._clear_caches()
+    return len(node_ids), indexed, _failed_ids(errors)
+
+
+def index_user_batch(args):
+    """Build and write the search documents for the active users in a batch.
+
+    :param tuple args: Index name and list of user ids
+    :return: Tuple of the number of users processed, the number indexed and
+        the ids of users that failed
+    """
+    index, user_ids = args
+    try:
+        users = [user for user in User.find(Q('_id', 'in', user_ids)) if user.is_active]
+        indexed, errors = search.bulk_update_users(users, index=index)
+    except Exception as error:
+        logger.exception(error)
+        return len(user_ids), 0, user_ids
+    finally:
+        StoredObject._clear_caches()
+    return len(user_ids), indexed, _failed_ids(errors)
+
+
+def run_batches(name, func, index, ids, processes=1, batch_size=BATCH_SIZE):
+    """Split ``ids`` into contiguous ranges of ``batch_size`` and index each
+    range with ``func``, in a pool of ``processes`` worker processes if more
+    than one is requested.
+
+    :return: `Progress` summarizing the run
+    """
+    progress = Progress(name, len(ids))
+    batches = [
+        (index, ids[start:start + batch_size])
+        for start in range(0, len(ids), batch_size)
+    ]
+    if processes > 1:
+        pool = multiprocessing.Pool(processes, initializer=_init_worker)
+        try:
+            for result in pool.imap_unordered(func, batches):
+                progress.update(*result)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for batch in batches:
+            progress.update(*func(batch))
+    progress.finish()
+    return progress
+
+
+def get_ids(collection, query=None):
+    """Return the primary keys of the documents in ``collection`` matching
+    ``query``, in order.
+    """
+    cursor = database[collection].find(query or {}, {'_id': True}).sort('_id', 1)
+    return [record['_id'] for record in cursor]
+
+
+def disable_refresh(index):
+    es.indices.put_settings(index=index, body={'index': {'refresh_interval': '-1'}})
+
+
+def enable_refresh(index):
+    es.indices.put_settings(index=index, body={'index': {'refresh_interval': REFRESH_INTERVAL}})
+    es.indices.refresh(index=index)
+
+def migrate_nodes(index, processes=1, batch_size=BATCH_SIZE):
+    logger.info("Migrating nodes to index: {}".format(index))
+    node_ids = get_ids(Node._name, {'is_public': True, 'is_deleted': False})
+    progress = run_batches('Nodes', index_node_batch, index, node_ids,
+                           processes=processes, batch_size=batch_size)
 
-    logger.info('Nodes migrated: {}'.format(n_iter))
+    logger.info('Nodes migrated: {}'.format(progress.indexed))
+    return progress
 
 
-def migrate_users(index):
+def migrate_users(index, processes=1, batch_size=BATCH_SIZE):
     logger.info("Migrating users to index: {}".format(index))
-    n_migr = 0
-    n_iter = 0
-    for user in User.find():
-        if user.is_active:
-            search.update_user(user, index=index)
-            n_migr += 1
-        n_iter += 1
+    user_ids = get_ids(User._name)
+    progress = run_batches('Users', index_user_batch, index, user_ids,
+                           processes=processes, batch_size=batch_size)
 
-    logger.info('Users iterated: {0}\nUsers migrated: {1}'.format(n_iter, n_migr))
+    logger.info('Users iterated: {0}\nUsers migrated: {1}'.format(progress.processed, progress.indexed))
+    return progress
 
 
-def migrate(delete, index=None, app=None):
+def migrate(delete, index=None, app=None, processes=1, batch_size=BATCH_SIZE):
     index = index or settings.ELASTIC_INDEX
     app = app or init_app("website.settings", set_backends=True, routes=True)
 
@@ -52,8 +213,12 @@ def migrate(delete, index=None, app=None):
     ctx.push()
     new_index = set_up_index(index)
 
-    migrate_nodes(new_index)
-    migrate_users(new_index)
+    # Documents are not searchable until the alias is swapped, so skip
+    # refreshing the new index while it is being built
+    disable_refresh(new_index)
+    migrate_nodes(new_index, processes=processes, batch_size=batch_size)
+    migrate_users(new_index, processes=processes, batch_size=batch_size)
+    enable_refresh(new_index)
 
     set_up_alias(index, new_index)
 
@@ -66,6 +66,13 @@ SEARCH_ENGINE = 'elastic'  # Can be 'elastic', or None
 ELASTIC_URI = 'localhost:9200'
 ELASTIC_TIMEOUT = 10
 ELASTIC_INDEX = 'website'
+# Fetch search results, type counts and the tag cloud in one request
+ELASTIC_COMBINED_SEARCH = True
+# Queue search index updates on save and write them in bulk from a celery task
+SEARCH_INDEX_ASYNC = False
+# Seconds to wait before flushing queued search updates, so that repeated saves
+# of the same node or user are indexed once
+SEARCH_INDEX_FLUSH_DELAY = 5
 SHARE_ELASTIC_URI = ELASTIC_URI
 SHARE_ELASTIC_INDEX = 'share'
 # For old indices
@@ -125,6 +132,22 @@ DB_PORT = os_env.get('OSF_DB_PORT', 27017)
 DB_NAME = 'osf20130903'
 DB_USER = None
 DB_PASS = None
+# Share one MongoClient per worker process instead of connecting on every request
+DB_POOLED_CLIENT = False
+# Maximum number of sockets held by the pooled client in each process
+DB_MAX_POOL_SIZE = 10
+
+# Maximum number of compiled mako templates kept in memory per process
+MAKO_CACHE_SIZE = 1000
+# Compile all mako templates when the app is initialized, outside debug mode
+PRECOMPILE_TEMPLATES = True
+
+# Fetch the data for nested templates of a page concurrently
+RENDER_NESTED_CONCURRENTLY = False
+# Number of threads per process used to fetch nested template data
+RENDER_NESTED_THREADS = 4
+# Seconds to wait for the data of each nested template
+RENDER_NESTED_TIMEOUT = 10
 
 # Cache settings
 SESSION_HISTORY_LENGTH = 5
@@ -133,6 +156,14 @@ SESSION_HISTORY_IGNORE_RULES = [
     lambda url: 'favicon' in url,
     lambda url: url.startswith('/api/'),
 ]
+# Unchanged sessions are saved at most this often, to keep the modification
+# date used by scripts/clear_sessions.py current
+SESSION_TOUCH_INTERVAL = datetime.timedelta(hours=1)
+# Seconds session data may be served from a process-local cache instead of the
+# database; logouts in other processes take up to this long to apply. 0 disables
+SESSION_CACHE_TIMEOUT = 0
+# Maximum number of sessions kept in the process-local cache
+SESSION_CACHE_SIZE = 1000
 
 # TODO: Configuration should not change between deploys - this should be dynamic.
 CANONICAL_DOMAIN = 'openscienceframework.org'
@@ -142,6 +173,14 @@ SHORT_DOMAIN = 'osf.io'
 # TODO: Combine Python and JavaScript config
 COMMENT_MAXLENGTH = 500
 
+# Number of log ids fetched per node at a time when merging activity feeds
+LOG_FEED_BATCH_SIZE = 50
+# Maximum number of logs counted for the approximate total of a node's log pages
+AGGREGATE_LOG_COUNT_LIMIT = 1000
+
+# Number of GUID ids generated and checked at a time for the in-process pool
+GUID_POOL_BATCH_SIZE = 100
+
 # Gravatar options
 GRAVATAR_SIZE_PROFILE = 70
 GRAVATAR_SIZE_ADD_CONTRIBUTOR = 40
@@ -189,6 +228,7 @@ CELERY_IMPORTS = (
     'framework.email.tasks',
     'framework.analytics.tasks',
     'website.mailchimp_utils',
+    'website.search.tasks',
     'scripts.send_digest'
 )
 
@@ -255,6 +295,8 @@ DEFAULT_HMAC_SECRET = 'changeme'
 DEFAULT_HMAC_ALGORITHM = hashlib.sha256
 WATERBUTLER_URL = 'http://localhost:7777'
 WATERBUTLER_ADDRS = ['127.0.0.1']
+# Number of pooled connections kept open to WaterButler
+WATERBUTLER_POOL_SIZE = 10
 
 # Test identifier namespaces
 DOI_NAMESPACE = 'doi:10.5072/FK2'
@@ -291,7 +291,7 @@ class NodeProjectCollector(object):
                     'url': contributor.url,
                 })
         try:
-            user = node.logs[-1].user
+            user = node.last_log.user
             modified_by = user.family_name or user.given_name
         except (AttributeError, IndexError):
             modified_by = ''
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""Shared HTTP session for requests to WaterButler."""
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from website import settings
+
+
+# Pool and reuse connections to WaterButler instead of opening one per request
+session = requests.Session()
+session.mount(
+    settings.WATERBUTLER_URL,
+    HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.WATERBUTLER_POOL_SIZE,
+    ),
+)
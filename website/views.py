@@ -46,7 +46,7 @@ def _rescale_ratio(auth, nodes):
     if not nodes:
         return 0
     counts = [
-        len(node.logs)
+        node.log_count
         for node in nodes
         if node.can_view(auth)
     ]
@@ -269,12 +269,12 @@ def watched_logs_get(**kwargs):
             message_long='Invalid value for "size".'
         ))
 
-    total = sum(1 for x in user.get_recent_log_ids())
+    total = user.get_recent_log_count()
     paginated_logs, pages = paginate(user.get_recent_log_ids(), total, page, size)
-    logs = (model.NodeLog.load(id) for id in paginated_logs)
+    logs = model.NodeLog.find(Q('_id', 'in', list(paginated_logs))).sort('-_id')
 
     return {
-        "logs": [serialize_log(log) for log in logs],
+        "logs": serialize_logs(logs),
         "total": total,
         "pages": pages,
         "page": page
@@ -283,18 +283,62 @@ def watched_logs_get(**kwargs):
 
 def serialize_log(node_log, auth=None, anonymous=False):
     '''Return a dictionary representation of the log.'''
-    return {
-        'id': str(node_log._primary_key),
-        'user': node_log.user.serialize()
-        if isinstance(node_log.user, User)
-        else {'fullname': node_log.foreign_user},
-        'contributors': [node_log._render_log_contributor(c) for c in node_log.params.get("contributors", [])],
-        'action': node_log.action,
-        'params': sanitize.unescape_entities(node_log.params),
-        'date': utils.iso8601format(node_log.date),
-        'node': node_log.node.serialize(auth) if node_log.node else None,
-        'anonymous': anonymous
-    }
+    return next(serialize_logs([node_log], auth=auth, anonymous=anonymous))
+
+
+def serialize_logs(node_logs, auth=None, anonymous=False, batch_size=50):
+    '''Return a generator of dictionary representations of logs. Logs are
+    serialized in batches of `batch_size`; the nodes and users each batch
+    refers to are loaded with one query per collection, and each node is
+    serialized once per batch.
+    '''
+    node_logs = iter(node_logs)
+    while True:
+        batch = list(itertools.islice(node_logs, batch_size))
+        if not batch:
+            return
+        for serialized in _serialize_log_batch(batch, auth, anonymous):
+            yield serialized
+
+
+def _serialize_log_batch(node_logs, auth, anonymous):
+    node_ids, user_ids = set(), set()
+    for node_log in node_logs:
+        node_ids.update([node_log.params.get('node'), node_log.params.get('project')])
+        user_ids.add(node_log.user_id)
+        user_ids.update(node_log.params.get('contributors', []))
+    node_ids.discard(None)
+    user_ids.discard(None)
+    nodes = {
+        node._id: node
+        for node in Node.find(Q('_id', 'in', list(node_ids)))
+    } if node_ids else {}
+    users = {
+        user._id: user
+        for user in User.find(Q('_id', 'in', list(user_ids)))
+    } if user_ids else {}
+
+    serialized_nodes = {}
+    for node_log in node_logs:
+        node = nodes.get(node_log.params.get('node')) or nodes.get(node_log.params.get('project'))
+        if node and node._id not in serialized_nodes:
+            serialized_nodes[node._id] = node.serialize(auth)
+        user = users.get(node_log.user_id)
+        yield {
+            'id': str(node_log._primary_key),
+            'user': user.serialize()
+            if user
+            else {'fullname': node_log.foreign_user},
+            'contributors': [
+                model.NodeLog.render_contributor(users[c], node) if c in users else None
+                for c in node_log.params.get('contributors', [])
+            ],
+            'action': node_log.action,
+            'params': sanitize.unescape_entities(node_log.params),
+            'date': utils.iso8601format(node_log.date),
+            'node': serialized_nodes[node._id] if node else None,
+            'anonymous': anonymous
+        }
 
 
 def reproducibility():